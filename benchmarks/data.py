@@ -0,0 +1,160 @@
+import math
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from entries.models import Entry
+from events.models import Event
+from stats import aggregates
+
+USERNAME_PREFIX = "bench_"
+
+WORDS = (
+    "morning run coffee walk lunch meeting dinner friends family book movie "
+    "music garden yoga gym swim bike trip train weekend holiday beach forest "
+    "lake sauna project deadline review call idea plan notes recipe bread soup "
+    "market budget doctor dentist birthday party concert museum study exam "
+    "course language piano guitar painting photo sleep rain snow sun spring "
+    "summer autumn winter"
+).split()
+
+# Event lengths and how common they are
+DURATIONS = [
+    (timedelta(minutes=30), 25),
+    (timedelta(hours=1), 35),
+    (timedelta(hours=1, minutes=30), 15),
+    (timedelta(hours=2), 15),
+    (timedelta(hours=8), 5),
+    (timedelta(days=1), 3),
+    (timedelta(days=3), 2),
+]
+
+RECURRENCES = [
+    "FREQ=WEEKLY",
+    "FREQ=WEEKLY;BYDAY=MO,WE,FR",
+    "FREQ=DAILY;COUNT=10",
+    "FREQ=MONTHLY",
+]
+
+
+def lognormal(rng, mean, sigma=1.0):
+    """
+    A positive integer with the given mean and a long tail: most users
+    write a little, a few write a lot.
+    """
+    mu = math.log(mean) - sigma**2 / 2
+    return round(rng.lognormvariate(mu, sigma))
+
+
+def words(rng, mean):
+    return " ".join(rng.choices(WORDS, k=max(lognormal(rng, mean, 0.6), 1)))
+
+
+def past(rng, now, days):
+    # Recent days are busier than old ones
+    return now - timedelta(days=days * rng.betavariate(1, 2), seconds=rng.random())
+
+
+def generate(
+    users=20,
+    entries=200,
+    events=50,
+    days=365,
+    seed=0,
+    password="benchmark",
+    batch_size=1000,
+):
+    """
+    Create users with entries and events, reproducibly for a seed, and return
+    how many of each were created. All users get the same password.
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+    password = make_password(password)
+
+    with transaction.atomic():
+        authors = User.objects.bulk_create(
+            User(
+                username=f"{USERNAME_PREFIX}{seed}_{index:05d}",
+                email=f"{USERNAME_PREFIX}{seed}_{index:05d}@example.com",
+                password=password,
+            )
+            for index in range(users)
+        )
+
+        entry_objs = []
+        for author in authors:
+            for _ in range(lognormal(rng, entries)):
+                created_at = past(rng, now, days)
+                entry_objs.append(
+                    Entry(
+                        title=words(rng, 4).capitalize(),
+                        body=words(rng, 80),
+                        author=author,
+                        created_at=created_at,
+                        # Some entries are edited later on
+                        updated_at=(
+                            created_at + (now - created_at) * rng.random()
+                            if rng.random() < 0.2
+                            else created_at
+                        ),
+                        favorite=rng.random() < 0.1,
+                    )
+                )
+
+        event_objs = []
+        durations, weights = zip(*DURATIONS)
+        for author in authors:
+            for _ in range(lognormal(rng, events)):
+                # Events are planned ahead too, on quarter hours
+                start_time = (now + timedelta(days=60)) - timedelta(
+                    minutes=15 * rng.randrange((days + 60) * 24 * 4)
+                )
+                event = Event(
+                    title=words(rng, 3).capitalize(),
+                    description=words(rng, 15),
+                    start_time=start_time,
+                    end_time=start_time + rng.choices(durations, weights)[0],
+                    author=author,
+                    recurrence=rng.choice(RECURRENCES) if rng.random() < 0.1 else "",
+                    updated_at=past(rng, now, days),
+                )
+                event.set_derived_fields()
+                event_objs.append(event)
+
+        created = {
+            "users": len(authors),
+            "entries": len(
+                keep_timestamps(
+                    Entry, entry_objs, ["created_at", "updated_at"], batch_size
+                )
+            ),
+            "events": len(
+                keep_timestamps(Event, event_objs, ["updated_at"], batch_size)
+            ),
+        }
+
+        # Bulk inserts skip the signals that keep the statistics
+        aggregates.rebuild([author.pk for author in authors])
+
+    return created
+
+
+def keep_timestamps(model, objs, fields, batch_size):
+    """
+    Insert the objects with their own auto_now(_add) timestamps, which
+    bulk_create would replace with the current time.
+    """
+    timestamps = [[getattr(obj, field) for field in fields] for obj in objs]
+    objs = model.objects.bulk_create(objs, batch_size=batch_size)
+
+    for obj, values in zip(objs, timestamps):
+        for field, value in zip(fields, values):
+            setattr(obj, field, value)
+    model.objects.bulk_update(objs, fields, batch_size=batch_size)
+
+    return objs
@@ -0,0 +1,328 @@
+import asyncio
+import platform
+import statistics
+import threading
+import tracemalloc
+from contextlib import ExitStack
+from time import perf_counter
+
+import django
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import OperationalError, connection, connections, transaction
+from django.test import AsyncClient, Client, override_settings
+from django.utils import timezone
+
+from entries.models import Entry
+from lifestyle_app_backend import cache as response_cache
+
+COMPARED_METRICS = [
+    "p50_ms",
+    "p95_ms",
+    "p99_ms",
+    "queries",
+    "peak_memory_kb",
+    "throughput_rps",
+]
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def consume(response):
+    # Streaming responses only do their work while being read
+    if response.streaming:
+        for _ in response.streaming_content:
+            pass
+    return response
+
+
+def percentile(durations, percent):
+    if len(durations) == 1:
+        return durations[0]
+    return statistics.quantiles(durations, n=100, method="inclusive")[percent - 1]
+
+
+def login(user, password):
+    """
+    Return a test client that is logged in through the real login view,
+    with the access token as header and the refresh token as cookie.
+    """
+    client = Client(HTTP_HOST="localhost")
+    response = client.post(
+        "/users/login/",
+        {"username": user.username, "password": password},
+        content_type="application/json",
+    )
+    if response.status_code != 200:
+        raise ValueError(f"Login as {user.username} failed: {response.content!r}")
+
+    client.defaults["HTTP_AUTHORIZATION"] = f"Bearer {response.json()['access_token']}"
+    return client
+
+
+def measure(func, client, context, requests, warmup, cache):
+    for _ in range(warmup):
+        consume(func(client, context))
+
+    durations, queries, statuses = [], [], set()
+    for _ in range(requests):
+        if not cache:
+            response_cache.get_cache().clear()
+
+        counter = QueryCounter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(counter))
+            start = perf_counter()
+            response = consume(func(client, context))
+            durations.append(perf_counter() - start)
+
+        queries.append(counter.count)
+        statuses.add(response.status_code)
+
+    # Tracing slows everything down, so memory is measured on its own
+    if not cache:
+        response_cache.get_cache().clear()
+    tracemalloc.start()
+    try:
+        consume(func(client, context))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "requests": requests,
+        "p50_ms": round(percentile(durations, 50) * 1000, 3),
+        "p95_ms": round(percentile(durations, 95) * 1000, 3),
+        "p99_ms": round(percentile(durations, 99) * 1000, 3),
+        "mean_ms": round(statistics.fmean(durations) * 1000, 3),
+        "queries": statistics.median_low(queries),
+        "peak_memory_kb": round(peak / 1024, 1),
+        "statuses": sorted(statuses),
+    }
+
+
+async def consume_async(response):
+    response = await response
+    if response.streaming and not response.is_async:
+        # Synchronous iterators query the database while being read
+        return await sync_to_async(consume)(response)
+    if response.streaming:
+        async for _ in response.streaming_content:
+            pass
+    return response
+
+
+class AuthorizedAsyncClient(AsyncClient):
+    # Unlike Client, AsyncClient leaves default headers out of its requests
+    def __init__(self, authorization):
+        super().__init__()
+        self.authorization = authorization
+
+    def generic(self, *args, headers=None, **kwargs):
+        headers = {"Authorization": self.authorization, **(headers or {})}
+        return super().generic(*args, headers=headers, **kwargs)
+
+
+def measure_concurrent(func, client, context, requests, concurrency, cache):
+    """
+    Send the requests through an async client, `concurrency` at a time, and
+    return the throughput. Sync views run in the thread shared by the async
+    ORM too, so this mostly shows how the two kinds of views share it. The
+    response cache is only cleared before, not between these requests.
+    """
+    async_client = AuthorizedAsyncClient(client.defaults["HTTP_AUTHORIZATION"])
+    # The refresh token cookie
+    async_client.cookies = client.cookies
+    durations, statuses = [], set()
+
+    async def worker(count):
+        for _ in range(count):
+            start = perf_counter()
+            response = await consume_async(func(async_client, context))
+            durations.append(perf_counter() - start)
+            statuses.add(response.status_code)
+
+    async def send():
+        counts = [requests // concurrency] * concurrency
+        for index in range(requests % concurrency):
+            counts[index] += 1
+        start = perf_counter()
+        await asyncio.gather(*(worker(count) for count in counts))
+        return perf_counter() - start
+
+    if not cache:
+        response_cache.get_cache().clear()
+    elapsed = asyncio.run(send())
+    return {
+        "concurrency": concurrency,
+        "throughput_rps": round(requests / elapsed, 1),
+        "concurrent_p95_ms": round(percentile(durations, 95) * 1000, 3),
+        "concurrent_statuses": sorted(statuses),
+    }
+
+
+def hasher_throughput(hasher, seconds=2.0, password="benchmark"):
+    """
+    Return how many passwords the hasher checks per second on one core,
+    which bounds the logins per second per core.
+    """
+    encoded = hasher.encode(password, hasher.salt())
+    checked, start = 0, perf_counter()
+    while not checked or perf_counter() - start < seconds:
+        hasher.verify(password, encoded)
+        checked += 1
+    elapsed = perf_counter() - start
+    return {
+        "algorithm": hasher.algorithm,
+        "parameters": {
+            key: value
+            for key, value in hasher.decode(encoded).items()
+            if key not in ["algorithm", "hash", "salt"]
+        },
+        "ms_per_login": round(elapsed / checked * 1000, 3),
+        "logins_per_second": round(checked / elapsed, 2),
+    }
+
+
+def stress_database(alias, writers=8, writes=200, readers=4):
+    """
+    Write entries from several threads at once, each write a transaction
+    that reads before it inserts, while other threads keep reading. Every
+    operation ends like a request does, closing the connection unless it is
+    persistent. Returns the write throughput and how many writes failed
+    because the database was locked.
+    """
+    users = User.objects.using(alias).bulk_create(
+        User(username=f"stress_{index}") for index in range(writers)
+    )
+    done = threading.Event()
+    errors, reads = [], []
+
+    def finish_request():
+        connections[alias].close_if_unusable_or_obsolete()
+
+    def write(author):
+        for index in range(writes):
+            try:
+                with transaction.atomic(using=alias):
+                    Entry.objects.using(alias).filter(author=author).count()
+                    # Bulk insert, so no signals write to the default database
+                    Entry.objects.using(alias).bulk_create(
+                        [Entry(title=f"Entry {index}", body="Body", author=author)]
+                    )
+            except OperationalError as error:
+                errors.append(error)
+            finish_request()
+        connections[alias].close()
+
+    def read():
+        count = 0
+        while not done.is_set():
+            list(Entry.objects.using(alias).order_by("-created_at")[:20])
+            count += 1
+            finish_request()
+        reads.append(count)
+        connections[alias].close()
+
+    threads = [threading.Thread(target=write, args=[user]) for user in users]
+    reader_threads = [threading.Thread(target=read) for _ in range(readers)]
+    for thread in reader_threads:
+        thread.start()
+
+    start = perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = perf_counter() - start
+
+    done.set()
+    for thread in reader_threads:
+        thread.join()
+
+    written = Entry.objects.using(alias).count()
+    with connections[alias].cursor() as cursor:
+        cursor.execute("PRAGMA journal_mode")
+        journal_mode = cursor.fetchone()[0]
+    connections[alias].close()
+
+    return {
+        "journal_mode": journal_mode,
+        "writes_per_second": round(written / elapsed, 1),
+        "lock_errors": sum("locked" in str(error) for error in errors),
+        "other_errors": sum("locked" not in str(error) for error in errors),
+        "reads_per_second": round(sum(reads) / elapsed, 1),
+    }
+
+
+def run(
+    scenarios,
+    context,
+    requests=50,
+    warmup=5,
+    cache=False,
+    concurrency=0,
+    progress=None,
+):
+    """
+    Run every scenario against the real URLconf and return the results
+    with enough metadata to compare two runs.
+    """
+    # The test clients' hosts, like under the test runner
+    with override_settings(
+        ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "localhost", "testserver"]
+    ):
+        client = login(context["user"], context["password"])
+
+        results = {}
+        for name, func in scenarios.items():
+            results[name] = measure(func, client, context, requests, warmup, cache)
+            if concurrency and func.concurrent:
+                results[name].update(
+                    measure_concurrent(
+                        func, client, context, requests, concurrency, cache
+                    )
+                )
+            if progress is not None:
+                progress(name, results[name])
+
+    return {
+        "meta": {
+            "created_at": timezone.now().isoformat(),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "requests": requests,
+            "warmup": warmup,
+            "response_cache": cache,
+            "counts": context["counts"],
+        },
+        "results": results,
+    }
+
+
+def compare(before, after):
+    """
+    Yield (name, metric, before, after, change in percent) for the scenarios
+    both runs measured.
+    """
+    for name, result in after["results"].items():
+        previous = before["results"].get(name)
+        if previous is None:
+            continue
+        for metric in COMPARED_METRICS:
+            # Runs without --concurrency have no throughput
+            if metric not in previous or metric not in result:
+                continue
+            old, new = previous[metric], result[metric]
+            change = (new - old) / old * 100 if old else 0.0
+            yield name, metric, old, new, change
@@ -0,0 +1,128 @@
+import json
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.utils import timezone
+
+from benchmarks import harness
+from benchmarks.data import USERNAME_PREFIX
+from benchmarks.scenarios import SCENARIOS
+from entries.models import Entry
+from events.models import Event
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure latency, query counts and peak memory of the API endpoints "
+        "on data from generate_data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--requests", type=int, default=50, help="Measured requests per scenario."
+        )
+        parser.add_argument(
+            "--warmup", type=int, default=5, help="Unmeasured requests first."
+        )
+        parser.add_argument(
+            "--scenario",
+            action="append",
+            help="Only run scenarios starting with this, can be repeated.",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=0,
+            help="Also send this many requests at a time through an async "
+            "client and report the throughput.",
+        )
+        parser.add_argument(
+            "--cache",
+            action="store_true",
+            help="Keep the response cache between requests instead of clearing it.",
+        )
+        parser.add_argument(
+            "--password",
+            default="benchmark",
+            help="Password the data was generated with.",
+        )
+        parser.add_argument("--output", help="Save the results as JSON.")
+        parser.add_argument("--compare", help="Compare with results saved earlier.")
+
+    def handle(self, *args, **options):
+        scenarios = {
+            name: func
+            for name, func in SCENARIOS.items()
+            if not options["scenario"]
+            or any(name.startswith(prefix) for prefix in options["scenario"])
+        }
+        if not scenarios:
+            raise CommandError(
+                f"No scenarios match, choose from {', '.join(SCENARIOS)}."
+            )
+
+        results = harness.run(
+            scenarios,
+            self.get_context(options["password"]),
+            requests=options["requests"],
+            warmup=options["warmup"],
+            cache=options["cache"],
+            concurrency=options["concurrency"],
+            progress=self.report,
+        )
+
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                json.dump(results, file, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Saved to {options['output']}."))
+
+        if options["compare"]:
+            with open(options["compare"]) as file:
+                before = json.load(file)
+            for name, metric, old, new, change in harness.compare(before, results):
+                self.stdout.write(
+                    f"{name:<24} {metric:<15} {old:>10} -> {new:>10} ({change:+.1f}%)"
+                )
+
+    def get_context(self, password):
+        # The busiest generated user makes for the heaviest lists
+        user = (
+            User.objects.filter(username__startswith=USERNAME_PREFIX)
+            .annotate(entry_count=Count("entry"))
+            .order_by("-entry_count", "pk")
+            .first()
+        )
+        if user is None:
+            raise CommandError("No benchmark data, run generate_data first.")
+
+        entry = Entry.objects.filter(author=user).order_by("pk").first()
+        event = Event.objects.filter(author=user).order_by("pk").first()
+        return {
+            "user": user,
+            "password": password,
+            "entry": entry,
+            # Not every user has events, any will do for the detail views
+            "event": event or Event.objects.order_by("pk").first(),
+            "day": timezone.localdate(entry.created_at if entry else None).isoformat(),
+            "counts": {
+                "users": User.objects.count(),
+                "entries": Entry.objects.count(),
+                "events": Event.objects.count(),
+            },
+        }
+
+    def report(self, name, result):
+        self.stdout.write(
+            f"{name:<24} p50 {result['p50_ms']:>8.2f} ms  "
+            f"p95 {result['p95_ms']:>8.2f} ms  p99 {result['p99_ms']:>8.2f} ms  "
+            f"{result['queries']:>3} queries  {result['peak_memory_kb']:>9.1f} KiB  "
+            f"status {','.join(map(str, result['statuses']))}"
+        )
+        if "throughput_rps" in result:
+            self.stdout.write(
+                f"{'':<24} {result['concurrency']} at a time: "
+                f"{result['throughput_rps']:>8.1f} req/s  "
+                f"p95 {result['concurrent_p95_ms']:>8.2f} ms  "
+                f"status {','.join(map(str, result['concurrent_statuses']))}"
+            )
@@ -0,0 +1,32 @@
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, get_hashers
+from django.core.management.base import BaseCommand
+
+from benchmarks import harness
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure logins per second per core of Django's default password "
+        "hasher and of the one PASSWORD_HASHERS hashes passwords with."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--seconds", type=float, default=2.0, help="How long to time each hasher."
+        )
+
+    def handle(self, *args, **options):
+        hashers = {
+            "django default": PBKDF2PasswordHasher(),
+            "configured": get_hashers()[0],
+        }
+
+        for name, hasher in hashers.items():
+            result = harness.hasher_throughput(hasher, seconds=options["seconds"])
+            parameters = ", ".join(
+                f"{key}={value}" for key, value in result["parameters"].items()
+            )
+            self.stdout.write(
+                f"{name:<16} {result['logins_per_second']:>8.2f} logins/s  "
+                f"{result['ms_per_login']:>9.2f} ms  {parameters}"
+            )
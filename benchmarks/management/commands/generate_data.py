@@ -0,0 +1,54 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks.data import USERNAME_PREFIX, generate
+
+
+class Command(BaseCommand):
+    help = "Fill the database with synthetic users, entries and events."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=20)
+        parser.add_argument(
+            "--entries", type=int, default=200, help="Average entries per user."
+        )
+        parser.add_argument(
+            "--events", type=int, default=50, help="Average events per user."
+        )
+        parser.add_argument(
+            "--days", type=int, default=365, help="How far back the data goes."
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="The same seed generates the same data.",
+        )
+        parser.add_argument("--password", default="benchmark")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if User.objects.filter(
+            username__startswith=f"{USERNAME_PREFIX}{options['seed']}_"
+        ).exists():
+            raise CommandError(
+                f"Data for seed {options['seed']} exists already, use another seed."
+            )
+
+        created = generate(
+            users=options["users"],
+            entries=options["entries"],
+            events=options["events"],
+            days=options["days"],
+            seed=options["seed"],
+            password=options["password"],
+            batch_size=options["batch_size"],
+        )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Created {users} users, {entries} entries and {events} events.".format(
+                    **created
+                )
+            )
+        )
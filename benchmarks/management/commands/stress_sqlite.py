@@ -0,0 +1,73 @@
+import os
+from tempfile import TemporaryDirectory
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from benchmarks import harness
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the SQLITE_PROFILES under concurrent writes, each on a new "
+        "database file."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--profile",
+            action="append",
+            help="Only this profile, can be repeated. All by default.",
+        )
+        parser.add_argument(
+            "--writers", type=int, default=8, help="Threads that write."
+        )
+        parser.add_argument(
+            "--writes", type=int, default=200, help="Writes per writing thread."
+        )
+        parser.add_argument(
+            "--readers", type=int, default=4, help="Threads that read meanwhile."
+        )
+
+    def handle(self, *args, **options):
+        profiles = options["profile"] or list(settings.SQLITE_PROFILES)
+        unknown = set(profiles) - set(settings.SQLITE_PROFILES)
+        if unknown:
+            raise CommandError(
+                f"Unknown profiles {', '.join(sorted(unknown))}, choose from "
+                f"{', '.join(settings.SQLITE_PROFILES)}."
+            )
+
+        with TemporaryDirectory() as directory:
+            for profile in profiles:
+                alias = f"stress_{profile}"
+                connections.settings[alias] = connections.configure_settings(
+                    {
+                        "default": connections.settings["default"],
+                        alias: {
+                            "ENGINE": "django.db.backends.sqlite3",
+                            "NAME": os.path.join(directory, f"{profile}.sqlite3"),
+                            **settings.SQLITE_PROFILES[profile],
+                        },
+                    }
+                )[alias]
+                try:
+                    call_command("migrate", database=alias, verbosity=0)
+                    result = harness.stress_database(
+                        alias,
+                        writers=options["writers"],
+                        writes=options["writes"],
+                        readers=options["readers"],
+                    )
+                finally:
+                    connections[alias].close()
+                    del connections.settings[alias]
+
+                self.stdout.write(
+                    f"{profile:<8} {result['journal_mode']:<8} "
+                    f"{result['writes_per_second']:>9.1f} writes/s  "
+                    f"{result['reads_per_second']:>9.1f} reads/s  "
+                    f"{result['lock_errors']:>5} lock errors"
+                )
@@ -0,0 +1,160 @@
+"""
+The requests a benchmark run measures. Each scenario gets the test client,
+already logged in as the benchmark user, and the context of the run.
+
+Scenarios return what the client returns, so they also run with an
+AsyncClient for the concurrent measurements, unless registered with
+concurrent=False.
+"""
+
+from datetime import timedelta
+
+from django.test import Client
+from django.utils import timezone
+
+SCENARIOS = {}
+
+
+def scenario(name, concurrent=True):
+    def register(func):
+        func.concurrent = concurrent
+        SCENARIOS[name] = func
+        return func
+
+    return register
+
+
+@scenario("entries.list")
+def entries_list(client, context):
+    return client.get("/entries/")
+
+
+@scenario("entries.list.author")
+def entries_list_author(client, context):
+    return client.get("/entries/", {"author": context["user"].pk})
+
+
+@scenario("entries.list.day")
+def entries_list_day(client, context):
+    return client.get(
+        "/entries/", {"author": context["user"].pk, "created_at": context["day"]}
+    )
+
+
+@scenario("entries.search")
+def entries_search(client, context):
+    return client.get("/entries/", {"search": "morning run"})
+
+
+@scenario("entries.retrieve")
+def entries_retrieve(client, context):
+    return client.get(f"/entries/{context['entry'].pk}/")
+
+
+@scenario("entries.export")
+def entries_export(client, context):
+    return client.get("/entries/export/")
+
+
+@scenario("events.window")
+def events_window(client, context):
+    now = timezone.now()
+    return client.get(
+        "/events/",
+        {
+            "author": context["user"].pk,
+            "from": (now - timedelta(days=7)).isoformat(),
+            "to": (now + timedelta(days=7)).isoformat(),
+        },
+    )
+
+
+@scenario("events.retrieve")
+def events_retrieve(client, context):
+    return client.get(f"/events/{context['event'].pk}/")
+
+
+@scenario("events.busy")
+def events_busy(client, context):
+    now = timezone.now()
+    return client.get(
+        "/events/busy/",
+        {
+            "author": context["user"].pk,
+            "from": now.isoformat(),
+            "to": (now + timedelta(days=30)).isoformat(),
+        },
+    )
+
+
+@scenario("stats.daily")
+def stats_daily(client, context):
+    today = timezone.localdate()
+    return client.get(
+        "/stats/daily/",
+        {"from": (today - timedelta(days=365)).isoformat(), "to": today.isoformat()},
+    )
+
+
+@scenario("users.list")
+def users_list(client, context):
+    return client.get("/users/")
+
+
+@scenario("users.search")
+def users_search(client, context):
+    prefix = context["user"].username[:3]
+    return client.get("/users/", {"username": prefix, "fields": "id,username"})
+
+
+@scenario("users.retrieve")
+def users_retrieve(client, context):
+    return client.get(f"/users/{context['user'].pk}/")
+
+
+# Logs in with a client of its own, which is synchronous
+@scenario("users.login", concurrent=False)
+def users_login(client, context):
+    return Client(**client.defaults).post(
+        "/users/login/",
+        {"username": context["user"].username, "password": context["password"]},
+        content_type="application/json",
+    )
+
+
+@scenario("users.token_refresh")
+def users_token_refresh(client, context):
+    return client.post("/users/token/refresh/", content_type="application/json")
+
+
+@scenario("async.entries.list")
+def async_entries_list(client, context):
+    return client.get("/entries/async/", {"author": context["user"].pk})
+
+
+@scenario("async.entries.retrieve")
+def async_entries_retrieve(client, context):
+    return client.get(f"/entries/async/{context['entry'].pk}/")
+
+
+@scenario("async.events.window")
+def async_events_window(client, context):
+    now = timezone.now()
+    return client.get(
+        "/events/async/",
+        {
+            "author": context["user"].pk,
+            "from": (now - timedelta(days=7)).isoformat(),
+            "to": (now + timedelta(days=7)).isoformat(),
+        },
+    )
+
+
+@scenario("async.events.retrieve")
+def async_events_retrieve(client, context):
+    return client.get(f"/events/async/{context['event'].pk}/")
+
+
+@scenario("async.users.retrieve")
+def async_users_retrieve(client, context):
+    return client.get(f"/users/async/{context['user'].pk}/")
@@ -0,0 +1,124 @@
+import json
+import os
+from io import StringIO
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.db.models import F
+from django.test import TestCase, TransactionTestCase
+
+from entries.models import Entry
+from events.models import Event
+
+from .data import generate
+
+
+class GenerateDataTests(TestCase):
+    def snapshot(self):
+        return (
+            list(User.objects.order_by("pk").values_list("username", flat=True)),
+            list(Entry.objects.order_by("pk").values_list("title", "favorite")),
+            list(Event.objects.order_by("pk").values_list("title", "recurrence")),
+        )
+
+    def test_same_seed_same_data(self):
+        created = generate(users=3, entries=10, events=5, seed=7)
+        first = self.snapshot()
+        User.objects.all().delete()
+
+        self.assertEqual(generate(users=3, entries=10, events=5, seed=7), created)
+        self.assertEqual(self.snapshot(), first)
+        self.assertEqual(created["entries"], Entry.objects.count())
+
+    def test_timestamps_are_kept(self):
+        generate(users=2, entries=20, events=5)
+
+        entry = Entry.objects.order_by("created_at").first()
+        self.assertLess(entry.created_at, Entry.objects.latest("pk").created_at)
+        self.assertFalse(Entry.objects.filter(updated_at__lt=F("created_at")).exists())
+
+    def test_seed_is_used_once(self):
+        call_command("generate_data", users=1, entries=1, events=1, stdout=StringIO())
+
+        with self.assertRaises(CommandError):
+            call_command("generate_data", users=1, stdout=StringIO())
+
+
+class BenchmarkTests(TestCase):
+    def test_results_are_saved_and_compared(self):
+        generate(users=2, entries=10, events=5)
+
+        with TemporaryDirectory() as directory:
+            path = os.path.join(directory, "results.json")
+            call_command(
+                "benchmark", requests=2, warmup=0, output=path, stdout=StringIO()
+            )
+            with open(path) as file:
+                results = json.load(file)
+
+            stdout = StringIO()
+            call_command(
+                "benchmark",
+                requests=2,
+                warmup=0,
+                scenario=["entries.list"],
+                compare=path,
+                stdout=stdout,
+            )
+
+        self.assertEqual(results["meta"]["counts"]["users"], 2)
+        for name, result in results["results"].items():
+            self.assertEqual(result["statuses"], [200], name)
+            self.assertLessEqual(result["p50_ms"], result["p99_ms"])
+        self.assertIn("entries.list.day", stdout.getvalue())
+        self.assertNotIn("events.window", stdout.getvalue())
+
+
+class ConcurrentBenchmarkTests(TransactionTestCase):
+    # The async client's requests use connections of other threads, which
+    # can't see into the transaction of a TestCase
+
+    def test_concurrent_requests(self):
+        generate(users=2, entries=10, events=5)
+
+        stdout = StringIO()
+        with TemporaryDirectory() as directory:
+            path = os.path.join(directory, "results.json")
+            call_command(
+                "benchmark",
+                requests=6,
+                warmup=0,
+                concurrency=3,
+                scenario=["entries.list", "async."],
+                output=path,
+                stdout=stdout,
+            )
+            with open(path) as file:
+                results = json.load(file)["results"]
+
+        self.assertIn("async.events.window", results)
+        for name, result in results.items():
+            self.assertEqual(result["statuses"], [200], name)
+            self.assertEqual(result["concurrent_statuses"], [200], name)
+            self.assertGreater(result["throughput_rps"], 0)
+        self.assertIn("3 at a time", stdout.getvalue())
+
+
+class StressSQLiteTests(TestCase):
+    def test_profiles_are_compared(self):
+        stdout = StringIO()
+        # The command's own databases, which its threads connect to
+        databases = {*self.databases, "stress_django", "stress_tuned"}
+        with mock.patch.object(StressSQLiteTests, "databases", databases):
+            call_command("stress_sqlite", writers=3, writes=5, readers=1, stdout=stdout)
+
+        lines = dict(line.split(maxsplit=1) for line in stdout.getvalue().splitlines())
+        self.assertEqual(set(lines), {"django", "tuned"})
+        self.assertTrue(lines["tuned"].startswith("wal"))
+        self.assertTrue(lines["tuned"].endswith(" 0 lock errors"))
+
+    def test_unknown_profile(self):
+        with self.assertRaises(CommandError):
+            call_command("stress_sqlite", profile=["fast"], stdout=StringIO())
@@ -1,6 +1,20 @@
 from django.apps import AppConfig
+from django.db import connections
+from django.db.models.signals import post_migrate
+
+
+def ensure_search_index(sender, using, **kwargs):
+    from . import search
+
+    search.ensure_installed(connections[using])
 
 
 class EntriesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'entries'
+
+    def ready(self):
+        from lifestyle_app_backend import cache
+
+        post_migrate.connect(ensure_search_index, sender=self)
+        cache.register(self.get_model("Entry"))
@@ -1,13 +1,44 @@
+from datetime import datetime, time, timedelta
+
 import django_filters
+from django.utils import timezone
+
+from lifestyle_app_backend.asyncviews import AuthorFilter
+
 from .models import Entry
 
 
+class DayFilter(django_filters.DateTimeFilter):
+    """
+    Filters a datetime field by the local day of the given value.
+
+    The day is turned into a half-open range [midnight, next midnight) instead
+    of a `__date` lookup, so the database can use an index on the column.
+    """
+
+    def filter(self, qs, value):
+        if value in django_filters.constants.EMPTY_VALUES:
+            return qs
+
+        day = timezone.localtime(value).date()
+        start = timezone.make_aware(datetime.combine(day, time.min))
+        end = timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+
+        qs = self.get_method(qs)(
+            **{f"{self.field_name}__gte": start, f"{self.field_name}__lt": end}
+        )
+        return qs.distinct() if self.distinct else qs
+
+
 class EntryFilter(django_filters.FilterSet):
     # Filtering by only date and not the time
-    created_at = django_filters.DateTimeFilter(
-        field_name="created_at", lookup_expr="date"
-    )
+    created_at = DayFilter(field_name="created_at")
 
     class Meta:
         model = Entry
         fields = ["author", "created_at", "favorite"]
+
+
+class AsyncEntryFilter(EntryFilter):
+    # The author is not looked up, so filtering needs no synchronous query
+    author = AuthorFilter()
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from entries import search
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index for entries."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            help="Database to rebuild the index in.",
+        )
+
+    def handle(self, *args, **options):
+        connection = connections[options["database"]]
+
+        # install() creates any missing table or trigger and then rebuilds
+        if not search.install(connection):
+            raise CommandError(
+                "FTS5 is not available on this database, search uses LIKE instead."
+            )
+
+        self.stdout.write(self.style.SUCCESS("Search index rebuilt."))
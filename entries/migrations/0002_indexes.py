@@ -0,0 +1,27 @@
+# Generated by Django 5.1.3 on 2026-10-18 08:37
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('entries', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='entry',
+            index=models.Index(fields=['created_at', 'title', 'id'], name='entry_created_title_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='entry',
+            index=models.Index(fields=['author', 'created_at', 'title', 'id'], name='entry_author_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='entry',
+            index=models.Index(condition=models.Q(('favorite', True)), fields=['author', 'created_at', 'title', 'id'], name='entry_author_favorite_idx'),
+        ),
+    ]
@@ -0,0 +1,75 @@
+from django.db import migrations
+
+# The index as this migration created it, entries.search may change
+CREATE_SQL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS entries_entry_fts USING fts5(
+        title, body,
+        content='entries_entry', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS entries_entry_fts_insert
+    AFTER INSERT ON entries_entry BEGIN
+        INSERT INTO entries_entry_fts(rowid, title, body)
+        VALUES (new.id, new.title, new.body);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS entries_entry_fts_delete
+    AFTER DELETE ON entries_entry BEGIN
+        INSERT INTO entries_entry_fts(entries_entry_fts, rowid, title, body)
+        VALUES ('delete', old.id, old.title, old.body);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS entries_entry_fts_update
+    AFTER UPDATE OF title, body ON entries_entry BEGIN
+        INSERT INTO entries_entry_fts(entries_entry_fts, rowid, title, body)
+        VALUES ('delete', old.id, old.title, old.body);
+        INSERT INTO entries_entry_fts(rowid, title, body)
+        VALUES (new.id, new.title, new.body);
+    END
+    """,
+    "INSERT INTO entries_entry_fts(entries_entry_fts) VALUES ('rebuild')",
+]
+
+DROP_SQL = [
+    "DROP TRIGGER IF EXISTS entries_entry_fts_insert",
+    "DROP TRIGGER IF EXISTS entries_entry_fts_delete",
+    "DROP TRIGGER IF EXISTS entries_entry_fts_update",
+    "DROP TABLE IF EXISTS entries_entry_fts",
+]
+
+
+def fts5_available(connection):
+    if connection.vendor != "sqlite":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA compile_options")
+        return "ENABLE_FTS5" in {row[0] for row in cursor.fetchall()}
+
+
+def install_search_index(apps, schema_editor):
+    # Without FTS5 the search filter falls back to LIKE, so nothing to do
+    if fts5_available(schema_editor.connection):
+        for sql in CREATE_SQL:
+            schema_editor.execute(sql)
+
+
+def uninstall_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        for sql in DROP_SQL:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("entries", "0002_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search_index, uninstall_search_index),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.1.3 on 2026-10-18 08:44
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_updated_at(apps, schema_editor):
+    # Existing entries were last written when they were created, as far as we know
+    Entry = apps.get_model("entries", "Entry")
+    Entry.objects.using(schema_editor.connection.alias).update(
+        updated_at=F("created_at")
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("entries", "0003_entry_fts"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="entry",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="entry",
+            index=models.Index(
+                fields=["author", "updated_at"], name="entry_author_updated_idx"
+            ),
+        ),
+    ]
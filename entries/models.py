@@ -1,5 +1,80 @@
-from django.db import models
+from django.db import connections, models, router
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Concat, Left, Length
+from django.db.models.lookups import GreaterThan
 from django.contrib.auth.models import User
+from django.utils import timezone
+
+# Characters of the body in previews, before the ellipsis
+BODY_PREVIEW_LENGTH = 200
+
+
+class EntryQuerySet(models.QuerySet):
+    def toggle_favorite(self, pk):
+        """
+        Flip the favorite flag of an entry of the queryset in one UPDATE and
+        return the updated entry, or None if there is no such entry.
+
+        Concurrent toggles can't lose each other's update, since the new value
+        is computed by the database.
+        """
+        # Routed as a write, the raw UPDATE would otherwise go to a replica
+        db = self._db or router.db_for_write(self.model)
+        queryset = self.using(db)
+        connection = connections[db]
+        if not connection.features.can_return_columns_from_insert:
+            # No RETURNING, so the entry is read back afterwards
+            favorite = Case(When(favorite=True, then=Value(False)), default=True)
+            if not queryset.filter(pk=pk).update(
+                favorite=favorite, updated_at=timezone.now()
+            ):
+                return None
+            return queryset.get(pk=pk)
+
+        quote_name = connection.ops.quote_name
+        meta = self.model._meta
+        columns = ", ".join(quote_name(field.column) for field in meta.concrete_fields)
+        favorite = quote_name(meta.get_field("favorite").column)
+        updated_at = meta.get_field("updated_at")
+
+        # The queryset's filters, as a subquery of the entry's pk
+        scope, scope_params = (
+            queryset.filter(pk=pk)
+            .order_by()
+            .values("pk")
+            .query.get_compiler(db)
+            .as_sql()
+        )
+        entries = queryset.raw(
+            f"UPDATE {quote_name(meta.db_table)} "
+            f"SET {favorite} = NOT {favorite}, {quote_name(updated_at.column)} = %s "
+            f"WHERE {quote_name(meta.pk.column)} IN ({scope}) "
+            f"RETURNING {columns}",
+            [updated_at.get_db_prep_value(timezone.now(), connection), *scope_params],
+        )
+        return next(iter(entries), None)
+
+    def with_body_preview(self, length=BODY_PREVIEW_LENGTH):
+        """
+        Annotate `body_preview`, the start of the body cut by the database,
+        so the whole body is never read out of it.
+        """
+        return self.annotate(
+            body_preview=Case(
+                When(
+                    GreaterThan(Length("body"), length),
+                    then=Concat(Left("body", length), Value("…")),
+                ),
+                default=F("body"),
+                output_field=models.TextField(),
+            )
+        )
+
+    def set_favorite(self, favorite):
+        """
+        Mark all entries in the queryset as favorites or not, in one UPDATE.
+        """
+        return self.update(favorite=favorite, updated_at=timezone.now())
 
 
 class Entry(models.Model):
@@ -7,4 +82,30 @@ class Entry(models.Model):
     body = models.TextField()
     author = models.ForeignKey(User, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     favorite = models.BooleanField(default=False)
+
+    objects = EntryQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Default list ordering and the keyset pagination seek
+            models.Index(
+                fields=["created_at", "title", "id"], name="entry_created_title_idx"
+            ),
+            # A user's own entries, filtered by day and ordered like the list
+            models.Index(
+                fields=["author", "created_at", "title", "id"],
+                name="entry_author_created_idx",
+            ),
+            # Latest change in a user's entries, for conditional requests
+            models.Index(
+                fields=["author", "updated_at"], name="entry_author_updated_idx"
+            ),
+            # A user's favorites, kept small by indexing only favorite rows
+            models.Index(
+                fields=["author", "created_at", "title", "id"],
+                condition=models.Q(favorite=True),
+                name="entry_author_favorite_idx",
+            ),
+        ]
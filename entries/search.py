@@ -0,0 +1,225 @@
+from django.db import connections
+from django.db.models import FloatField, TextField, Value
+from django.db.models.expressions import RawSQL
+from rest_framework import filters
+
+FTS_TABLE = "entries_entry_fts"
+
+# External content table: the index only stores tokens and reads the text
+# back from entries_entry. The prefix indexes make "term*" queries cheap.
+CREATE_SQL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, body,
+        content='entries_entry', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert
+    AFTER INSERT ON entries_entry BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, body)
+        VALUES (new.id, new.title, new.body);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete
+    AFTER DELETE ON entries_entry BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, body)
+        VALUES ('delete', old.id, old.title, old.body);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update
+    AFTER UPDATE OF title, body ON entries_entry BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, body)
+        VALUES ('delete', old.id, old.title, old.body);
+        INSERT INTO {FTS_TABLE}(rowid, title, body)
+        VALUES (new.id, new.title, new.body);
+    END
+    """,
+]
+
+TRIGGER_EVENTS = ("insert", "delete", "update")
+
+DROP_SQL = [
+    *(f"DROP TRIGGER IF EXISTS {FTS_TABLE}_{event}" for event in TRIGGER_EVENTS),
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+# Whether the index exists, per database alias
+_enabled = {}
+
+
+def fts5_available(connection):
+    """
+    Return True if the database is SQLite compiled with FTS5.
+    """
+    if connection.vendor != "sqlite":
+        return False
+
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA compile_options")
+        options = {row[0] for row in cursor.fetchall()}
+
+    return "ENABLE_FTS5" in options
+
+
+def install(connection):
+    """
+    Create the index and its sync triggers and fill it from existing entries.
+    Returns False if FTS5 is not available.
+    """
+    if not fts5_available(connection):
+        _enabled[connection.alias] = False
+        return False
+
+    with connection.cursor() as cursor:
+        for sql in CREATE_SQL:
+            cursor.execute(sql)
+
+    rebuild(connection)
+    _enabled[connection.alias] = True
+    return True
+
+
+def ensure_installed(connection):
+    """
+    Install the index if it or any of its triggers is missing. SQLite drops
+    triggers when a migration rebuilds the entries table, so this runs after
+    every migrate.
+    """
+    if not fts5_available(connection):
+        return False
+    if "entries_entry" not in connection.introspection.table_names():
+        # Migrated back to before the entries table existed
+        return False
+
+    names = [FTS_TABLE] + [f"{FTS_TABLE}_{event}" for event in TRIGGER_EVENTS]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE name IN (%s)"
+            % ", ".join(["%s"] * len(names)),
+            names,
+        )
+        if cursor.fetchone()[0] == len(names):
+            _enabled[connection.alias] = True
+            return True
+
+    return install(connection)
+
+
+def uninstall(connection):
+    with connection.cursor() as cursor:
+        for sql in DROP_SQL:
+            cursor.execute(sql)
+
+    _enabled[connection.alias] = False
+
+
+def rebuild(connection):
+    """
+    Re-read every entry into the index.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def is_enabled(alias):
+    if alias not in _enabled:
+        connection = connections[alias]
+        _enabled[alias] = (
+            fts5_available(connection)
+            and FTS_TABLE in connection.introspection.table_names()
+        )
+
+    return _enabled[alias]
+
+
+def build_match_query(terms):
+    """
+    Turn search terms into an FTS5 query where every term is a prefix match.
+    Terms are quoted so FTS5 operators in user input are matched literally.
+    """
+    return " ".join('"{}"*'.format(term.replace('"', '""')) for term in terms)
+
+
+class FullTextSearchFilter(filters.SearchFilter):
+    """
+    Search entry titles and bodies through the SQLite FTS5 index.
+
+    Matching entries are annotated with `search_rank` (bm25, lower is a better
+    match, so `?ordering=search_rank` returns the best matches first) and
+    `search_snippet`, escaped HTML with the matches in <mark>. Without FTS5
+    this falls back to the LIKE search on the view's `search_fields`.
+    """
+
+    title_weight = 10.0
+    body_weight = 1.0
+    snippet_start = "<mark>"
+    snippet_end = "</mark>"
+    snippet_ellipsis = "…"
+    snippet_tokens = 12
+    # Clients show snippets as HTML, so the text is escaped like html.escape,
+    # and only then are the marks put in place of these private use
+    # characters
+    snippet_escapes = [
+        ("&", "&amp;"),
+        ("<", "&lt;"),
+        (">", "&gt;"),
+        ('"', "&quot;"),
+        ("'", "&#x27;"),
+    ]
+    mark_start = "\ue000"
+    mark_end = "\ue001"
+
+    def snippet_sql(self, match, table):
+        """
+        Return the SQL and params of the escaped, highlighted snippet.
+        """
+        sql = f"snippet({FTS_TABLE}, -1, %s, %s, %s, %s)"
+        params = [
+            self.mark_start,
+            self.mark_end,
+            self.snippet_ellipsis,
+            self.snippet_tokens,
+        ]
+        replacements = [
+            *self.snippet_escapes,
+            (self.mark_start, self.snippet_start),
+            (self.mark_end, self.snippet_end),
+        ]
+        for old, new in replacements:
+            sql = f"replace({sql}, %s, %s)"
+            params += [old, new]
+
+        sql = (
+            f"SELECT {sql} FROM {FTS_TABLE} "
+            f'WHERE {FTS_TABLE} MATCH %s AND rowid = "{table}"."id"'
+        )
+        return sql, [*params, match]
+
+    def filter_queryset(self, request, queryset, view):
+        search_terms = self.get_search_terms(request)
+
+        if not search_terms or not is_enabled(queryset.db):
+            queryset = super().filter_queryset(request, queryset, view)
+            return queryset.annotate(search_rank=Value(0.0, FloatField()))
+
+        match = build_match_query(search_terms)
+        table = queryset.model._meta.db_table
+
+        rank = RawSQL(
+            f"SELECT bm25({FTS_TABLE}, %s, %s) FROM {FTS_TABLE} "
+            f'WHERE {FTS_TABLE} MATCH %s AND rowid = "{table}"."id"',
+            (self.title_weight, self.body_weight, match),
+            output_field=FloatField(),
+        )
+        snippet = RawSQL(*self.snippet_sql(match, table), output_field=TextField())
+        matches = RawSQL(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", (match,)
+        )
+
+        return queryset.filter(id__in=matches).annotate(
+            search_rank=rank, search_snippet=snippet
+        )
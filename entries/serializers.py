@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from lifestyle_app_backend.bulk import BulkListSerializer
 from .models import Entry
 
 
@@ -8,3 +9,29 @@ class EntrySerializer(serializers.ModelSerializer):
     class Meta:
         model = Entry
         fields = ["id", "title", "body", "author", "created_at", "favorite"]
+        list_serializer_class = BulkListSerializer
+
+    # What to_representation adds, for lists built from values() rows
+    values_extras = {"snippet": "search_snippet", "body_preview": "body_preview"}
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+
+        # Full-text search results carry a highlighted snippet
+        snippet = getattr(instance, "search_snippet", None)
+        if snippet is not None:
+            data["snippet"] = snippet
+
+        # Lists can ask for a preview of the body instead of the body
+        preview = getattr(instance, "body_preview", None)
+        if preview is not None:
+            data["body_preview"] = preview
+
+        return data
+
+
+class BulkFavoriteSerializer(serializers.Serializer):
+    favorite = serializers.BooleanField()
+    ids = serializers.ListField(
+        child=serializers.IntegerField(), required=False, max_length=100
+    )
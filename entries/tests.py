@@ -1,3 +1,897 @@
-from django.test import TestCase
+import csv
+import json
+from datetime import datetime, timedelta
+from decimal import Decimal
+from io import StringIO
+from tempfile import TemporaryDirectory
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import QuerySet
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from lifestyle_app_backend import cache as response_cache
+from lifestyle_app_backend import renderers
+from stats import aggregates
+from stats.models import DailyStats
+
+from . import search
+from .filters import EntryFilter
+from .models import Entry
+from .serializers import EntrySerializer
+from .views import EntryViewSet
+
+
+class EntryPaginationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="tester", password="secret")
+        self.client = APIClient()
+        response_cache.get_cache().clear()
+        self.client.force_authenticate(self.user)
+
+        # Entries share timestamps and titles so the seek has to use every key
+        now = timezone.now()
+        for index in range(7):
+            entry = Entry.objects.create(
+                title=f"Entry {index % 2}", body="Body", author=self.user
+            )
+            Entry.objects.filter(pk=entry.pk).update(
+                created_at=now + timedelta(minutes=index // 3)
+            )
+
+    def collect(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids.extend(item["id"] for item in response.data["results"])
+            url = response.data["next"]
+        return ids
+
+    def test_list_is_a_page(self):
+        # Not the array of every entry that the list was before pagination
+        Entry.objects.bulk_create(
+            Entry(title="More", body="", author=self.user) for _ in range(50)
+        )
+
+        response = self.client.get("/entries/")
+
+        self.assertEqual(set(response.data), {"next", "previous", "results"})
+        self.assertEqual(len(response.data["results"]), 50)
+        self.assertIsNotNone(response.data["next"])
+
+    def test_pages_follow_composite_ordering(self):
+        expected = list(
+            Entry.objects.order_by("created_at", "title", "pk").values_list(
+                "pk", flat=True
+            )
+        )
+
+        self.assertEqual(self.collect("/entries/?page_size=2"), expected)
+
+    def test_pages_follow_requested_ordering(self):
+        expected = list(
+            Entry.objects.order_by("-title", "-pk").values_list("pk", flat=True)
+        )
+
+        self.assertEqual(
+            self.collect("/entries/?page_size=3&ordering=-title"), expected
+        )
+
+    def test_previous_link_returns_previous_page(self):
+        first = self.client.get("/entries/?page_size=3")
+        second = self.client.get(first.data["next"])
+        previous = self.client.get(second.data["previous"])
+
+        self.assertEqual(previous.data["results"], first.data["results"])
+        self.assertIsNone(previous.data["previous"])
+
+    def test_cursor_keeps_filters(self):
+        Entry.objects.filter(title="Entry 0").update(favorite=True)
+
+        ids = self.collect("/entries/?page_size=1&favorite=true&search=Entry")
+
+        self.assertEqual(
+            sorted(ids),
+            sorted(Entry.objects.filter(favorite=True).values_list("pk", flat=True)),
+        )
+
+    def test_invalid_cursor(self):
+        response = self.client.get("/entries/?cursor=bm90LWEtY3Vyc29y")
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_cursor_from_other_ordering_is_rejected(self):
+        first = self.client.get("/entries/?page_size=2")
+        cursor = first.data["next"].split("cursor=")[1].split("&")[0]
+
+        response = self.client.get(f"/entries/?ordering=-title&cursor={cursor}")
+
+        self.assertEqual(response.status_code, 404)
+
+
+@skipUnless(connection.vendor == "sqlite", "EXPLAIN QUERY PLAN is SQLite specific")
+class EntryIndexTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="tester", password="secret")
+
+    def filtered(self, params):
+        return EntryFilter(params, queryset=Entry.objects.all()).qs
+
+    def test_day_filter_uses_author_index(self):
+        qs = self.filtered({"author": self.user.pk, "created_at": "2025-01-15"})
+
+        plan = qs.order_by("created_at", "title").explain()
+
+        self.assertIn("entry_author_created_idx", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_favorite_filter_uses_favorite_index(self):
+        qs = self.filtered({"author": self.user.pk, "favorite": "true"})
+
+        plan = qs.order_by("created_at", "title").explain()
+
+        self.assertIn("entry_author_favorite_idx", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_default_ordering_uses_index(self):
+        plan = Entry.objects.order_by("created_at", "title", "id").explain()
+
+        self.assertIn("entry_created_title_idx", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_day_filter_is_half_open_local_day(self):
+        local = timezone.get_current_timezone()
+        inside = [
+            datetime(2025, 1, 15, 0, 0, tzinfo=local),
+            datetime(2025, 1, 15, 23, 59, 59, tzinfo=local),
+        ]
+        outside = [
+            datetime(2025, 1, 14, 23, 59, 59, tzinfo=local),
+            datetime(2025, 1, 16, 0, 0, tzinfo=local),
+        ]
+        for created_at in inside + outside:
+            entry = Entry.objects.create(title="Day", body="", author=self.user)
+            Entry.objects.filter(pk=entry.pk).update(created_at=created_at)
+
+        qs = self.filtered({"created_at": "2025-01-15"})
+
+        self.assertEqual(
+            sorted(qs.values_list("created_at", flat=True)),
+            inside,
+        )
+
+
+class EntrySearchTests(TestCase):
+    def setUp(self):
+        # Here rather than in a decorator, which would connect to the real
+        # database when the module is imported
+        if not search.fts5_available(connection):
+            self.skipTest("SQLite FTS5 is not available")
+        self.user = User.objects.create_user(username="tester", password="secret")
+        self.client = APIClient()
+        response_cache.get_cache().clear()
+        self.client.force_authenticate(self.user)
+
+        self.run = Entry.objects.create(
+            title="Morning run",
+            body="Ran five kilometres by the lake",
+            author=self.user,
+        )
+        self.lake = Entry.objects.create(
+            title="Lake day", body="Swimming all afternoon", author=self.user
+        )
+        Entry.objects.create(title="Groceries", body="Milk", author=self.user)
+
+    def search(self, query):
+        response = self.client.get(f"/entries/?{query}")
+        self.assertEqual(response.status_code, 200)
+        return response.data["results"]
+
+    def test_searches_body_with_prefix(self):
+        results = self.search("search=kilom")
+
+        self.assertEqual([item["id"] for item in results], [self.run.pk])
+        self.assertEqual(
+            results[0]["snippet"], "Ran five <mark>kilometres</mark> by the lake"
+        )
+
+    def test_snippet_is_escaped(self):
+        other = User.objects.create_user(username="other", password="secret")
+        Entry.objects.create(
+            title="Note",
+            body='hello <img src=x onerror=alert(1)> & "world"',
+            author=other,
+        )
+
+        for values in [True, False]:
+            with self.subTest(values=values), self.settings(
+                VALUES_LIST_RESPONSES=values
+            ):
+                response_cache.get_cache().clear()
+                results = self.search("search=world")
+                self.assertEqual(
+                    results[0]["snippet"],
+                    "hello &lt;img src=x onerror=alert(1)&gt; &amp; "
+                    "&quot;<mark>world</mark>&quot;",
+                )
+
+    def test_rank_prefers_title_matches(self):
+        results = self.search("search=lake&ordering=search_rank")
+
+        self.assertEqual([item["id"] for item in results], [self.lake.pk, self.run.pk])
+
+    def test_ranked_results_paginate(self):
+        first = self.client.get(
+            "/entries/?search=lake&ordering=search_rank&page_size=1"
+        )
+        second = self.client.get(first.data["next"])
+
+        self.assertEqual(first.data["results"][0]["id"], self.lake.pk)
+        self.assertEqual(second.data["results"][0]["id"], self.run.pk)
+        self.assertIsNone(second.data["next"])
+
+    def test_index_follows_updates_and_deletes(self):
+        self.run.body = "Cycled instead"
+        self.run.save()
+        self.lake.delete()
+
+        self.assertEqual(self.search("search=lake"), [])
+        self.assertEqual(len(self.search("search=cycled")), 1)
+
+    def test_operators_are_matched_literally(self):
+        self.assertEqual(self.search('search=lake" OR "milk'), [])
+
+    def test_falls_back_to_title_search(self):
+        with mock.patch.dict(search._enabled, {"default": False}):
+            results = self.search("search=kilom")
+            self.assertEqual(results, [])
+
+            results = self.search("search=morn")
+            self.assertEqual([item["id"] for item in results], [self.run.pk])
+            self.assertNotIn("snippet", results[0])
+
+    def test_rebuild_command(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {search.FTS_TABLE}")
+            cursor.execute(f"DROP TRIGGER {search.FTS_TABLE}_insert")
+
+        call_command("rebuild_search_index", stdout=StringIO())
+        Entry.objects.create(title="Pool", body="Laps", author=self.user)
+
+        self.assertEqual(len(self.search("search=lake")), 2)
+        self.assertEqual(len(self.search("search=laps")), 1)
+
+
+class EntryConditionalGetTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="tester", password="secret")
+        self.client = APIClient()
+        response_cache.get_cache().clear()
+        self.client.force_authenticate(self.user)
+        self.entry = Entry.objects.create(title="First", body="", author=self.user)
+
+    def assertNotModified(self, url, **headers):
+        # Without a cached response, only the validator query runs
+        response_cache.get_cache().clear()
+        with self.assertNumQueries(1):
+            response = self.client.get(url, headers=headers)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+    def test_list_answers_if_none_match(self):
+        response = self.client.get("/entries/")
+        etag = response["ETag"]
+
+        self.assertNotModified("/entries/", if_none_match=etag)
+
+        Entry.objects.create(title="Second", body="", author=self.user)
+        response = self.client.get("/entries/", headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_etag_changes_on_update_and_delete(self):
+        etag = self.client.get("/entries/")["ETag"]
+        self.entry.title = "Renamed"
+        self.entry.save()
+        updated = self.client.get("/entries/")["ETag"]
+
+        Entry.objects.create(title="Second", body="", author=self.user).delete()
+        self.assertEqual(self.client.get("/entries/")["ETag"], updated)
+        self.entry.delete()
+
+        self.assertNotEqual(etag, updated)
+        self.assertNotEqual(self.client.get("/entries/")["ETag"], updated)
+
+    def test_list_ignores_if_modified_since(self):
+        # Deleting an entry would not change the latest updated_at
+        client = APIClient(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}"
+        )
+        for url in ["/entries/", "/entries/async/"]:
+            with self.subTest(url=url):
+                response = client.get(url)
+                self.assertNotIn("Last-Modified", response)
+
+                response = client.get(url, headers={"if-modified-since": http_date()})
+                self.assertEqual(response.status_code, 200)
+
+    def test_retrieve_answers_if_modified_since(self):
+        url = f"/entries/{self.entry.pk}/"
+        response = self.client.get(url)
+
+        self.assertNotModified(url, if_modified_since=response["Last-Modified"])
+        self.assertNotModified(url, if_none_match=response["ETag"])
+
+    def test_etag_depends_on_filters(self):
+        all_entries = self.client.get("/entries/")["ETag"]
+        favorites = self.client.get("/entries/?favorite=true")["ETag"]
+
+        self.assertNotEqual(all_entries, favorites)
+
+
+class EntryResponseCacheTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="tester", password="secret")
+        self.other = User.objects.create_user(username="other", password="secret")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        response_cache.get_cache().clear()
+        self.entry = Entry.objects.create(title="First", body="", author=self.user)
+
+    def get(self, url, queries):
+        with self.assertNumQueries(queries):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_second_request_is_served_from_cache(self):
+        first = self.get("/entries/?ordering=title&page_size=5", 2)
+        second = self.get("/entries/?page_size=5&ordering=title", 0)
+
+        self.assertEqual(first["X-Cache"], "MISS")
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(second["ETag"], first["ETag"])
+        self.assertEqual(response_cache.get_stats(), {"hits": 1, "misses": 1})
+
+    def test_cached_response_answers_if_none_match(self):
+        etag = self.get("/entries/", 2)["ETag"]
+
+        with self.assertNumQueries(0):
+            response = self.client.get("/entries/", headers={"if-none-match": etag})
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_writes_expire_cached_responses(self):
+        self.get("/entries/", 2)
+        self.get(f"/entries/{self.entry.pk}/", 2)
+
+        self.client.post(f"/entries/{self.entry.pk}/toggle_favorite/")
+
+        self.assertTrue(self.get("/entries/", 2).data["results"][0]["favorite"])
+        self.assertTrue(self.get(f"/entries/{self.entry.pk}/", 2).data["favorite"])
+
+    def test_other_authors_writes_keep_filtered_lists(self):
+        url = f"/entries/?author={self.user.pk}"
+        # The author filter looks the user up
+        self.get(url, 3)
+        self.get("/entries/", 2)
+
+        Entry.objects.create(title="Other", body="", author=self.other)
+
+        self.assertEqual(self.get(url, 0)["X-Cache"], "HIT")
+        self.assertEqual(self.get("/entries/", 2)["X-Cache"], "MISS")
+
+    def test_author_change_expires_both_authors(self):
+        url = f"/entries/?author={self.user.pk}"
+        self.get(url, 3)
+
+        self.entry.author = self.other
+        self.entry.save()
+
+        response = self.get(url, 3)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data["results"], [])
+
+    def test_cache_is_per_user(self):
+        self.get("/entries/", 2)
+        self.client.force_authenticate(self.other)
+
+        self.assertEqual(self.get("/entries/", 2)["X-Cache"], "MISS")
+
+    def test_file_based_backend(self):
+        with TemporaryDirectory() as location, self.settings(
+            CACHES={
+                "responses": {
+                    "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                    "LOCATION": location,
+                }
+            }
+        ):
+            self.get("/entries/", 2)
+            self.assertEqual(self.get("/entries/", 0)["X-Cache"], "HIT")
+            Entry.objects.create(title="Second", body="", author=self.user)
+            self.assertEqual(len(self.get("/entries/", 2).data["results"]), 2)
+
+
+class EntryBulkTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="tester", password="secret")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        response_cache.get_cache().clear()
+
+    def items(self, count):
+        return [
+            {"title": f"Entry {index}", "body": "Body", "author": self.user.pk}
+            for index in range(count)
+        ]
+
+    def test_bulk_create_is_one_insert(self):
+        with self.assertNumQueries(6):
+            # The author lookup, a savepoint pair and one insert, and the
+            # update and insert of the day's stats
+            response = self.client.post("/entries/bulk/", self.items(20), format="json")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data), 20)
+        self.assertEqual(Entry.objects.count(), 20)
+        self.assertTrue(all(item["id"] for item in response.data))
+
+    def test_errors_are_reported_per_item(self):
+        items = self.items(3)
+        del items[1]["title"]
+
+        response = self.client.post("/entries/bulk/", items, format="json")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data[0], {})
+        self.assertIn("title", response.data[1])
+        self.assertEqual(Entry.objects.count(), 0)
+
+    def test_item_limit(self):
+        response = self.client.post("/entries/bulk/", self.items(101), format="json")
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_bulk_update(self):
+        first, second = Entry.objects.bulk_create(
+            Entry(title=f"Entry {index}", body="", author=self.user)
+            for index in range(2)
+        )
+        before = Entry.objects.get(pk=first.pk).updated_at
+        self.client.get("/entries/")
+
+        response = self.client.patch(
+            "/entries/bulk/",
+            [{"id": first.pk, "favorite": True}, {"id": second.pk, "title": "New"}],
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertTrue(first.favorite)
+        self.assertEqual(second.title, "New")
+        self.assertGreater(first.updated_at, before)
+        self.assertEqual(self.client.get("/entries/")["X-Cache"], "MISS")
+
+    def test_bulk_update_expires_previous_author(self):
+        other = User.objects.create_user(username="other", password="secret")
+        entry = Entry.objects.create(title="Entry", body="", author=self.user)
+        url = f"/entries/?author={self.user.pk}"
+        self.client.get(url)
+
+        self.client.patch(
+            "/entries/bulk/", [{"id": entry.pk, "author": other.pk}], format="json"
+        )
+
+        response = self.client.get(url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data["results"], [])
+
+    def test_bulk_update_unknown_id(self):
+        response = self.client.patch(
+            "/entries/bulk/", [{"id": 999, "favorite": True}], format="json"
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data[0], {"id": ["Not found."]})
+
+    def test_ids_must_be_integers(self):
+        first, second = Entry.objects.bulk_create(
+            Entry(title=f"Entry {index}", body="", author=self.user)
+            for index in range(2)
+        )
+
+        response = self.client.delete(
+            "/entries/bulk/",
+            {"ids": [second.pk, first.pk + 0.7, str(second.pk), True]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(response.data["ids"]), [1, 2, 3])
+
+        response = self.client.patch(
+            "/entries/bulk/",
+            [
+                {"id": str(first.pk), "favorite": True},
+                {"id": second.pk, "author": f"{self.user.pk}.5"},
+            ],
+            format="json",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data[0], {"id": ["A valid integer is required."]})
+        self.assertIn("author", response.data[1])
+
+        self.assertEqual(Entry.objects.filter(favorite=False).count(), 2)
+
+    def test_bulk_delete(self):
+        entry = Entry.objects.create(title="Entry", body="", author=self.user)
+
+        response = self.client.delete(
+            "/entries/bulk/", {"ids": [entry.pk, 999]}, format="json"
+        )
+
+        self.assertEqual(response.data, {"deleted": [entry.pk], "not_found": [999]})
+        self.assertFalse(Entry.objects.exists())
+
+
+class EntryExportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="tester", password="secret")
+        other = User.objects.create_user(username="other", password="secret")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        Entry.objects.bulk_create(
+            Entry(title=f"Entry {index}", body="Body, with a comma", author=self.user)
+            for index in range(3)
+        )
+        Entry.objects.create(title="Theirs", body="Body", author=other)
+
+    def export(self, **params):
+        response = self.client.get("/entries/export/", params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b"".join(response.streaming_content).decode("utf-8")
+
+    def test_ndjson_rows_match_serializer(self):
+        with self.assertNumQueries(1):
+            response, content = self.export()
+
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        expected = EntrySerializer(
+            Entry.objects.filter(author=self.user).order_by("pk"), many=True
+        ).data
+        self.assertEqual(
+            [json.loads(line) for line in content.splitlines()],
+            [dict(item) for item in expected],
+        )
+
+    def test_csv(self):
+        response, content = self.export(format="csv")
+
+        self.assertEqual(response["Content-Type"], "text/csv")
+        rows = list(csv.reader(StringIO(content)))
+        self.assertEqual(
+            rows[0], ["id", "title", "body", "author", "created_at", "favorite"]
+        )
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[1][2], "Body, with a comma")
+
+    def test_reads_in_chunks(self):
+        with mock.patch.object(EntryViewSet, "export_chunk_size", 2):
+            with mock.patch.object(
+                QuerySet, "iterator", autospec=True, side_effect=QuerySet.iterator
+            ) as iterator:
+                _, content = self.export()
+
+        self.assertEqual(iterator.call_args.kwargs, {"chunk_size": 2})
+        self.assertEqual(len(content.splitlines()), 3)
+
+
+class EntryFavoriteTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="tester", password="secret")
+        self.other = User.objects.create_user(username="other", password="secret")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        response_cache.get_cache().clear()
+
+        self.entries = Entry.objects.bulk_create(
+            Entry(title=f"Entry {index}", body="Body", author=self.user)
+            for index in range(3)
+        )
+        self.theirs = Entry.objects.create(title="Entry", body="", author=self.other)
+
+    def test_toggle_is_one_update(self):
+        entry = self.entries[0]
+        aggregates.rebuild([self.user.pk])
+
+        # And one update of the day's stats, the toggle in a savepoint that is
+        # rolled back if the user may not change the entry
+        with self.assertNumQueries(4):
+            response = self.client.post(f"/entries/{entry.pk}/toggle_favorite/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data["favorite"])
+        self.assertEqual(response.data["title"], "Entry 0")
+
+        response = self.client.post(f"/entries/{entry.pk}/toggle_favorite/")
+        self.assertFalse(response.data["favorite"])
+        self.assertGreater(Entry.objects.get(pk=entry.pk).updated_at, entry.updated_at)
+
+    def test_toggle_keeps_to_queryset(self):
+        mine = Entry.objects.filter(author=self.user)
+
+        self.assertIsNone(mine.toggle_favorite(self.theirs.pk))
+        self.assertFalse(Entry.objects.get(pk=self.theirs.pk).favorite)
+        self.assertTrue(mine.toggle_favorite(self.entries[0].pk).favorite)
+
+    def test_toggle_missing_entry(self):
+        for pk in [999, "abc"]:
+            response = self.client.post(f"/entries/{pk}/toggle_favorite/")
+            self.assertEqual(response.status_code, 404)
+
+    def test_toggle_expires_cached_responses(self):
+        entry = self.entries[0]
+        self.client.get(f"/entries/{entry.pk}/")
+
+        self.client.post(f"/entries/{entry.pk}/toggle_favorite/")
+
+        response = self.client.get(f"/entries/{entry.pk}/")
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertTrue(response.data["favorite"])
+
+    def test_bulk_favorite_by_ids(self):
+        ids = [self.entries[0].pk, self.entries[2].pk, self.theirs.pk]
+
+        response = self.client.post(
+            "/entries/bulk/favorite/", {"ids": ids, "favorite": True}, format="json"
+        )
+
+        self.assertEqual(response.data, {"updated": 2})
+        self.assertEqual(
+            set(Entry.objects.filter(favorite=True).values_list("pk", flat=True)),
+            {self.entries[0].pk, self.entries[2].pk},
+        )
+
+    def test_bulk_favorite_by_filter(self):
+        Entry.objects.update(favorite=True)
+
+        response = self.client.post(
+            "/entries/bulk/favorite/?search=Entry 1", {"favorite": False}, format="json"
+        )
+
+        self.assertEqual(response.data, {"updated": 1})
+        self.assertEqual(
+            list(Entry.objects.filter(favorite=False).values_list("pk", flat=True)),
+            [self.entries[1].pk],
+        )
+
+    def test_bulk_favorite_updates_in_one_statement(self):
+        aggregates.rebuild([self.user.pk])
+        entry = self.entries[0]
+        self.client.get(f"/entries/{entry.pk}/")
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                "/entries/bulk/favorite/?favorite=false",
+                {"favorite": True},
+                format="json",
+            )
+
+        self.assertEqual(response.data, {"updated": 3})
+        updates = [query for query in queries if "UPDATE" in query["sql"]]
+        self.assertIn("IN (SELECT", updates[0]["sql"])
+        self.assertEqual(DailyStats.objects.get(author=self.user).favorite_count, 3)
+        response = self.client.get(f"/entries/{entry.pk}/")
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertTrue(response.data["favorite"])
+
+
+class EntryValuesListTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="tester", password="secret")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        for index in range(5):
+            Entry.objects.create(
+                title=f"Entry {index % 3} \u2028 ä",
+                body="Morning run" if index % 2 else "Evening walk",
+                author=self.user,
+                favorite=index == 2,
+            )
+
+    def get(self, url):
+        response_cache.get_cache().clear()
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.content
+
+    def test_same_output_as_serializer(self):
+        urls = [
+            "/entries/",
+            "/entries/?page_size=2",
+            "/entries/?ordering=-title&page_size=3",
+            "/entries/?search=run",
+            "/entries/?search=run&ordering=search_rank",
+            f"/entries/?author={self.user.pk}&favorite=true",
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                with override_settings(VALUES_LIST_RESPONSES=False):
+                    expected = self.get(url)
+                with mock.patch.object(EntrySerializer, "to_representation") as slow:
+                    self.assertEqual(self.get(url), expected)
+                slow.assert_not_called()
+
+    def test_cursors_work_across_paths(self):
+        with override_settings(VALUES_LIST_RESPONSES=False):
+            next_url = json.loads(self.get("/entries/?page_size=2"))["next"]
+
+        self.assertEqual(len(json.loads(self.get(next_url))["results"]), 2)
+
+    @skipUnless(renderers.orjson, "orjson is not installed")
+    def test_renderer_matches_json_renderer(self):
+        data = {
+            "text": 'ä \u2028 \u2029 "quoted"',
+            "datetime": timezone.now(),
+            "date": timezone.localdate(),
+            "decimal": Decimal("1.10"),
+            "nested": [{"id": 1, "none": None, "flag": True}],
+            1: "non-string key",
+        }
+
+        self.assertEqual(
+            renderers.FastJSONRenderer().render(data),
+            JSONRenderer().render(data),
+        )
+
+
+class EntrySparseFieldsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="tester", password="secret")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        response_cache.get_cache().clear()
+
+        self.long = Entry.objects.create(title="Long", body="x" * 300, author=self.user)
+        self.short = Entry.objects.create(title="Short", body="Run", author=self.user)
+
+    def get(self, url, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        selected = " ".join(query["sql"] for query in queries)
+        return response.json(), selected
+
+    def test_fields(self):
+        for values in [True, False]:
+            with self.subTest(values=values), override_settings(
+                VALUES_LIST_RESPONSES=values
+            ):
+                response_cache.get_cache().clear()
+                data, sql = self.get("/entries/", fields="title,favorite")
+
+                self.assertEqual(
+                    data["results"],
+                    [
+                        {"title": "Long", "favorite": False},
+                        {"title": "Short", "favorite": False},
+                    ],
+                )
+                self.assertNotIn('"entries_entry"."body"', sql)
+
+    def test_exclude(self):
+        data, sql = self.get(f"/entries/{self.short.pk}/", exclude="body,author")
+
+        self.assertEqual(set(data), {"id", "title", "created_at", "favorite"})
+        self.assertNotIn('"entries_entry"."body"', sql)
+
+    def test_body_preview(self):
+        data, _ = self.get("/entries/", fields="id,body_preview")
+
+        self.assertEqual(
+            data["results"],
+            [
+                {"id": self.long.pk, "body_preview": "x" * 200 + "…"},
+                {"id": self.short.pk, "body_preview": "Run"},
+            ],
+        )
+
+        with override_settings(VALUES_LIST_RESPONSES=False):
+            data, _ = self.get(f"/entries/{self.long.pk}/", fields="body_preview")
+        self.assertEqual(data, {"body_preview": "x" * 200 + "…"})
+
+    def test_unknown_fields(self):
+        for params in [
+            {"fields": "title,secret"},
+            {"fields": ""},
+            {"exclude": "body_preview"},
+            # Nothing left
+            {"fields": "title", "exclude": "title"},
+            {"exclude": "id,title,body,author,created_at,favorite"},
+        ]:
+            with self.subTest(params=params):
+                response = self.client.get("/entries/", params)
+                self.assertEqual(response.status_code, 400)
+
+
+class AsyncEntryViewTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="tester", password="secret")
+        other = User.objects.create_user(username="other", password="secret")
+        token = AccessToken.for_user(self.user)
+        self.client = APIClient(HTTP_AUTHORIZATION=f"Bearer {token}")
+        response_cache.get_cache().clear()
+
+        for index in range(5):
+            Entry.objects.create(
+                title=f"Entry {index % 2}",
+                body="Body",
+                author=self.user if index % 3 else other,
+                favorite=index == 1,
+            )
+
+    def assertSameResponse(self, path):
+        response_cache.get_cache().clear()
+        expected = self.client.get(f"/entries/{path}")
+        response = self.client.get(f"/entries/async/{path}")
+
+        self.assertEqual(response.status_code, expected.status_code)
+        # Page links point back at the view they came from
+        content = response.content.replace(b"/entries/async/", b"/entries/")
+        self.assertEqual(content, expected.content)
+        self.assertEqual(response.get("ETag"), expected.get("ETag"))
+        return response
+
+    def test_list_matches_sync_view(self):
+        for query in [
+            "",
+            "?page_size=2",
+            "?ordering=-title&page_size=2",
+            f"?author={self.user.pk}&favorite=true",
+            "?created_at=2000-01-01T00:00:00",
+            "?created_at=nonsense",
+        ]:
+            with self.subTest(query=query):
+                self.assertSameResponse(query)
+
+    def test_next_page_matches_sync_view(self):
+        first = self.client.get("/entries/async/?page_size=2").json()
+
+        self.assertSameResponse(f"?{first['next'].split('?')[1]}")
+
+    def test_detail_matches_sync_view(self):
+        entry = Entry.objects.first()
+
+        self.assertSameResponse(f"{entry.pk}/")
+        self.assertSameResponse("999/")
+
+    def test_not_modified(self):
+        etag = self.client.get("/entries/")["ETag"]
+
+        response = self.client.get("/entries/async/", HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_authentication(self):
+        for header in [{}, {"HTTP_AUTHORIZATION": "Bearer invalid"}]:
+            response = APIClient(**header).get("/entries/async/")
+            expected = APIClient(**header).get("/entries/")
+
+            self.assertEqual(response.status_code, 401)
+            self.assertEqual(response.json(), expected.json())
+            self.assertEqual(response["WWW-Authenticate"], expected["WWW-Authenticate"])
@@ -1,7 +1,7 @@
 # urls.py
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import EntryViewSet
+from .views import AsyncEntryDetailView, AsyncEntryListView, EntryViewSet
 
 # Luo router
 router = DefaultRouter()
@@ -9,5 +9,8 @@ router.register(r"", EntryViewSet, basename="entry")
 
 # Rekisteröi router URL:iin
 urlpatterns = [
+    # Async versions of the read endpoints, for ASGI
+    path("async/", AsyncEntryListView.as_view(), name="entry-list-async"),
+    path("async/<int:pk>/", AsyncEntryDetailView.as_view(), name="entry-detail-async"),
     path("", include(router.urls)),
 ]
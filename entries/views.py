@@ -1,40 +1,179 @@
+from copy import copy
+
 from rest_framework import viewsets
 from rest_framework import filters
 from django_filters.rest_framework import DjangoFilterBackend
 from .models import Entry
-from .filters import EntryFilter
-from .serializers import EntrySerializer
+from .filters import AsyncEntryFilter, EntryFilter
+from .search import FullTextSearchFilter
+from .serializers import BulkFavoriteSerializer, EntrySerializer
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework import status
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.db.models.functions import TruncDate
+from django_filters.utils import translate_validation
+from drf_spectacular.utils import extend_schema, extend_schema_view
+from lifestyle_app_backend import cache
+from lifestyle_app_backend.asyncviews import AsyncAPIView
+from lifestyle_app_backend.bulk import BulkModelMixin
+from lifestyle_app_backend.cache import CachedResponseMixin
+from lifestyle_app_backend.conditional import ConditionalGetMixin
+from lifestyle_app_backend.export import ExportMixin
+from lifestyle_app_backend.representation import (
+    SPARSE_FIELDS_PARAMETERS,
+    SparseFieldsMixin,
+    ValuesListMixin,
+)
+from lifestyle_app_backend.routers import ReplicaReadMixin
+from lifestyle_app_backend.pagination import KeysetPagination
+from stats import aggregates
 
 
-class EntryViewSet(viewsets.ModelViewSet):
+@extend_schema_view(
+    list=extend_schema(parameters=SPARSE_FIELDS_PARAMETERS),
+    retrieve=extend_schema(parameters=SPARSE_FIELDS_PARAMETERS),
+)
+class EntryViewSet(
+    ReplicaReadMixin,
+    SparseFieldsMixin,
+    BulkModelMixin,
+    ExportMixin,
+    CachedResponseMixin,
+    ValuesListMixin,
+    ConditionalGetMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Entry.objects.all()
     serializer_class = EntrySerializer
+    pagination_class = KeysetPagination
     filter_backends = (
         DjangoFilterBackend,
+        FullTextSearchFilter,
         filters.OrderingFilter,
-        filters.SearchFilter,
     )
     filterset_class = EntryFilter
-    ordering_fields = ["created_at", "title"]
+    ordering_fields = ["created_at", "title", "search_rank"]
     ordering = ["created_at", "title"]
     search_fields = ["title"]
+    # ?fields= can ask for a preview instead of the body, see representation.py
+    optional_fields = {"body_preview": "with_body_preview"}
+    export_fields = {
+        "id": "id",
+        "title": "title",
+        "body": "body",
+        "author": "author",
+        "created_at": "created_at",
+        "favorite": "favorite",
+    }
 
     @action(detail=True, methods=["post"])
     def toggle_favorite(self, request, pk=None):
         try:
-            entry = self.get_object()
-        except Entry.DoesNotExist:
-            return Response(
-                {"detail": "Entry not found."}, status=status.HTTP_404_NOT_FOUND
-            )
+            pk = Entry._meta.pk.to_python(pk)
+        except DjangoValidationError:
+            pk = None
 
-        # Toggle the favorite value
-        entry.favorite = not entry.favorite
-        entry.save()
+        # Flipped by the database, so concurrent toggles are not lost. Rolled
+        # back if the user may not change the entry.
+        queryset = self.filter_queryset(self.get_queryset())
+        with transaction.atomic():
+            entry = queryset.toggle_favorite(pk) if pk is not None else None
+            if entry is None:
+                return Response(
+                    {"detail": "Entry not found."}, status=status.HTTP_404_NOT_FOUND
+                )
+            self.check_object_permissions(request, entry)
+
+        # Neither update sends post_save
+        cache.invalidate(Entry, author_ids=[entry.author_id], pks=[entry.pk])
+        previous = copy(entry)
+        previous.favorite = not entry.favorite
+        aggregates.update_entries(before=[previous], after=[entry])
 
         # Return the updated entry
         serializer = EntrySerializer(entry)
         return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @extend_schema(
+        summary="Favorite or unfavorite many entries",
+        description="Sets favorite on the user's own entries: the ones listed in "
+        "ids, or without ids every entry that matches the list filters given as "
+        "query parameters.",
+        request=BulkFavoriteSerializer,
+        responses={
+            200: {"type": "object", "properties": {"updated": {"type": "integer"}}}
+        },
+    )
+    @action(detail=False, methods=["post"], url_path="bulk/favorite")
+    def bulk_favorite(self, request):
+        serializer = BulkFavoriteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data.get("ids")
+
+        queryset = self.get_queryset().filter(author=request.user.pk)
+        if ids is None:
+            queryset = self.filter_queryset(queryset)
+        else:
+            queryset = queryset.filter(pk__in=ids)
+        # One UPDATE with the filters as a subquery, no pks are loaded
+        entries = Entry.objects.filter(pk__in=queryset.values("pk"))
+
+        # The filters may no longer match after the update, so the days to
+        # count again are read before it
+        days = (
+            entries.annotate(day=TruncDate("created_at"))
+            .order_by()
+            .values_list("day", flat=True)
+            .distinct()
+        )
+        spans = [(request.user.pk, (day, day)) for day in days]
+
+        updated = entries.set_favorite(serializer.validated_data["favorite"])
+        # Retrieves of the user's entries expire with the author too
+        cache.invalidate(Entry, author_ids=[request.user.pk])
+        aggregates.refresh_spans(spans)
+
+        return Response({"updated": updated}, status=status.HTTP_200_OK)
+
+
+class AsyncEntryListView(AsyncAPIView):
+    """
+    Async version of the entry list, with the same filters, ordering and
+    pagination but without search.
+    """
+
+    filter_backends = (filters.OrderingFilter,)
+    ordering_fields = ["created_at", "title"]
+    ordering = EntryViewSet.ordering
+
+    async def get(self, request):
+        filterset = AsyncEntryFilter(request.query_params, queryset=Entry.objects.all())
+        if not filterset.is_valid():
+            return self.error_response(translate_validation(filterset.errors))
+        queryset = filterset.qs
+
+        async def render():
+            data = await self.list_data(
+                request, queryset, EntrySerializer, paginator=KeysetPagination()
+            )
+            return self.render(data)
+
+        return await self.conditional_response(request, queryset, render, many=True)
+
+
+class AsyncEntryDetailView(AsyncAPIView):
+    async def get(self, request, pk):
+        queryset = Entry.objects.filter(pk=pk)
+
+        async def render():
+            entry = await queryset.afirst()
+            if entry is None:
+                return self.render(
+                    {"detail": "No Entry matches the given query."},
+                    status=status.HTTP_404_NOT_FOUND,
+                )
+            return self.render(EntrySerializer(entry).data)
+
+        return await self.conditional_response(request, queryset, render)
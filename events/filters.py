@@ -1,9 +1,41 @@
 import django_filters
+from lifestyle_app_backend.asyncviews import AuthorFilter
 from .models import Event
 
 
 class EventFilter(django_filters.FilterSet):
+    # Calendar window, returns the events that overlap [from, to). "from" is
+    # a keyword, so it is declared through the class namespace.
+    locals()["from"] = django_filters.IsoDateTimeFilter(
+        field_name="end_time", method="filter_window", label="From"
+    )
+    to = django_filters.IsoDateTimeFilter(
+        field_name="start_time", method="filter_window", label="To"
+    )
 
     class Meta:
         model = Event
         fields = ["author"]
+
+    def filter_window(self, queryset, name, value):
+        # Applied together in filter_queryset, after the other filters
+        return queryset
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+
+        start = self.form.cleaned_data.get("from")
+        end = self.form.cleaned_data.get("to")
+        if start is None and end is None:
+            return queryset
+
+        return queryset.overlapping(start, end)
+
+
+class AsyncEventFilter(EventFilter):
+    # The author is not looked up, so filtering needs no synchronous query
+    author = AuthorFilter()
+
+    def filter_queryset(self, queryset):
+        # The window is left to the view, which applies it with aoverlapping
+        return super(EventFilter, self).filter_queryset(queryset)
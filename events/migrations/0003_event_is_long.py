@@ -0,0 +1,38 @@
+# Generated by Django 5.1.3 on 2026-10-18 08:40
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+# LONG_EVENT_DURATION when this migration was written, the constant may change
+LONG_EVENT_DURATION = timedelta(days=1)
+
+
+def flag_long_events(apps, schema_editor):
+    Event = apps.get_model("events", "Event")
+    Event.objects.using(schema_editor.connection.alias).filter(
+        end_time__gt=F("start_time") + LONG_EVENT_DURATION
+    ).update(is_long=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0002_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='is_long',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(flag_long_events, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(condition=models.Q(('is_long', True)), fields=['author', 'start_time', 'end_time'], name='event_author_long_idx'),
+        ),
+    ]
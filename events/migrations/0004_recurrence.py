@@ -0,0 +1,69 @@
+# Generated by Django 5.1.3 on 2026-10-18 08:43
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("events", "0003_event_is_long"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EventOverride",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("original_start", models.DateTimeField()),
+                ("cancelled", models.BooleanField(default=False)),
+                ("title", models.CharField(blank=True, max_length=255, null=True)),
+                ("description", models.TextField(blank=True, null=True)),
+                ("start_time", models.DateTimeField()),
+                ("end_time", models.DateTimeField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name="event",
+            name="recurrence",
+            field=models.CharField(blank=True, default="", max_length=255),
+        ),
+        migrations.AddField(
+            model_name="event",
+            name="recurrence_end",
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(
+                condition=models.Q(("recurrence", ""), _negated=True),
+                fields=["author", "start_time", "recurrence_end"],
+                name="event_author_recurring_idx",
+            ),
+        ),
+        migrations.AddField(
+            model_name="eventoverride",
+            name="event",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="overrides",
+                to="events.event",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="eventoverride",
+            constraint=models.UniqueConstraint(
+                fields=("event", "original_start"), name="unique_event_override"
+            ),
+        ),
+    ]
@@ -1,10 +1,293 @@
+from datetime import timedelta
+
+from collections import defaultdict
+
 from django.db import models
 from django.contrib.auth.models import User
 
+from .recurrence import RecurrenceRule, occurrences
+
+# Events longer than this are flagged, so range queries can bound how far back
+# they need to look for events that started before the window
+LONG_EVENT_DURATION = timedelta(days=1)
+
+
+class EventQuerySet(models.QuerySet):
+    def overlapping(self, start=None, end=None):
+        """
+        Events that intersect the half-open window [start, end), including
+        recurring events that have an occurrence there.
+        """
+        earliest = None
+        if start is not None:
+            earliest = self._long_events(start, end).aggregate(
+                earliest=models.Min("start_time")
+            )["earliest"]
+
+        return self._overlapping(start, end, earliest)
+
+    async def aoverlapping(self, start=None, end=None):
+        earliest = None
+        if start is not None:
+            aggregate = await self._long_events(start, end).aaggregate(
+                earliest=models.Min("start_time")
+            )
+            earliest = aggregate["earliest"]
+
+        return self._overlapping(start, end, earliest)
+
+    def _overlapping(self, start, end, earliest):
+        single = self.filter(recurrence="")._overlapping_single(start, end, earliest)
+
+        recurring = self.exclude(recurrence="")
+        if end is not None:
+            recurring = recurring.filter(start_time__lt=end)
+        if start is not None:
+            recurring = recurring.filter(
+                models.Q(recurrence_end__isnull=True)
+                | models.Q(recurrence_end__gt=start)
+            )
+
+        # Each subquery can use its own index
+        return self.filter(
+            models.Q(pk__in=single.values("pk"))
+            | models.Q(pk__in=recurring.values("pk"))
+        )
+
+    def _long_events(self, start, end):
+        queryset = self.filter(recurrence="", is_long=True, end_time__gt=start)
+        if end is not None:
+            queryset = queryset.filter(start_time__lt=end)
+        return queryset
+
+    def _overlapping_single(self, start, end, earliest):
+        queryset = self
+        if end is not None:
+            queryset = queryset.filter(start_time__lt=end)
+
+        if start is not None:
+            queryset = queryset.filter(end_time__gt=start)
+
+            # Only a long event can start earlier than LONG_EVENT_DURATION
+            # before the window, and those few are found through their own index
+            lower = start - LONG_EVENT_DURATION
+            if earliest is not None:
+                lower = min(lower, earliest)
+
+            queryset = queryset.filter(start_time__gte=lower)
+
+        return queryset
+
+    def expand(self, start, end):
+        """
+        Return the single events and the occurrences of recurring events that
+        overlap [start, end), sorted by start time.
+
+        Occurrences are built in memory and never saved, and only the ones
+        inside the window are generated.
+        """
+        events = list(self)
+        overrides = self._overrides(events, start, end)
+        return self._expand(events, list(overrides), start, end)
+
+    async def aexpand(self, start, end):
+        events = [event async for event in self]
+        overrides = self._overrides(events, start, end)
+        return self._expand(
+            events, [override async for override in overrides], start, end
+        )
+
+    def _overrides(self, events, start, end):
+        masters = [event for event in events if event.recurrence]
+        if not masters:
+            return EventOverride.objects.none()
+
+        # Overrides of occurrences inside the window, or moved into it
+        longest = max(master.end_time - master.start_time for master in masters)
+        return EventOverride.objects.filter(event__in=masters).filter(
+            models.Q(original_start__gte=start - longest, original_start__lt=end)
+            | models.Q(start_time__lt=end, end_time__gt=start)
+        )
+
+    def _expand(self, events, overrides, start, end):
+        masters = [event for event in events if event.recurrence]
+        results = [event for event in events if not event.recurrence]
+        if not masters:
+            return results
+
+        overrides_by_event = defaultdict(dict)
+        for override in overrides:
+            overrides_by_event[override.event_id][override.original_start] = override
+
+        for master in masters:
+            event_overrides = overrides_by_event[master.pk]
+            results.extend(occurrences(master, start, end, event_overrides))
 
-class Event(models.Model):
+            for override in event_overrides.values():
+                if override.cancelled:
+                    continue
+                if override.start_time < end and override.end_time > start:
+                    results.append(
+                        master.as_occurrence(override.original_start, override)
+                    )
+
+        results.sort(key=lambda event: (event.start_time, event.pk))
+        return results
+
+
+class SavedValuesMixin:
+    """
+    Keeps the values of the fields as they are in the database, from when the
+    instance was loaded or last saved, so signal receivers can tell what a
+    save changes without reading the row again.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._saved_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get("update_fields")
+        fields = self._meta.concrete_fields
+        if update_fields is not None:
+            fields = [
+                field
+                for field in fields
+                if {field.name, field.attname} & set(update_fields)
+            ]
+        deferred = self.get_deferred_fields()
+        self._saved_values = {
+            **getattr(self, "_saved_values", {}),
+            **{
+                field.attname: getattr(self, field.attname)
+                for field in fields
+                if field.attname not in deferred
+            },
+        }
+
+    def saved_values(self):
+        """
+        Return the saved values by attname, or None if some were not loaded.
+        """
+        values = getattr(self, "_saved_values", None)
+        if values is None or len(values) < len(self._meta.concrete_fields):
+            return None
+        return values
+
+
+class Event(SavedValuesMixin, models.Model):
     title = models.CharField(max_length=255)
     description = models.TextField(null=True, blank=True)
     start_time = models.DateTimeField()
     end_time = models.DateTimeField()
     author = models.ForeignKey(User, on_delete=models.CASCADE)
+    updated_at = models.DateTimeField(auto_now=True)
+    is_long = models.BooleanField(default=False, editable=False)
+    # RRULE, such as "FREQ=WEEKLY;BYDAY=MO,WE", empty for single events
+    recurrence = models.CharField(max_length=255, blank=True, default="")
+    # When the last occurrence ends, null for endless series
+    recurrence_end = models.DateTimeField(null=True, editable=False)
+
+    objects = EventQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # A user's events by time range
+            models.Index(
+                fields=["author", "start_time", "end_time"],
+                name="event_author_start_idx",
+            ),
+            # Latest change in a user's events, for conditional requests
+            models.Index(
+                fields=["author", "updated_at"], name="event_author_updated_idx"
+            ),
+            # The few long events that range queries look up separately
+            models.Index(
+                fields=["author", "start_time", "end_time"],
+                condition=models.Q(is_long=True),
+                name="event_author_long_idx",
+            ),
+            # Recurring events, looked up by when the series starts
+            models.Index(
+                fields=["author", "start_time", "recurrence_end"],
+                condition=~models.Q(recurrence=""),
+                name="event_author_recurring_idx",
+            ),
+        ]
+
+    # Fields that set_derived_fields() fills in
+    derived_fields = ("is_long", "recurrence_end")
+
+    def save(self, *args, **kwargs):
+        self.set_derived_fields()
+
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {
+            "start_time",
+            "end_time",
+            "recurrence",
+        } & set(update_fields):
+            kwargs["update_fields"] = {*update_fields, *self.derived_fields}
+
+        super().save(*args, **kwargs)
+
+    def set_derived_fields(self):
+        duration = self.end_time - self.start_time
+        self.is_long = duration > LONG_EVENT_DURATION
+        self.recurrence_end = None
+        if self.recurrence:
+            rule = RecurrenceRule.parse(self.recurrence)
+            self.recurrence_end = rule.series_end(self.start_time, duration)
+
+    def as_occurrence(self, original_start, override=None):
+        """
+        Return an unsaved copy of this recurring event for one occurrence.
+        """
+        # Fields that were deferred are left out instead of loaded one by one
+        deferred = self.get_deferred_fields()
+        copied = {
+            name: getattr(self, name)
+            for name in ["title", "description", "author_id"]
+            if name not in deferred
+        }
+        occurrence = Event(
+            id=self.id,
+            start_time=original_start,
+            end_time=original_start + (self.end_time - self.start_time),
+            recurrence=self.recurrence,
+            **copied,
+        )
+        if override is not None:
+            occurrence.start_time = override.start_time
+            occurrence.end_time = override.end_time
+            if override.title is not None:
+                occurrence.title = override.title
+            if override.description is not None:
+                occurrence.description = override.description
+
+        occurrence.original_start = original_start
+        return occurrence
+
+
+class EventOverride(SavedValuesMixin, models.Model):
+    """
+    A change to, or the cancellation of, one occurrence of a recurring event.
+    """
+
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name="overrides")
+    original_start = models.DateTimeField()
+    cancelled = models.BooleanField(default=False)
+    title = models.CharField(max_length=255, null=True, blank=True)
+    description = models.TextField(null=True, blank=True)
+    start_time = models.DateTimeField()
+    end_time = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["event", "original_start"], name="unique_event_override"
+            ),
+        ]
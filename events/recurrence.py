@@ -0,0 +1,200 @@
+import calendar
+from collections import deque
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.utils import timezone
+
+FREQUENCIES = ("DAILY", "WEEKLY", "MONTHLY", "YEARLY")
+WEEKDAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+MAX_COUNT = 10000
+
+
+class RecurrenceRule:
+    """
+    The supported subset of an iCalendar RRULE: FREQ (DAILY, WEEKLY, MONTHLY
+    or YEARLY), INTERVAL, COUNT or UNTIL, and BYDAY for weekly rules.
+
+    Occurrences follow the local wall clock, so a weekly 9:00 event stays at
+    9:00 across daylight saving changes.
+    """
+
+    def __init__(self, freq, interval=1, count=None, until=None, byday=None):
+        self.freq = freq
+        self.interval = interval
+        self.count = count
+        self.until = until
+        self.byday = sorted(byday) if byday else None
+
+    @classmethod
+    def parse(cls, value):
+        """
+        Parse a rule such as "FREQ=WEEKLY;BYDAY=MO,WE;COUNT=10".
+        Raises ValueError if the rule is invalid or unsupported.
+        """
+        parts = {}
+        for part in value.strip().upper().removeprefix("RRULE:").split(";"):
+            if not part:
+                continue
+            name, separator, part_value = part.partition("=")
+            if not separator or name in parts:
+                raise ValueError(f"Invalid rule part '{part}'.")
+            parts[name] = part_value
+
+        unknown = set(parts) - {"FREQ", "INTERVAL", "COUNT", "UNTIL", "BYDAY"}
+        if unknown:
+            raise ValueError(f"Unsupported rule parts: {', '.join(sorted(unknown))}.")
+
+        freq = parts.get("FREQ")
+        if freq not in FREQUENCIES:
+            raise ValueError(f"FREQ must be one of {', '.join(FREQUENCIES)}.")
+
+        interval = cls._parse_positive(parts, "INTERVAL", default=1)
+        count = cls._parse_positive(parts, "COUNT")
+        if count is not None and count > MAX_COUNT:
+            raise ValueError(f"COUNT can be at most {MAX_COUNT}.")
+
+        until = cls._parse_until(parts["UNTIL"]) if "UNTIL" in parts else None
+        if count is not None and until is not None:
+            raise ValueError("COUNT and UNTIL can't be used together.")
+
+        byday = None
+        if "BYDAY" in parts:
+            if freq != "WEEKLY":
+                raise ValueError("BYDAY is only supported for weekly rules.")
+            days = parts["BYDAY"].split(",")
+            if not days or any(day not in WEEKDAYS for day in days):
+                raise ValueError("BYDAY must be a list of MO, TU, WE, TH, FR, SA, SU.")
+            byday = {WEEKDAYS.index(day) for day in days}
+
+        return cls(freq, interval=interval, count=count, until=until, byday=byday)
+
+    @staticmethod
+    def _parse_positive(parts, name, default=None):
+        if name not in parts:
+            return default
+        try:
+            value = int(parts[name])
+        except ValueError:
+            value = 0
+        if value < 1:
+            raise ValueError(f"{name} must be a positive integer.")
+        return value
+
+    @staticmethod
+    def _parse_until(value):
+        try:
+            if value.endswith("Z"):
+                until = datetime.strptime(value, "%Y%m%dT%H%M%SZ")
+                return until.replace(tzinfo=dt_timezone.utc)
+            if "T" in value:
+                return timezone.make_aware(datetime.strptime(value, "%Y%m%dT%H%M%S"))
+            # A date includes the whole local day
+            until = datetime.strptime(value, "%Y%m%d") + timedelta(days=1)
+            return timezone.make_aware(until) - timedelta(microseconds=1)
+        except ValueError:
+            raise ValueError("UNTIL must look like 20250131 or 20250131T120000Z.")
+
+    def starts(self, dtstart, after=None):
+        """
+        Lazily yield the start of every occurrence, in order.
+
+        `after` is a hint to skip ahead: occurrences that start well before it
+        are not generated, but a few earlier ones may still be yielded.
+        """
+        local = timezone.localtime(dtstart).replace(tzinfo=None)
+        period, counted = self._skip(local, after)
+
+        while True:
+            for start in self._period(local, period):
+                if self.count is not None and counted >= self.count:
+                    return
+                start = timezone.make_aware(start)
+                if self.until is not None and start > self.until:
+                    return
+                counted += 1
+                yield start
+            period += 1
+
+    def includes(self, dtstart, moment):
+        for start in self.starts(dtstart, after=moment):
+            if start >= moment:
+                return start == moment
+        return False
+
+    def series_end(self, dtstart, duration):
+        """
+        Return when the last occurrence ends, or None for endless series.
+        """
+        if self.until is not None:
+            return self.until + duration
+        if self.count is not None:
+            last = deque(self.starts(dtstart), maxlen=1)
+            return last[0] + duration if last else dtstart + duration
+        return None
+
+    def _period(self, local, period):
+        """
+        Occurrence starts (naive, local) within the nth interval of the rule.
+        """
+        step = period * self.interval
+        if self.freq == "DAILY":
+            return [local + timedelta(days=step)]
+
+        if self.freq == "WEEKLY":
+            week = local - timedelta(days=local.weekday()) + timedelta(weeks=step)
+            days = self.byday or [local.weekday()]
+            starts = [week + timedelta(days=day) for day in days]
+            return [start for start in starts if start >= local]
+
+        if self.freq == "MONTHLY":
+            months = local.month - 1 + step
+            year, month = local.year + months // 12, months % 12 + 1
+            # Months without the day are skipped, like in RFC 5545
+            if local.day > calendar.monthrange(year, month)[1]:
+                return []
+            return [local.replace(year=year, month=month)]
+
+        try:
+            return [local.replace(year=local.year + step)]
+        except ValueError:
+            # February 29th outside leap years
+            return []
+
+    def _skip(self, local, after):
+        """
+        Return the first period worth generating for `after`, and how many
+        occurrences come before it.
+        """
+        if after is None or self.freq not in ("DAILY", "WEEKLY"):
+            return 0, 0
+
+        after = timezone.localtime(after).replace(tzinfo=None)
+        if self.freq == "DAILY":
+            period = (after - local) // timedelta(days=self.interval) - 1
+            return max(period, 0), max(period, 0)
+
+        week = local - timedelta(days=local.weekday())
+        period = (after - week) // timedelta(weeks=self.interval) - 1
+        if period <= 0:
+            return 0, 0
+
+        per_week = len(self.byday) if self.byday else 1
+        counted = len(self._period(local, 0)) + (period - 1) * per_week
+        return period, counted
+
+
+def occurrences(event, start, end, overrides=None):
+    """
+    Lazily yield the occurrences of a recurring event that overlap [start, end).
+    Occurrences that have an override in `overrides` are left to the caller.
+    """
+    overrides = overrides or {}
+    rule = RecurrenceRule.parse(event.recurrence)
+    duration = event.end_time - event.start_time
+
+    for original_start in rule.starts(event.start_time, after=start - duration):
+        if original_start >= end:
+            return
+        if original_start + duration <= start or original_start in overrides:
+            continue
+        yield event.as_occurrence(original_start)
@@ -1,11 +1,145 @@
 from rest_framework import serializers
-from .models import Event
+from lifestyle_app_backend.bulk import BulkListSerializer
+from .models import Event, EventOverride
+from .recurrence import RecurrenceRule
+
+
+class EventListSerializer(BulkListSerializer):
+    def update(self, instance, validated_data):
+        # Overrides point at occurrences of the old series
+        rescheduled = [
+            attrs["id"]
+            for attrs in validated_data
+            if is_rescheduled(instance[attrs["id"]], attrs)
+        ]
+
+        events = super().update(instance, validated_data)
+        if rescheduled:
+            EventOverride.objects.filter(event__in=rescheduled).delete()
+
+        return events
+
+
+def is_rescheduled(event, attrs):
+    """
+    Whether writing `attrs` moves the occurrences of the event, for single
+    and bulk updates alike.
+    """
+    return (
+        attrs.get("recurrence", event.recurrence) != event.recurrence
+        or attrs.get("start_time", event.start_time) != event.start_time
+    )
+
+
+OCCURRENCE_FIELD = serializers.DateTimeField(format="%Y-%m-%d %H:%M:%S")
 
 
 class EventSerializer(serializers.ModelSerializer):
-    start_date = serializers.DateTimeField(format="%Y-%m-%d %H:%M:%S", read_only=True)
-    end_date = serializers.DateTimeField(format="%Y-%m-%d %H:%M:%S", read_only=True)
+    start_date = serializers.DateTimeField(
+        source="start_time", format="%Y-%m-%d %H:%M:%S"
+    )
+    end_date = serializers.DateTimeField(source="end_time", format="%Y-%m-%d %H:%M:%S")
 
     class Meta:
         model = Event
-        fields = ["id", "title", "description", "start_date", "end_date", "author"]
+        fields = [
+            "id",
+            "title",
+            "description",
+            "start_date",
+            "end_date",
+            "author",
+            "recurrence",
+        ]
+        list_serializer_class = EventListSerializer
+
+    # Lists can be built from values() rows, which are never occurrences
+    values_extras = {}
+
+    def validate_recurrence(self, value):
+        if value:
+            try:
+                RecurrenceRule.parse(value)
+            except ValueError as error:
+                raise serializers.ValidationError(str(error))
+
+        return value
+
+    def validate(self, attrs):
+        start_time = attrs.get("start_time", getattr(self.instance, "start_time", None))
+        end_time = attrs.get("end_time", getattr(self.instance, "end_time", None))
+
+        if start_time and end_time and end_time < start_time:
+            raise serializers.ValidationError("Event can't end before it starts.")
+
+        return attrs
+
+    def update(self, instance, validated_data):
+        # Overrides point at occurrences of the old series
+        rescheduled = is_rescheduled(instance, validated_data)
+
+        instance = super().update(instance, validated_data)
+        if rescheduled:
+            instance.overrides.all().delete()
+
+        return instance
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+
+        # Occurrences of recurring events say which occurrence they are
+        original_start = getattr(instance, "original_start", None)
+        if original_start is not None:
+            # Like start_date, which ?fields= may have left out
+            data["original_start"] = OCCURRENCE_FIELD.to_representation(original_start)
+
+        return data
+
+
+class EventOverrideSerializer(serializers.ModelSerializer):
+    original_start = serializers.DateTimeField(format="%Y-%m-%d %H:%M:%S")
+    start_date = serializers.DateTimeField(
+        source="start_time", format="%Y-%m-%d %H:%M:%S", required=False
+    )
+    end_date = serializers.DateTimeField(
+        source="end_time", format="%Y-%m-%d %H:%M:%S", required=False
+    )
+
+    class Meta:
+        model = EventOverride
+        fields = [
+            "id",
+            "original_start",
+            "cancelled",
+            "title",
+            "description",
+            "start_date",
+            "end_date",
+        ]
+
+    def validate(self, attrs):
+        event = self.context["event"]
+        if not event.recurrence:
+            raise serializers.ValidationError("Event is not recurring.")
+
+        original_start = attrs["original_start"]
+        rule = RecurrenceRule.parse(event.recurrence)
+        if not rule.includes(event.start_time, original_start):
+            raise serializers.ValidationError(
+                {"original_start": "Event has no occurrence at this time."}
+            )
+
+        # Times that are left out stay as in the series
+        attrs.setdefault("start_time", original_start)
+        attrs.setdefault(
+            "end_time", attrs["start_time"] + (event.end_time - event.start_time)
+        )
+        if attrs["end_time"] < attrs["start_time"]:
+            raise serializers.ValidationError("Event can't end before it starts.")
+
+        return attrs
+
+
+class BusyBlockSerializer(serializers.Serializer):
+    start_date = serializers.DateTimeField(format="%Y-%m-%d %H:%M:%S")
+    end_date = serializers.DateTimeField(format="%Y-%m-%d %H:%M:%S")
@@ -1,3 +1,396 @@
-from django.test import TestCase
+import json
+from datetime import datetime, timedelta, timezone
+from unittest import skipUnless
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.utils.timezone import localtime
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from lifestyle_app_backend import cache as response_cache
+
+from .models import Event
+from .recurrence import RecurrenceRule
+from .serializers import EventSerializer
+
+
+def at(day, hour=0, minute=0):
+    return datetime(2025, 3, day, hour, minute, tzinfo=timezone.utc)
+
+
+def timezone_local(value):
+    return localtime(value).strftime("%Y-%m-%d %H:%M")
+
+
+class EventRangeTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="tester", password="secret")
+        self.client = APIClient()
+        response_cache.get_cache().clear()
+        self.client.force_authenticate(self.user)
+
+    def create(self, title, start_time, end_time):
+        return Event.objects.create(
+            title=title, start_time=start_time, end_time=end_time, author=self.user
+        )
+
+    def test_window_returns_overlapping_events(self):
+        inside = self.create("Inside", at(10, 9), at(10, 10))
+        starts_before = self.create("Starts before", at(9, 23), at(10, 1))
+        trip = self.create("Trip", at(1), at(20))
+        self.create("Before", at(9, 8), at(9, 9))
+        self.create("After", at(11), at(11, 1))
+        self.create("Ends at start", at(9, 22), at(10))
+
+        response = self.client.get(
+            "/events/?from=2025-03-10T00:00:00Z&to=2025-03-11T00:00:00Z"
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            sorted(item["id"] for item in response.data),
+            sorted([inside.pk, starts_before.pk, trip.pk]),
+        )
+
+    def test_long_flag_follows_updates(self):
+        event = self.create("Meeting", at(1, 9), at(1, 10))
+        self.assertFalse(event.is_long)
+
+        event.end_time = at(5)
+        event.save(update_fields=["end_time"])
+        event.refresh_from_db()
+
+        self.assertTrue(event.is_long)
+        self.assertEqual(list(Event.objects.overlapping(at(4), at(4, 1))), [event])
+
+    def test_response_includes_times(self):
+        self.create("Meeting", at(1, 9), at(1, 10))
+
+        response = self.client.get("/events/")
+
+        self.assertEqual(response.data[0]["start_date"], "2025-03-01 11:00:00")
+        self.assertEqual(response.data[0]["end_date"], "2025-03-01 12:00:00")
+
+    def test_busy_blocks_are_merged_and_clipped(self):
+        self.create("A", at(10, 8), at(10, 10))
+        self.create("B", at(10, 9), at(10, 11))
+        self.create("C", at(10, 11), at(10, 12))
+        self.create("D", at(10, 14), at(10, 15))
+        self.create("E", at(10, 20), at(11, 2))
+
+        response = self.client.get(
+            "/events/busy/?from=2025-03-10T00:00:00Z&to=2025-03-11T00:00:00Z"
+        )
+
+        # Times are rendered in Europe/Helsinki
+        self.assertEqual(
+            response.data,
+            [
+                {
+                    "start_date": "2025-03-10 10:00:00",
+                    "end_date": "2025-03-10 14:00:00",
+                },
+                {
+                    "start_date": "2025-03-10 16:00:00",
+                    "end_date": "2025-03-10 17:00:00",
+                },
+                {
+                    "start_date": "2025-03-10 22:00:00",
+                    "end_date": "2025-03-11 02:00:00",
+                },
+            ],
+        )
+
+    @skipUnless(connection.vendor == "sqlite", "EXPLAIN QUERY PLAN is SQLite specific")
+    def test_window_query_is_an_index_range(self):
+        plan = (
+            Event.objects.filter(author=self.user).overlapping(at(10), at(11)).explain()
+        )
+
+        self.assertIn(
+            "event_author_start_idx (author_id=? AND start_time>? AND start_time<?)",
+            plan,
+        )
+
+    def test_export_matches_serializer(self):
+        self.create("Meeting", at(3, 10), at(3, 11))
+        self.create("Later", at(4, 9), at(4, 10))
+
+        response = self.client.get("/events/export/")
+        lines = b"".join(response.streaming_content).decode("utf-8").splitlines()
+
+        expected = EventSerializer(Event.objects.order_by("pk"), many=True).data
+        self.assertEqual([json.loads(line) for line in lines], expected)
+
+    def test_list_from_values_matches_serializer(self):
+        self.create("Meeting", at(3, 10), at(3, 11))
+        self.create("Later", at(4, 9), at(4, 10))
+
+        with override_settings(VALUES_LIST_RESPONSES=False):
+            expected = self.client.get("/events/").content
+        response_cache.get_cache().clear()
+
+        self.assertEqual(self.client.get("/events/").content, expected)
+
+
+class RecurrenceRuleTests(TestCase):
+    def test_invalid_rules(self):
+        for rule in [
+            "FREQ=HOURLY",
+            "FREQ=DAILY;INTERVAL=0",
+            "FREQ=DAILY;COUNT=2;UNTIL=20250101",
+            "FREQ=DAILY;BYDAY=MO",
+            "FREQ=WEEKLY;BYMONTH=1",
+        ]:
+            with self.subTest(rule=rule), self.assertRaises(ValueError):
+                RecurrenceRule.parse(rule)
+
+    def test_weekly_keeps_local_time_across_dst(self):
+        rule = RecurrenceRule.parse("FREQ=WEEKLY;BYDAY=MO,TH;COUNT=4")
+        # Monday 2025-03-24 09:00 in Helsinki, DST starts on the 30th
+        starts = list(rule.starts(at(24, 7)))
+
+        self.assertEqual(
+            [timezone_local(start) for start in starts],
+            [
+                "2025-03-24 09:00",
+                "2025-03-27 09:00",
+                "2025-03-31 09:00",
+                "2025-04-03 09:00",
+            ],
+        )
+
+    def test_skipping_ahead_keeps_count(self):
+        rule = RecurrenceRule.parse("FREQ=DAILY;INTERVAL=2;COUNT=500")
+        dtstart = at(1, 7)
+
+        skipped = rule.starts(dtstart, after=dtstart + timedelta(days=900))
+
+        self.assertEqual(list(skipped)[-1], list(rule.starts(dtstart))[-1])
+
+    def test_monthly_skips_short_months(self):
+        rule = RecurrenceRule.parse("FREQ=MONTHLY;COUNT=3")
+        starts = list(rule.starts(datetime(2025, 1, 31, 10, tzinfo=timezone.utc)))
+
+        self.assertEqual([start.month for start in starts], [1, 3, 5])
+
+
+class RecurringEventTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="tester", password="secret")
+        self.client = APIClient()
+        response_cache.get_cache().clear()
+        self.client.force_authenticate(self.user)
+
+        # Daily 10:00-11:00 UTC from March 1st
+        self.daily = Event.objects.create(
+            title="Walk",
+            start_time=at(1, 10),
+            end_time=at(1, 11),
+            author=self.user,
+            recurrence="FREQ=DAILY",
+        )
+
+    def window(self, start_day, end_day):
+        response = self.client.get(
+            f"/events/?from=2025-03-{start_day:02}T00:00:00Z"
+            f"&to=2025-03-{end_day:02}T00:00:00Z"
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_window_expands_occurrences(self):
+        single = Event.objects.create(
+            title="Dentist", start_time=at(11, 8), end_time=at(11, 9), author=self.user
+        )
+
+        data = self.window(10, 12)
+
+        self.assertEqual(
+            [(item["id"], item["start_date"]) for item in data],
+            [
+                (self.daily.pk, "2025-03-10 12:00:00"),
+                (single.pk, "2025-03-11 10:00:00"),
+                (self.daily.pk, "2025-03-11 12:00:00"),
+            ],
+        )
+        self.assertEqual(data[0]["original_start"], "2025-03-10 12:00:00")
+        self.assertEqual(Event.objects.count(), 2)
+
+    def test_window_with_fields(self):
+        url = "/events/?from=2025-03-10T00:00:00Z&to=2025-03-12T00:00:00Z"
+
+        # No deferred field is loaded afterwards
+        with self.assertNumQueries(4):
+            response = self.client.get(url + "&fields=title")
+
+        self.assertEqual(
+            response.data,
+            [
+                {"title": "Walk", "original_start": "2025-03-10 12:00:00"},
+                {"title": "Walk", "original_start": "2025-03-11 12:00:00"},
+            ],
+        )
+
+    def test_finished_series_is_not_expanded(self):
+        self.daily.recurrence = "FREQ=DAILY;COUNT=3"
+        self.daily.save()
+
+        self.assertEqual(self.window(10, 12), [])
+        self.assertEqual(len(self.window(1, 12)), 3)
+
+    def test_overrides_cancel_and_move_occurrences(self):
+        url = f"/events/{self.daily.pk}/occurrences/"
+        cancelled = self.client.post(
+            url, {"original_start": "2025-03-10T10:00:00Z", "cancelled": True}
+        )
+        moved = self.client.post(
+            url,
+            {
+                "original_start": "2025-03-09T10:00:00Z",
+                "title": "Late walk",
+                "start_date": "2025-03-10T18:00:00Z",
+                "end_date": "2025-03-10T19:00:00Z",
+            },
+        )
+
+        self.assertEqual(cancelled.status_code, 200)
+        self.assertEqual(moved.status_code, 200)
+        self.assertEqual(
+            [(item["title"], item["start_date"]) for item in self.window(10, 11)],
+            [("Late walk", "2025-03-10 20:00:00")],
+        )
+
+    def test_override_needs_an_occurrence(self):
+        response = self.client.post(
+            f"/events/{self.daily.pk}/occurrences/",
+            {"original_start": "2025-03-10T10:30:00Z", "cancelled": True},
+        )
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_busy_blocks_include_occurrences(self):
+        response = self.client.get(
+            "/events/busy/?from=2025-03-10T00:00:00Z&to=2025-03-12T00:00:00Z"
+        )
+
+        self.assertEqual(len(response.data), 2)
+
+    def test_override_changes_window_etag(self):
+        url = "/events/?from=2025-03-10T00:00:00Z&to=2025-03-11T00:00:00Z"
+        etag = self.client.get(url)["ETag"]
+
+        self.client.post(
+            f"/events/{self.daily.pk}/occurrences/",
+            {"original_start": "2025-03-10T10:00:00Z", "cancelled": True},
+        )
+        response = self.client.get(url, headers={"if-none-match": etag})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, [])
+
+
+class AsyncEventViewTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="tester", password="secret")
+        token = AccessToken.for_user(self.user)
+        self.client = APIClient(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+        self.daily = Event.objects.create(
+            title="Walk",
+            start_time=at(1, 10),
+            end_time=at(1, 11),
+            author=self.user,
+            recurrence="FREQ=DAILY",
+        )
+        self.daily.overrides.create(
+            original_start=at(3, 10), start_time=at(3, 15), end_time=at(3, 16)
+        )
+        Event.objects.create(
+            title="Trip", start_time=at(2, 8), end_time=at(6, 8), author=self.user
+        )
+
+    def assertSameResponse(self, path):
+        response_cache.get_cache().clear()
+        expected = self.client.get(f"/events/{path}")
+        response = self.client.get(f"/events/async/{path}")
+
+        self.assertEqual(response.status_code, expected.status_code)
+        self.assertEqual(response.content, expected.content)
+        self.assertEqual(response.get("ETag"), expected.get("ETag"))
+
+    def test_matches_sync_view(self):
+        for path in [
+            "",
+            f"?author={self.user.pk}",
+            "?from=2025-03-03T00:00:00Z&to=2025-03-05T00:00:00Z",
+            "?from=2025-03-07T00:00:00Z",
+            "?from=nonsense",
+            f"{self.daily.pk}/",
+            "999/",
+        ]:
+            with self.subTest(path=path):
+                self.assertSameResponse(path)
+
+
+class EventBulkTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="tester", password="secret")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        response_cache.get_cache().clear()
+
+    def test_bulk_create_sets_derived_fields(self):
+        response = self.client.post(
+            "/events/bulk/",
+            [
+                {
+                    "title": "Trip",
+                    "start_date": "2025-03-01T00:00:00Z",
+                    "end_date": "2025-03-05T00:00:00Z",
+                    "author": self.user.pk,
+                },
+                {
+                    "title": "Walk",
+                    "start_date": "2025-03-01T10:00:00Z",
+                    "end_date": "2025-03-01T11:00:00Z",
+                    "author": self.user.pk,
+                    "recurrence": "FREQ=DAILY;COUNT=3",
+                },
+            ],
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 201)
+        trip, walk = Event.objects.order_by("pk")
+        self.assertTrue(trip.is_long)
+        self.assertEqual(walk.recurrence_end, at(3, 11))
+
+    def test_reschedule_drops_overrides(self):
+        walk = Event.objects.create(
+            title="Walk",
+            start_time=at(1, 10),
+            end_time=at(1, 11),
+            author=self.user,
+            recurrence="FREQ=DAILY",
+        )
+        data = {"recurrence": "FREQ=DAILY;COUNT=2"}
+        # Single and bulk updates
+        for url, body in [
+            (f"/events/{walk.pk}/", data),
+            ("/events/bulk/", [{"id": walk.pk, **data}]),
+        ]:
+            with self.subTest(url=url):
+                walk.overrides.create(
+                    original_start=at(2, 10), start_time=at(2, 12), end_time=at(2, 13)
+                )
+                Event.objects.filter(pk=walk.pk).update(recurrence="FREQ=DAILY")
+
+                response = self.client.patch(url, body, format="json")
+
+                self.assertEqual(response.status_code, 200)
+                walk.refresh_from_db()
+                self.assertEqual(walk.recurrence_end, at(2, 11))
+                self.assertFalse(walk.overrides.exists())
@@ -1,7 +1,7 @@
 # urls.py
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import EventViewSet
+from .views import AsyncEventDetailView, AsyncEventListView, EventViewSet
 
 # Luo router
 router = DefaultRouter()
@@ -9,5 +9,8 @@ router.register(r"", EventViewSet, basename="event")
 
 # Rekisteröi router URL:iin
 urlpatterns = [
+    # Async versions of the read endpoints, for ASGI
+    path("async/", AsyncEventListView.as_view(), name="event-list-async"),
+    path("async/<int:pk>/", AsyncEventDetailView.as_view(), name="event-detail-async"),
     path("", include(router.urls)),
 ]
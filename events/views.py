@@ -1,13 +1,42 @@
 from rest_framework import viewsets
 from rest_framework import filters
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
-from .models import Event
+from django_filters.utils import translate_validation
+from drf_spectacular.utils import extend_schema, extend_schema_view
+from lifestyle_app_backend.asyncviews import AsyncAPIView
+from lifestyle_app_backend.bulk import BulkModelMixin
+from lifestyle_app_backend.cache import CachedResponseMixin
+from lifestyle_app_backend.conditional import ConditionalGetMixin
+from lifestyle_app_backend.export import ExportMixin
+from lifestyle_app_backend.representation import (
+    SPARSE_FIELDS_PARAMETERS,
+    SparseFieldsMixin,
+    ValuesListMixin,
+)
+from lifestyle_app_backend.routers import ReplicaReadMixin
+from .models import Event, EventOverride
 
-from .filters import EventFilter
-from .serializers import EventSerializer
+from .filters import AsyncEventFilter, EventFilter
+from .serializers import BusyBlockSerializer, EventOverrideSerializer, EventSerializer
 
 
-class EventViewSet(viewsets.ModelViewSet):
+@extend_schema_view(
+    list=extend_schema(parameters=SPARSE_FIELDS_PARAMETERS),
+    retrieve=extend_schema(parameters=SPARSE_FIELDS_PARAMETERS),
+)
+class EventViewSet(
+    ReplicaReadMixin,
+    SparseFieldsMixin,
+    BulkModelMixin,
+    ExportMixin,
+    CachedResponseMixin,
+    ValuesListMixin,
+    ConditionalGetMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Event.objects.all()
     serializer_class = EventSerializer
     filter_backends = (
@@ -16,3 +45,144 @@ class EventViewSet(viewsets.ModelViewSet):
     )
     filterset_class = EventFilter
     search_fields = ["title", "author"]
+    # Occurrences of recurring events are expanded from these
+    sparse_required_fields = ["start_time", "end_time", "recurrence"]
+    export_fields = {
+        "id": "id",
+        "title": "title",
+        "description": "description",
+        "start_date": "start_time",
+        "end_date": "end_time",
+        "author": "author",
+        "recurrence": "recurrence",
+    }
+
+    def get_window(self, request, queryset):
+        """
+        Return the validated from/to window of the request.
+        """
+        # The parameters were already validated by filter_queryset
+        filterset = self.filterset_class(request.query_params, queryset=queryset)
+        filterset.is_valid()
+        cleaned_data = filterset.form.cleaned_data
+        return cleaned_data.get("from"), cleaned_data.get("to")
+
+    def list_response(self, queryset):
+        window_start, window_end = self.get_window(self.request, queryset)
+
+        # Recurring events are only expanded within a bounded window
+        if window_start is None or window_end is None:
+            return super().list_response(queryset)
+
+        events = queryset.expand(window_start, window_end)
+        serializer = self.get_serializer(events, many=True)
+        return Response(serializer.data)
+
+    @extend_schema(
+        summary="Busy blocks",
+        description="Merges the filtered events into non-overlapping busy periods, "
+        "clipped to the from/to window.",
+        responses={200: BusyBlockSerializer(many=True)},
+    )
+    @action(detail=False, methods=["get"])
+    def busy(self, request):
+        queryset = self.filter_queryset(self.get_queryset())
+        window_start, window_end = self.get_window(request, queryset)
+
+        if window_start is not None and window_end is not None:
+            times = [
+                (event.start_time, event.end_time)
+                for event in queryset.expand(window_start, window_end)
+            ]
+        else:
+            times = queryset.order_by("start_time").values_list(
+                "start_time", "end_time"
+            )
+
+        blocks = []
+        for start_time, end_time in times:
+            if window_start is not None:
+                start_time = max(start_time, window_start)
+            if window_end is not None:
+                end_time = min(end_time, window_end)
+
+            # Events are sorted by start, so each one either extends the last
+            # block or starts a new one
+            if blocks and start_time <= blocks[-1]["end_date"]:
+                blocks[-1]["end_date"] = max(blocks[-1]["end_date"], end_time)
+            else:
+                blocks.append({"start_date": start_time, "end_date": end_time})
+
+        serializer = BusyBlockSerializer(blocks, many=True)
+        return Response(serializer.data)
+
+    @extend_schema(
+        summary="Change or cancel one occurrence",
+        description="Stores an override for the occurrence of a recurring event "
+        "that starts at original_start.",
+        request=EventOverrideSerializer,
+        responses={200: EventOverrideSerializer()},
+    )
+    @action(detail=True, methods=["post"])
+    def occurrences(self, request, pk=None):
+        event = self.get_object()
+        serializer = EventOverrideSerializer(
+            data=request.data, context={"event": event}
+        )
+        serializer.is_valid(raise_exception=True)
+
+        data = dict(serializer.validated_data)
+        override, _ = EventOverride.objects.update_or_create(
+            event=event, original_start=data.pop("original_start"), defaults=data
+        )
+        # The series' occurrences changed, so its validators have to as well
+        event.save(update_fields=["updated_at"])
+
+        return Response(
+            EventOverrideSerializer(override).data, status=status.HTTP_200_OK
+        )
+
+
+class AsyncEventListView(AsyncAPIView):
+    """
+    Async version of the event list, with the same filters and recurrence
+    expansion but without search.
+    """
+
+    async def get(self, request):
+        filterset = AsyncEventFilter(request.query_params, queryset=Event.objects.all())
+        if not filterset.is_valid():
+            return self.error_response(translate_validation(filterset.errors))
+
+        queryset = filterset.qs
+        window_start = filterset.form.cleaned_data.get("from")
+        window_end = filterset.form.cleaned_data.get("to")
+        if window_start is not None or window_end is not None:
+            queryset = await queryset.aoverlapping(window_start, window_end)
+
+        async def render():
+            # Recurring events are only expanded within a bounded window
+            if window_start is None or window_end is None:
+                data = await self.list_data(request, queryset, EventSerializer)
+            else:
+                events = await queryset.aexpand(window_start, window_end)
+                data = EventSerializer(events, many=True).data
+            return self.render(data)
+
+        return await self.conditional_response(request, queryset, render, many=True)
+
+
+class AsyncEventDetailView(AsyncAPIView):
+    async def get(self, request, pk):
+        queryset = Event.objects.filter(pk=pk)
+
+        async def render():
+            event = await queryset.afirst()
+            if event is None:
+                return self.render(
+                    {"detail": "No Event matches the given query."},
+                    status=status.HTTP_404_NOT_FOUND,
+                )
+            return self.render(EventSerializer(event).data)
+
+        return await self.conditional_response(request, queryset, render)
@@ -0,0 +1,35 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from jobs import queue
+
+
+class Command(BaseCommand):
+    help = "Run queued jobs, see jobs.queue. Keep at least one worker running."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once", action="store_true", help="Exit when no job is due."
+        )
+
+    def handle(self, *args, **options):
+        ran = 0
+        try:
+            while True:
+                job = queue.run_next()
+                if job is not None:
+                    ran += 1
+                    self.stdout.write(f"Job {job.pk} ({job.kind}): {job.status}")
+                elif options["once"]:
+                    break
+                else:
+                    time.sleep(settings.JOBS_POLL_INTERVAL)
+                    # Like the end of a request, for CONN_MAX_AGE
+                    close_old_connections()
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(f"Ran {ran} jobs."))
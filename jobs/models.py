@@ -0,0 +1,40 @@
+from django.contrib.auth.models import User
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """
+    Work for the run_jobs workers, see jobs.queue. `kind` names the handler
+    and `params` are its arguments.
+    """
+
+    QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+    kind = models.CharField(max_length=64)
+    params = models.JSONField(default=dict)
+    status = models.CharField(
+        max_length=16,
+        choices=[(status, status) for status in [QUEUED, RUNNING, DONE, FAILED]],
+        default=QUEUED,
+    )
+    # What the handler reported so far, and what it returned
+    progress = models.JSONField(default=dict)
+    result = models.JSONField(null=True)
+    error = models.TextField(blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    # Queued jobs wait until then, retries wait a little
+    run_after = models.DateTimeField(default=timezone.now)
+    # A running job whose worker stopped renewing this is run again
+    locked_until = models.DateTimeField(null=True)
+    created_by = models.ForeignKey(User, null=True, on_delete=models.SET_NULL)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True)
+    finished_at = models.DateTimeField(null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["status", "run_after"], name="job_status_run_after_idx"
+            ),
+        ]
@@ -0,0 +1,128 @@
+"""
+A job queue in the database, for work too slow for a request, such as
+deleting a user and all their rows. No broker is needed, the run_jobs
+command runs the jobs.
+
+Apps register a handler per kind of job in their tasks module:
+
+    @register("users.delete")
+    def delete_user(job):
+        ...
+
+A handler gets the Job, reads job.params, may report() its progress, and
+returns a JSON result. Handlers must be safe to run again. A job that raises
+is retried up to JOBS_MAX_ATTEMPTS runs in all. A job whose worker stopped
+is run again once its lease of JOBS_LEASE runs out, and report() renews the
+lease.
+
+Workers claim a job with a conditional update, so several workers can run
+at once, on SQLite too.
+"""
+
+import logging
+import traceback
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+handlers = {}
+
+
+def register(kind):
+    def decorator(handler):
+        handlers[kind] = handler
+        return handler
+
+    return decorator
+
+
+def enqueue(kind, params=None, created_by=None):
+    """
+    Queue a job, for the user with id `created_by` to follow.
+    """
+    if kind not in handlers:
+        raise LookupError(f"No handler for {kind} jobs.")
+    return Job.objects.create(kind=kind, params=params or {}, created_by_id=created_by)
+
+
+def runnable(now):
+    return Q(status=Job.QUEUED, run_after__lte=now) | Q(
+        status=Job.RUNNING, locked_until__lt=now
+    )
+
+
+def claim():
+    """
+    Return the next job to run, marked as running, or None.
+    """
+    now = timezone.now()
+    candidates = list(
+        Job.objects.filter(runnable(now))
+        .order_by("run_after", "pk")
+        .values_list("pk", flat=True)[:10]
+    )
+    for pk in candidates:
+        # Only one worker's update matches
+        claimed = Job.objects.filter(runnable(now), pk=pk).update(
+            status=Job.RUNNING,
+            attempts=F("attempts") + 1,
+            locked_until=now + settings.JOBS_LEASE,
+            started_at=now,
+        )
+        if claimed:
+            return Job.objects.get(pk=pk)
+    return None
+
+
+def report(job, **progress):
+    """
+    Save progress of a running job, and renew its lease.
+    """
+    job.progress.update(progress)
+    job.locked_until = timezone.now() + settings.JOBS_LEASE
+    job.save(update_fields=["progress", "locked_until"])
+
+
+def run(job):
+    try:
+        if job.kind not in handlers:
+            raise LookupError(f"No handler for {job.kind} jobs.")
+        result = handlers[job.kind](job)
+    except Exception:
+        logger.exception("Job %s (%s) failed", job.pk, job.kind)
+        job.error = traceback.format_exc()
+        if job.attempts < settings.JOBS_MAX_ATTEMPTS:
+            job.status = Job.QUEUED
+            job.run_after = timezone.now() + settings.JOBS_RETRY_DELAY * job.attempts
+        else:
+            job.status = Job.FAILED
+            job.finished_at = timezone.now()
+    else:
+        job.status, job.result, job.error = Job.DONE, result, ""
+        job.finished_at = timezone.now()
+
+    job.locked_until = None
+    job.save(
+        update_fields=[
+            "status",
+            "result",
+            "error",
+            "run_after",
+            "locked_until",
+            "finished_at",
+        ]
+    )
+    return job
+
+
+def run_next():
+    """
+    Run the next job, and return it, or None when no job is due.
+    """
+    job = claim()
+    return None if job is None else run(job)
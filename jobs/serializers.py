@@ -0,0 +1,20 @@
+from rest_framework import serializers
+
+from .models import Job
+
+
+class JobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Job
+        # The error stays in the database, it has a traceback
+        fields = [
+            "id",
+            "kind",
+            "status",
+            "progress",
+            "result",
+            "attempts",
+            "created_at",
+            "started_at",
+            "finished_at",
+        ]
@@ -0,0 +1,90 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from . import queue
+from .models import Job
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="tester", password="secret")
+        self.calls = []
+
+        def echo(job):
+            self.calls.append(job.pk)
+            if job.params.get("fail"):
+                raise ValueError("Failed")
+            queue.report(job, step=1)
+            return {"echo": job.params["value"]}
+
+        self.enterContext(mock.patch.dict(queue.handlers, {"test.echo": echo}))
+
+    def test_jobs_run_in_order(self):
+        first = queue.enqueue("test.echo", {"value": 1}, created_by=self.user.pk)
+        second = queue.enqueue("test.echo", {"value": 2})
+
+        call_command("run_jobs", once=True, stdout=StringIO())
+
+        self.assertEqual(self.calls, [first.pk, second.pk])
+        first.refresh_from_db()
+        self.assertEqual(first.status, Job.DONE)
+        self.assertEqual(first.result, {"echo": 1})
+        self.assertEqual(first.progress, {"step": 1})
+        self.assertIsNone(queue.run_next())
+
+    def test_failed_jobs_are_retried(self):
+        job = queue.enqueue("test.echo", {"fail": True})
+
+        for attempt in range(1, 4):
+            job.refresh_from_db()
+            self.assertEqual(job.status, Job.QUEUED)
+            Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+            with self.assertLogs("jobs.queue", "ERROR"):
+                queue.run_next()
+            # Not again before the retry delay
+            self.assertIsNone(queue.run_next())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 3)
+        self.assertIn("ValueError: Failed", job.error)
+
+    def test_jobs_of_stopped_workers_are_run_again(self):
+        job = queue.enqueue("test.echo", {"value": 1})
+        self.assertEqual(queue.claim(), job)
+        self.assertIsNone(queue.claim())
+
+        Job.objects.filter(pk=job.pk).update(
+            locked_until=timezone.now() - timedelta(seconds=1)
+        )
+        queue.run_next()
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.DONE, 2))
+
+    def test_unknown_kinds_are_refused(self):
+        with self.assertRaises(LookupError):
+            queue.enqueue("test.unknown")
+
+    def test_status_endpoint(self):
+        job = queue.enqueue("test.echo", {"value": 1}, created_by=self.user.pk)
+        other = User.objects.create_user(username="other", password="secret")
+        client = APIClient()
+
+        client.force_authenticate(other)
+        self.assertEqual(client.get(f"/jobs/{job.pk}/").status_code, 404)
+
+        client.force_authenticate(self.user)
+        self.assertEqual(client.get(f"/jobs/{job.pk}/").json()["status"], "queued")
+        queue.run_next()
+        response = client.get(f"/jobs/{job.pk}/")
+        self.assertEqual(response.json()["status"], "done")
+        self.assertEqual(response.json()["result"], {"echo": 1})
+        self.assertNotIn("error", response.json())
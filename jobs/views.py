@@ -0,0 +1,27 @@
+from drf_spectacular.utils import extend_schema
+from rest_framework import generics
+from rest_framework.permissions import IsAuthenticated
+
+from .models import Job
+from .serializers import JobSerializer
+
+
+class JobView(generics.RetrieveAPIView):
+    """
+    The status of a job the user started, to poll until it is done or
+    failed.
+    """
+
+    serializer_class = JobSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return Job.objects.filter(created_by=self.request.user.pk)
+
+    @extend_schema(
+        summary="Job status",
+        description="Returns the status of a background job, such as a user "
+        "deletion, with its progress and, once done, its result.",
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
@@ -0,0 +1,121 @@
+import django_filters
+from django import forms
+from django.http import HttpResponse
+from django.views import View
+from rest_framework import exceptions, status
+from rest_framework.request import Request
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from .authentication import StatelessJWTAuthentication, auser_status, check_status
+from .conditional import aconditional_response, make_validators, validator_aggregates
+from .renderers import FastJSONRenderer
+from .representation import ValuesRepresentation
+
+
+class AuthorFilter(django_filters.Filter):
+    """
+    Filters by author id without looking the author up, which a
+    ModelChoiceFilter does while validating.
+    """
+
+    field_class = forms.IntegerField
+
+
+async def authenticate(request):
+    """
+    Return the user of the request's JWT access token, with the same checks
+    and errors as StatelessJWTAuthentication, but looking the user's status up
+    through the async ORM. Checking the token itself needs no I/O.
+    """
+    authentication = StatelessJWTAuthentication()
+    header = authentication.get_header(request)
+    raw_token = authentication.get_raw_token(header) if header else None
+    if raw_token is None:
+        raise exceptions.NotAuthenticated()
+
+    token = authentication.get_validated_token(raw_token)
+    if jwt_settings.USER_ID_CLAIM not in token:
+        raise InvalidToken("Token contained no recognizable user identification")
+
+    user = jwt_settings.TOKEN_USER_CLASS(token)
+    check_status(await auser_status(user.id))
+    return user
+
+
+class AsyncAPIView(View):
+    """
+    Base for async, read-only JSON views. Under ASGI they wait for the
+    database on the event loop instead of holding a thread per request like
+    the DRF views.
+
+    Requests are authenticated like the DRF views, and responses are the same
+    JSON with the same validators, so clients can switch between the two.
+    """
+
+    http_method_names = ["get", "head", "options"]
+    renderer = FastJSONRenderer()
+    media_type = "application/json"
+
+    async def dispatch(self, request, *args, **kwargs):
+        request = Request(request)
+        # ETags include the media type, so they match the DRF views' ones
+        request.accepted_media_type = self.media_type
+
+        try:
+            request.user = await authenticate(request)
+        except exceptions.APIException as exc:
+            response = self.error_response(exc)
+            response["WWW-Authenticate"] = 'Bearer realm="api"'
+            return response
+
+        return await super().dispatch(request, *args, **kwargs)
+
+    def render(self, data, status=status.HTTP_200_OK):
+        return HttpResponse(
+            self.renderer.render(data), status=status, content_type=self.media_type
+        )
+
+    def error_response(self, exc):
+        detail = exc.detail
+        if not isinstance(detail, dict):
+            detail = {"detail": detail}
+        return self.render(detail, status=exc.status_code)
+
+    async def get_validators(self, request, queryset, last_modified_field="updated_at"):
+        aggregate = await queryset.order_by().aaggregate(
+            **validator_aggregates(last_modified_field)
+        )
+        return make_validators(request, aggregate)
+
+    async def conditional_response(self, request, queryset, render, many=False):
+        etag, last_modified = await self.get_validators(request, queryset)
+        # Like ConditionalGetMixin, lists only have an ETag
+        if many:
+            last_modified = None
+        return await aconditional_response(request, render, etag, last_modified)
+
+    async def list_data(self, request, queryset, serializer_class, paginator=None):
+        """
+        Serialize a list like ValuesListMixin does, from values() rows when
+        the serializer allows it, but through the async ORM.
+        """
+        representation = ValuesRepresentation.for_serializer(
+            serializer_class(), queryset
+        )
+        if representation is not None:
+            queryset = representation.values(queryset)
+
+        if paginator is not None:
+            items = await paginator.apaginate_queryset(queryset, request, view=self)
+        else:
+            items = [item async for item in queryset]
+
+        if representation is not None:
+            data = representation.many(items)
+        else:
+            data = serializer_class(items, many=True).data
+
+        if paginator is not None:
+            return paginator.get_paginated_response(data).data
+        return data
@@ -0,0 +1,93 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+# Cached statuses, a user that does not exist is cached too
+ACTIVE, INACTIVE, MISSING = "active", "inactive", "missing"
+
+
+def get_cache():
+    return caches[settings.AUTH_USER_CACHE_ALIAS]
+
+
+def status_key(user_id):
+    return f"auth:status:{user_id}"
+
+
+def get_status(is_active):
+    if is_active is None:
+        return MISSING
+    return ACTIVE if is_active else INACTIVE
+
+
+def user_status(user_id):
+    """
+    Return whether the user exists and is active, from the cache when it was
+    looked up in the last AUTH_USER_CACHE_TTL seconds.
+    """
+    key = status_key(user_id)
+    status = get_cache().get(key)
+    if status is None:
+        is_active = (
+            User.objects.filter(**{jwt_settings.USER_ID_FIELD: user_id})
+            .values_list("is_active", flat=True)
+            .first()
+        )
+        status = get_status(is_active)
+        get_cache().set(key, status, timeout=settings.AUTH_USER_CACHE_TTL)
+    return status
+
+
+async def auser_status(user_id):
+    key = status_key(user_id)
+    status = await get_cache().aget(key)
+    if status is None:
+        is_active = (
+            await User.objects.filter(**{jwt_settings.USER_ID_FIELD: user_id})
+            .values_list("is_active", flat=True)
+            .afirst()
+        )
+        status = get_status(is_active)
+        await get_cache().aset(key, status, timeout=settings.AUTH_USER_CACHE_TTL)
+    return status
+
+
+def check_status(status):
+    # The same errors as JWTAuthentication
+    if status == MISSING:
+        raise AuthenticationFailed("User not found", code="user_not_found")
+    if status == INACTIVE:
+        raise AuthenticationFailed("User is inactive", code="user_inactive")
+
+
+def forget_status(sender, instance, **kwargs):
+    # Deleted and deactivated users are rejected at once in this process,
+    # other processes notice within the TTL
+    get_cache().delete(status_key(getattr(instance, jwt_settings.USER_ID_FIELD)))
+
+
+class StatelessJWTAuthentication(JWTStatelessUserAuthentication):
+    """
+    Authenticates JWTs like JWTAuthentication, but request.user is a TokenUser
+    built from the token's claims instead of a User loaded for every request.
+    Only whether the user still exists and is active is checked, through a
+    short-lived cache.
+
+    Views that need the full user, to change the password or to check
+    is_staff for example, set authentication_classes to JWTAuthentication.
+    A TokenUser is never staff, the tokens have no such claim.
+    """
+
+    def get_user(self, validated_token):
+        user = super().get_user(validated_token)
+        check_status(user_status(user.id))
+        return user
+
+
+class StatelessJWTScheme(SimpleJWTScheme):
+    # The same bearer scheme in the API schema
+    target_class = StatelessJWTAuthentication
@@ -0,0 +1,215 @@
+from contextlib import contextmanager
+from copy import copy
+
+from django.db import transaction
+from django.dispatch import Signal
+from rest_framework import serializers, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from . import cache
+
+# Sent after a bulk create or update with the saved objects, and for updates
+# with copies of the objects from before, as bulk queries send no post_save
+bulk_saved = Signal()
+
+INVALID_ID = "A valid integer is required."
+
+
+def is_id(value):
+    """
+    Whether a value from the request is an integer id. Strings and floats
+    are refused, where to_python() would convert or truncate them.
+    """
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+class PrefetchedObjects:
+    """
+    Stands in for the queryset of a related field, answering get(pk=...)
+    from objects that were fetched in one query.
+    """
+
+    def __init__(self, queryset, pks):
+        self.model = queryset.model
+        self.objects = queryset.in_bulk(pks)
+
+    def get(self, pk):
+        # Reported as an incorrect type by the field
+        if not is_id(pk):
+            raise TypeError(pk)
+
+        try:
+            return self.objects[pk]
+        except KeyError:
+            raise self.model.DoesNotExist
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    """
+    List serializer that writes with one bulk query.
+
+    For updates `instance` is a dict of the objects to update by primary key,
+    and every item must carry its "id". Errors are reported per item, in the
+    order of the items.
+    """
+
+    def to_internal_value(self, data):
+        with self.prefetch_related_fields(data):
+            return super().to_internal_value(data)
+
+    @contextmanager
+    def prefetch_related_fields(self, data):
+        """
+        Look up the related objects of all items at once, instead of one
+        query per item and field.
+        """
+        fields = [
+            field
+            for field in self.child._writable_fields
+            if isinstance(field, serializers.PrimaryKeyRelatedField)
+            and field.pk_field is None
+        ]
+        items = [item for item in data if isinstance(item, dict)]
+        querysets = {field: field.queryset for field in fields}
+
+        try:
+            for field in fields:
+                pks = [
+                    item[field.field_name]
+                    for item in items
+                    if is_id(item.get(field.field_name))
+                ]
+                field.queryset = PrefetchedObjects(field.get_queryset(), pks)
+            yield
+        finally:
+            for field, queryset in querysets.items():
+                field.queryset = queryset
+
+    def run_child_validation(self, data):
+        if self.instance is None:
+            self.child.instance = None
+            return super().run_child_validation(data)
+
+        pk = data.get("id") if isinstance(data, dict) else None
+        if not is_id(pk):
+            raise serializers.ValidationError({"id": [INVALID_ID]})
+        if pk not in self.instance:
+            raise serializers.ValidationError({"id": ["Not found."]})
+
+        self.child.instance = self.instance[pk]
+        self.child.initial_data = data
+        return {**super().run_child_validation(data), "id": pk}
+
+    def create(self, validated_data):
+        model = self.child.Meta.model
+        objs = [model(**attrs) for attrs in validated_data]
+        for obj in objs:
+            self.prepare(obj)
+
+        return model.objects.bulk_create(objs)
+
+    def update(self, instance, validated_data):
+        model = self.child.Meta.model
+        fields = set(getattr(model, "derived_fields", ()))
+        objs = []
+
+        for attrs in validated_data:
+            obj = instance[attrs.pop("id")]
+            for name, value in attrs.items():
+                setattr(obj, name, value)
+            fields.update(attrs)
+            self.prepare(obj)
+            objs.append(obj)
+
+        # bulk_update skips pre_save, so auto_now fields are set here
+        for field in model._meta.concrete_fields:
+            if getattr(field, "auto_now", False):
+                for obj in objs:
+                    field.pre_save(obj, add=False)
+                fields.add(field.name)
+
+        model.objects.bulk_update(objs, fields)
+        return objs
+
+    def prepare(self, obj):
+        """
+        Fill in fields that save() would normally derive.
+        """
+        set_derived_fields = getattr(obj, "set_derived_fields", None)
+        if set_derived_fields is not None:
+            set_derived_fields()
+
+
+class BulkModelMixin:
+    """
+    Adds /bulk/ to a model viewset: POST a list of objects to create them,
+    PATCH a list of partial objects with their "id" to update them, and
+    DELETE {"ids": [...]} to delete. Each request is one transaction.
+    """
+
+    bulk_max_items = 100
+
+    @action(detail=False, methods=["post", "patch", "delete"])
+    def bulk(self, request):
+        if request.method == "DELETE":
+            return self.bulk_destroy(request)
+
+        instance = {} if request.method == "PATCH" else None
+        if request.method == "PATCH" and isinstance(request.data, list):
+            items = request.data[: self.bulk_max_items + 1]
+            ids = [item.get("id") for item in items if isinstance(item, dict)]
+            instance = self.get_queryset().in_bulk([pk for pk in ids if is_id(pk)])
+
+        serializer = self.get_serializer(
+            instance,
+            data=request.data,
+            many=True,
+            partial=instance is not None,
+            max_length=self.bulk_max_items,
+        )
+        serializer.is_valid(raise_exception=True)
+        previous = [copy(obj) for obj in instance.values()] if instance else []
+
+        with transaction.atomic():
+            objs = serializer.save()
+
+        self.invalidate(objs, previous)
+        bulk_saved.send(sender=self.get_queryset().model, objs=objs, previous=previous)
+        if request.method == "PATCH":
+            return Response(serializer.data, status=status.HTTP_200_OK)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def bulk_destroy(self, request):
+        ids = request.data.get("ids") if isinstance(request.data, dict) else None
+        if not isinstance(ids, list) or len(ids) > self.bulk_max_items:
+            return Response(
+                {"ids": [f"Expected a list of at most {self.bulk_max_items} ids."]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # Errors by index, like a ListField's
+        errors = {index: [INVALID_ID] for index, pk in enumerate(ids) if not is_id(pk)}
+        if errors:
+            return Response({"ids": errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = self.get_queryset().filter(pk__in=ids)
+        with transaction.atomic():
+            found = set(queryset.values_list("pk", flat=True))
+            queryset.delete()
+
+        return Response(
+            {
+                "deleted": sorted(found),
+                "not_found": [pk for pk in ids if pk not in found],
+            }
+        )
+
+    def invalidate(self, objs, previous=()):
+        # bulk_create and bulk_update send no post_save signals. Objects that
+        # changed author leave the lists of their previous author.
+        cache.invalidate(
+            self.get_queryset().model,
+            author_ids=[obj.author_id for obj in [*objs, *previous]],
+            pks=[obj.pk for obj in objs],
+        )
@@ -0,0 +1,218 @@
+from datetime import datetime, timezone
+from hashlib import md5
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.http import HttpResponse
+from django.utils.http import parse_http_date_safe
+
+from .conditional import conditional_response
+
+STATS_KEYS = {"hits": "stats:hits", "misses": "stats:misses"}
+
+
+def get_cache():
+    return caches[settings.RESPONSE_CACHE_ALIAS]
+
+
+def version_key(model, scope):
+    return f"version:{model._meta.label_lower}:{scope}"
+
+
+def get_versions(model, scopes):
+    """
+    Return the current version token of every scope.
+
+    Versions are random tokens rather than counters, so an evicted version
+    is replaced by a new token instead of restarting at a number that older
+    cache entries may still use.
+    """
+    cache = get_cache()
+    keys = [version_key(model, scope) for scope in scopes]
+    versions = cache.get_many(keys)
+
+    missing = {key: uuid4().hex for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        versions.update(missing)
+
+    return [versions[key] for key in keys]
+
+
+def invalidate(model, author_ids=(), pks=()):
+    """
+    Expire cached responses for the given authors and objects of a model.
+    Every list that is not filtered by author is expired too.
+    """
+    scopes = ["all"]
+    scopes += [f"author:{author_id}" for author_id in set(author_ids)]
+    scopes += [f"pk:{pk}" for pk in set(pks)]
+
+    get_cache().set_many(
+        {version_key(model, scope): uuid4().hex for scope in scopes}, timeout=None
+    )
+
+
+def remember_author(sender, instance, **kwargs):
+    # The previous author's lists lose the object when it changes author
+    if instance._state.adding or instance.pk is None:
+        return
+    # Models that keep their saved values need no query
+    saved_values = getattr(instance, "saved_values", lambda: None)()
+    if saved_values is not None:
+        instance._previous_author_id = saved_values["author_id"]
+    else:
+        instance._previous_author_id = (
+            sender.objects.filter(pk=instance.pk)
+            .values_list("author_id", flat=True)
+            .first()
+        )
+
+
+def invalidate_instance(sender, instance, **kwargs):
+    author_ids = [instance.author_id]
+    previous = instance.__dict__.pop("_previous_author_id", None)
+    if previous is not None:
+        author_ids.append(previous)
+    invalidate(sender, author_ids=author_ids, pks=[instance.pk])
+
+
+def register(model):
+    """
+    Expire cached responses whenever an instance of the model is written.
+    """
+    pre_save.connect(remember_author, sender=model, weak=False)
+    post_save.connect(invalidate_instance, sender=model, weak=False)
+    post_delete.connect(invalidate_instance, sender=model, weak=False)
+
+
+def count(stat):
+    cache = get_cache()
+    try:
+        cache.incr(STATS_KEYS[stat])
+    except ValueError:
+        cache.set(STATS_KEYS[stat], 1, timeout=None)
+
+
+def get_stats():
+    values = get_cache().get_many(STATS_KEYS.values())
+    return {stat: values.get(key, 0) for stat, key in STATS_KEYS.items()}
+
+
+class CachedResponseMixin:
+    """
+    Per-user cache of rendered JSON responses for list and retrieve.
+
+    Keys are made of the user, the normalized query parameters (filters,
+    ordering, search and page cursor) and version tokens that writes replace
+    through `invalidate`. Lists filtered by one author only expire when that
+    author's objects change. A retrieve expires when its object or any of
+    the user's objects change, so writes to many objects of an author only
+    expire the author. Only the user's own objects are cached, the author is
+    not known before the object is read.
+    The size is bounded by the cache's MAX_ENTRIES.
+    """
+
+    def list(self, request, *args, **kwargs):
+        authors = request.query_params.getlist("author")
+        scope = f"author:{authors[0]}" if len(authors) == 1 else "all"
+
+        return self.cached_response(
+            request,
+            [scope],
+            lambda: super(CachedResponseMixin, self).list(request, *args, **kwargs),
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        scopes = [f"pk:{kwargs[lookup_url_kwarg]}", f"author:{request.user.pk}"]
+
+        return self.cached_response(
+            request,
+            scopes,
+            lambda: super(CachedResponseMixin, self).retrieve(request, *args, **kwargs),
+        )
+
+    def get_object(self):
+        obj = super().get_object()
+        self.object_author_id = getattr(obj, "author_id", None)
+        return obj
+
+    def is_cacheable(self, request, response):
+        if response.status_code != 200:
+            return False
+        # Other authors' writes do not expire the user's retrieves
+        return self.action != "retrieve" or (
+            getattr(self, "object_author_id", None) == request.user.pk
+        )
+
+    def get_cache_key(self, request, scopes):
+        model = self.get_queryset().model
+        versions = get_versions(model, scopes)
+        params = sorted(
+            (name, sorted(values)) for name, values in request.query_params.lists()
+        )
+        digest = md5(repr(params).encode("utf-8"), usedforsecurity=False).hexdigest()
+        return ":".join(
+            [
+                "response",
+                model._meta.label_lower,
+                self.action,
+                *scopes,
+                *versions,
+                str(request.user.pk),
+                digest,
+            ]
+        )
+
+    def cached_response(self, request, scopes, render):
+        # The browsable API embeds per-request state, only JSON is cached
+        if request.accepted_renderer.format != "json":
+            return render()
+
+        cache = get_cache()
+        # The version is read before the queryset, so a write that lands in
+        # between stores the response under an already expired key
+        key = self.get_cache_key(request, scopes)
+        cached = cache.get(key)
+
+        if cached is not None:
+            count("hits")
+
+            def render_cached():
+                response = HttpResponse(
+                    cached["content"], content_type=cached["content_type"]
+                )
+                response["X-Cache"] = "HIT"
+                return response
+
+            last_modified = parse_http_date_safe(cached["last_modified"] or "")
+            if last_modified is not None:
+                last_modified = datetime.fromtimestamp(last_modified, tz=timezone.utc)
+
+            return conditional_response(
+                request, render_cached, cached["etag"], last_modified
+            )
+
+        count("misses")
+        response = render()
+        response["X-Cache"] = "MISS"
+
+        if self.is_cacheable(request, response):
+
+            def store(rendered):
+                cache.set(
+                    key,
+                    {
+                        "content": rendered.content,
+                        "content_type": rendered["Content-Type"],
+                        "etag": rendered.get("ETag"),
+                        "last_modified": rendered.get("Last-Modified"),
+                    },
+                )
+
+            response.add_post_render_callback(store)
+
+        return response
@@ -0,0 +1,285 @@
+"""
+Response compression.
+
+Responses are compressed with the encoding in COMPRESSION_ENCODINGS that
+the client accepts, the first one on ties. Brotli and zstd are used when
+brotli and zstandard are installed, gzip always.
+
+- Responses under COMPRESSION_MIN_SIZE bytes are sent as they are, the
+  encoding would save little.
+- Streaming responses, such as exports, are compressed chunk by chunk and
+  each chunk is flushed, so the client still gets rows as they are read.
+- Responses that set cookies are not compressed. Those carry tokens, which
+  compression would let an attacker guess from the size (BREACH).
+- A strong ETag gets the encoding as a suffix, so each encoding has its own
+  validator. The suffix is removed from If-None-Match before the view
+  compares it.
+- Views mark payloads that are the same for many requests, such as the API
+  schema, with `compression_cacheable`. Their compressed form is cached by
+  content, so they are compressed once.
+"""
+
+import gzip
+import re
+import zlib
+from hashlib import md5
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Besides text/*. Images and archives are compressed already.
+COMPRESSIBLE_TYPES = {
+    "application/json",
+    "application/javascript",
+    "application/x-ndjson",
+    "application/xml",
+    "application/yaml",
+    "application/vnd.oai.openapi",
+    "application/vnd.oai.openapi+json",
+}
+
+accept_encoding_re = re.compile(r"^\s*([^\s;]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?")
+
+
+class Gzip:
+    name = "gzip"
+    level = 6
+
+    def compress(self, data):
+        # No timestamp, so the same content compresses to the same bytes
+        return gzip.compress(data, compresslevel=self.level, mtime=0)
+
+    def compressor(self):
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+        def feed(data):
+            return compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+        return feed, compressor.flush
+
+
+class Brotli:
+    name = "br"
+    # Close to gzip's speed, and smaller
+    level = 5
+
+    def compress(self, data):
+        return brotli.compress(data, quality=self.level)
+
+    def compressor(self):
+        compressor = brotli.Compressor(quality=self.level)
+
+        def feed(data):
+            return compressor.process(data) + compressor.flush()
+
+        return feed, compressor.finish
+
+
+class Zstd:
+    name = "zstd"
+    level = 3
+
+    def compress(self, data):
+        return zstandard.ZstdCompressor(level=self.level).compress(data)
+
+    def compressor(self):
+        compressor = zstandard.ZstdCompressor(level=self.level).compressobj()
+
+        def feed(data):
+            return compressor.compress(data) + compressor.flush(
+                zstandard.COMPRESSOBJ_FLUSH_BLOCK
+            )
+
+        return feed, compressor.flush
+
+
+def available_encodings():
+    encodings = {"gzip": Gzip()}
+    if brotli is not None:
+        encodings["br"] = Brotli()
+    if zstandard is not None:
+        encodings["zstd"] = Zstd()
+    return [
+        encodings[name] for name in settings.COMPRESSION_ENCODINGS if name in encodings
+    ]
+
+
+def accepted_encodings(header):
+    """
+    Return the quality of each encoding in an Accept-Encoding header.
+    """
+    accepted = {}
+    for part in header.split(","):
+        match = accept_encoding_re.match(part)
+        if match is None:
+            continue
+        try:
+            quality = float(match[2]) if match[2] else 1.0
+        except ValueError:
+            continue
+        accepted[match[1].lower()] = quality
+    return accepted
+
+
+def negotiate(header, encodings):
+    """
+    Return the encoding to use for an Accept-Encoding header, or None.
+    """
+    accepted = accepted_encodings(header)
+    best, best_quality = None, 0
+    for encoding in encodings:
+        quality = accepted.get(encoding.name, accepted.get("*", 0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def is_compressible(response):
+    content_type = response.get("Content-Type", "").split(";")[0].strip().lower()
+    return content_type.startswith("text/") or content_type in COMPRESSIBLE_TYPES
+
+
+def stream(chunks, encoding):
+    feed, finish = encoding.compressor()
+    for chunk in chunks:
+        data = feed(chunk)
+        if data:
+            yield data
+    yield finish()
+
+
+async def astream(chunks, encoding):
+    feed, finish = encoding.compressor()
+    async for chunk in chunks:
+        data = feed(chunk)
+        if data:
+            yield data
+    yield finish()
+
+
+def get_cache():
+    return caches[settings.COMPRESSION_CACHE_ALIAS]
+
+
+def compress_cached(content, encoding):
+    """
+    Compress content, or return its compressed form from the cache.
+    """
+    cache = get_cache()
+    digest = md5(content, usedforsecurity=False).hexdigest()
+    key = f"compressed:{encoding.name}:{digest}"
+    compressed = cache.get(key)
+    if compressed is None:
+        compressed = encoding.compress(content)
+        cache.set(key, compressed, timeout=None)
+    return compressed
+
+
+def with_suffix(etag, encoding):
+    # Weak ETags only promise equivalent content, which holds either way
+    if etag.startswith("W/") or not etag.endswith('"'):
+        return etag
+    return f'{etag[:-1]}-{encoding.name}"'
+
+
+class CompressionMiddleware:
+    """
+    Compresses responses with gzip, brotli or zstd, see the module
+    docstring.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.encodings = available_encodings()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        encoding, revalidating = self.process_request(request)
+        response = self.get_response(request)
+        return self.process_response(response, encoding, revalidating)
+
+    async def __acall__(self, request):
+        encoding, revalidating = self.process_request(request)
+        response = await self.get_response(request)
+        return self.process_response(response, encoding, revalidating)
+
+    def process_request(self, request):
+        """
+        Return the encoding for the response, and whether the client asked
+        whether its compressed copy is still fresh.
+        """
+        header = request.META.get("HTTP_ACCEPT_ENCODING", "")
+        encoding = negotiate(header, self.encodings)
+        if_none_match = request.META.get("HTTP_IF_NONE_MATCH", "")
+        suffix = f'-{encoding.name}"' if encoding is not None else None
+        if suffix is None or suffix not in if_none_match:
+            return encoding, False
+
+        # The view compares the ETags it sends without compression
+        request.META["HTTP_IF_NONE_MATCH"] = if_none_match.replace(suffix, '"')
+        return encoding, True
+
+    def process_response(self, response, encoding, revalidating):
+        if response.status_code == 304:
+            # Has no content type, but the Vary of the response it stands for
+            patch_vary_headers(response, ["Accept-Encoding"])
+            if revalidating and response.has_header("ETag"):
+                response["ETag"] = with_suffix(response["ETag"], encoding)
+            return response
+
+        if not is_compressible(response):
+            return response
+        patch_vary_headers(response, ["Accept-Encoding"])
+
+        if (
+            encoding is None
+            or response.has_header("Content-Encoding")
+            or response.cookies
+        ):
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = astream(
+                    response.streaming_content, encoding
+                )
+            else:
+                response.streaming_content = stream(
+                    response.streaming_content, encoding
+                )
+            del response["Content-Length"]
+        else:
+            if len(response.content) < settings.COMPRESSION_MIN_SIZE:
+                return response
+            if getattr(response, "compression_cacheable", False):
+                compressed = compress_cached(response.content, encoding)
+            else:
+                compressed = encoding.compress(response.content)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response["Content-Length"] = str(len(compressed))
+
+        if response.has_header("ETag"):
+            response["ETag"] = with_suffix(response["ETag"], encoding)
+        response["Content-Encoding"] = encoding.name
+        return response
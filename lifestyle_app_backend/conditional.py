@@ -0,0 +1,127 @@
+from hashlib import md5
+
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+
+def make_etag(request, *parts):
+    """
+    Return a quoted ETag for the given validator parts.
+
+    The user and the negotiated media type are always included, so responses
+    for different users or renderers never share a validator.
+    """
+    user_id = getattr(request.user, "pk", None)
+    media_type = getattr(request, "accepted_media_type", "")
+    value = ":".join(str(part) for part in (user_id, media_type, *parts))
+    return quote_etag(md5(value.encode("utf-8"), usedforsecurity=False).hexdigest())
+
+
+def conditional_response(request, render, etag=None, last_modified=None):
+    """
+    Answer a conditional request with 304 Not Modified, or call `render` to
+    build the full response. Either way the validators are set on it.
+    """
+    response = not_modified_response(request, etag, last_modified)
+    if response is None:
+        response = render()
+
+    return set_validators(response, etag, last_modified)
+
+
+async def aconditional_response(request, render, etag=None, last_modified=None):
+    """
+    conditional_response for async views, where `render` is a coroutine
+    function.
+    """
+    response = not_modified_response(request, etag, last_modified)
+    if response is None:
+        response = await render()
+
+    return set_validators(response, etag, last_modified)
+
+
+def not_modified_response(request, etag, last_modified):
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    return get_conditional_response(
+        request._request, etag=etag, last_modified=timestamp
+    )
+
+
+def set_validators(response, etag, last_modified):
+    if response.status_code in (200, 304):
+        if etag is not None:
+            response["ETag"] = etag
+        if last_modified is not None:
+            response["Last-Modified"] = http_date(int(last_modified.timestamp()))
+
+    return response
+
+
+def validator_aggregates(last_modified_field):
+    return {"last_modified": Max(last_modified_field), "count": Count("pk")}
+
+
+def make_validators(request, aggregate):
+    """
+    Return the ETag and Last-Modified of a queryset from its aggregates.
+    """
+    last_modified = aggregate["last_modified"]
+    modified = last_modified.isoformat() if last_modified else ""
+
+    etag = make_etag(request, modified, aggregate["count"])
+    return etag, last_modified
+
+
+class ConditionalGetMixin:
+    """
+    Conditional GET for the list and retrieve actions of a model viewset.
+
+    The validator is the latest `updated_at` plus the row count of the
+    filtered queryset, so a 304 costs one aggregate query and nothing is
+    serialized. The row count makes deletions change the ETag. Lists have no
+    Last-Modified, deletions don't change it.
+    """
+
+    last_modified_field = "updated_at"
+
+    def get_validators(self, request, queryset):
+        aggregate = queryset.order_by().aggregate(
+            **validator_aggregates(self.last_modified_field)
+        )
+        return make_validators(request, aggregate)
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        # No Last-Modified, it stays the same when a row is deleted or stops
+        # matching the filters
+        etag, _ = self.get_validators(request, queryset)
+
+        return conditional_response(request, lambda: self.list_response(queryset), etag)
+
+    def list_response(self, queryset):
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(serializer.data)
+
+    def retrieve(self, request, *args, **kwargs):
+        def render():
+            return super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs)
+
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_queryset())
+        try:
+            queryset = queryset.filter(**{self.lookup_field: kwargs[lookup_url_kwarg]})
+            etag, last_modified = self.get_validators(request, queryset)
+        except (TypeError, ValueError, ValidationError):
+            # Malformed lookups are left to get_object, which answers 404
+            return render()
+
+        return conditional_response(request, render, etag, last_modified)
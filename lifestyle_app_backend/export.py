@@ -0,0 +1,110 @@
+import csv
+import json
+from datetime import datetime
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema
+from rest_framework.decorators import action
+from rest_framework.renderers import BaseRenderer
+
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class NDJSONRenderer(BaseRenderer):
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # Only errors are rendered, exports are streamed by the view
+        return json.dumps(data).encode("utf-8") + b"\n"
+
+
+class CSVRenderer(NDJSONRenderer):
+    media_type = "text/csv"
+    format = "csv"
+
+
+class Echo:
+    """
+    File-like object for csv.writer that hands back what is written.
+    """
+
+    def write(self, value):
+        return value
+
+
+class ExportMixin:
+    """
+    Adds /export/ to a viewset, streaming the user's own objects as NDJSON
+    (the default) or CSV, picked with ?format= or the Accept header.
+
+    Rows are built from `.values()` and read in chunks, so memory use does
+    not grow with the number of rows. `export_fields` maps column names to
+    model fields.
+    """
+
+    export_fields = {}
+    export_chunk_size = 2000
+
+    @extend_schema(
+        summary="Export",
+        description="Streams all of the user's objects as NDJSON or CSV.",
+        responses={
+            (200, "application/x-ndjson"): OpenApiTypes.STR,
+            (200, "text/csv"): OpenApiTypes.STR,
+        },
+    )
+    @action(
+        detail=False,
+        methods=["get"],
+        renderer_classes=[NDJSONRenderer, CSVRenderer],
+        filter_backends=[],
+        pagination_class=None,
+    )
+    def export(self, request):
+        model = self.get_queryset().model
+        rows = self.get_export_rows(request)
+
+        if request.accepted_renderer.format == "csv":
+            content = self.stream_csv(rows)
+        else:
+            content = self.stream_ndjson(rows)
+
+        response = StreamingHttpResponse(
+            content, content_type=request.accepted_renderer.media_type
+        )
+        filename = (
+            f"{model._meta.verbose_name_plural}.{request.accepted_renderer.format}"
+        )
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+    def get_export_rows(self, request):
+        queryset = (
+            self.get_queryset()
+            .filter(author=request.user.pk)
+            .order_by("pk")
+            .values_list(*self.export_fields.values())
+        )
+        names = list(self.export_fields)
+
+        for values in queryset.iterator(chunk_size=self.export_chunk_size):
+            yield dict(zip(names, map(self.format_value, values)))
+
+    def format_value(self, value):
+        # Same format as the serializers use
+        if isinstance(value, datetime):
+            return timezone.localtime(value).strftime(DATETIME_FORMAT)
+        return value
+
+    def stream_ndjson(self, rows):
+        for row in rows:
+            yield json.dumps(row) + "\n"
+
+    def stream_csv(self, rows):
+        writer = csv.writer(Echo())
+        yield writer.writerow(self.export_fields)
+        for row in rows:
+            yield writer.writerow(row.values())
@@ -0,0 +1,183 @@
+import logging
+import random
+from collections import Counter
+from contextlib import ExitStack
+from contextvars import ContextVar
+from functools import wraps
+from time import perf_counter
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from rest_framework import serializers
+
+logger = logging.getLogger(__name__)
+
+current_metrics = ContextVar("current_metrics", default=None)
+
+
+class RequestMetrics:
+    """
+    Query count and timings of one request, in seconds.
+
+    Serializer time includes the queries that serializing triggers, such as
+    evaluating a lazy queryset.
+    """
+
+    def __init__(self, debug=False):
+        self.queries = 0
+        self.timings = {"db": 0.0, "serialize": 0.0, "render": 0.0, "total": 0.0}
+        self.statements = Counter() if debug else None
+        self.serializing = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        # Installed as an execute wrapper on every database connection
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.timings["db"] += perf_counter() - start
+            self.queries += 1
+            if self.statements is not None:
+                self.statements[sql] += 1
+
+    def duplicates(self, threshold):
+        """
+        Statements that ran at least `threshold` times, most frequent first.
+        Parameters are left out, so these are usually N+1 patterns.
+        """
+        if self.statements is None:
+            return []
+        return [
+            (sql, count)
+            for sql, count in self.statements.most_common()
+            if count >= threshold
+        ]
+
+    def server_timing(self):
+        metrics = [
+            f'db;dur={self.timings["db"] * 1000:.1f};desc="{self.queries} queries"'
+        ]
+        metrics += [
+            f"{name};dur={self.timings[name] * 1000:.1f}"
+            for name in ["serialize", "render", "total"]
+        ]
+        return ", ".join(metrics)
+
+
+def timed_serialization(to_representation):
+    @wraps(to_representation)
+    def wrapper(self, instance):
+        metrics = current_metrics.get()
+        # Nested serializers are part of the outermost one's time
+        if metrics is None or metrics.serializing:
+            return to_representation(self, instance)
+
+        metrics.serializing += 1
+        start = perf_counter()
+        try:
+            return to_representation(self, instance)
+        finally:
+            metrics.timings["serialize"] += perf_counter() - start
+            metrics.serializing -= 1
+
+    wrapper.timed = True
+    return wrapper
+
+
+def instrument_serializers():
+    for serializer_class in [serializers.Serializer, serializers.ListSerializer]:
+        if not getattr(serializer_class.to_representation, "timed", False):
+            serializer_class.to_representation = timed_serialization(
+                serializer_class.to_representation
+            )
+
+
+def view_name(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return None
+
+    view = getattr(match.func, "cls", match.func)
+    return f"{view.__module__}.{view.__qualname__} ({match.view_name})"
+
+
+class InstrumentationMiddleware:
+    """
+    Measures the query count, database, serializer and render time of a
+    sample of requests. They are sent back in a Server-Timing header and
+    logged as one line per request.
+
+    With INSTRUMENTATION_DEBUG, statements that repeat within a request are
+    logged as warnings along with the view that ran them. The middleware is
+    left out entirely when INSTRUMENTATION_SAMPLE_RATE is 0.
+    """
+
+    def __init__(self, get_response):
+        self.sample_rate = settings.INSTRUMENTATION_SAMPLE_RATE
+        if not self.sample_rate:
+            raise MiddlewareNotUsed
+
+        self.debug = settings.INSTRUMENTATION_DEBUG
+        self.duplicate_threshold = settings.INSTRUMENTATION_DUPLICATE_THRESHOLD
+        self.get_response = get_response
+        instrument_serializers()
+
+    def __call__(self, request):
+        if random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        metrics = RequestMetrics(debug=self.debug)
+        token = current_metrics.set(metrics)
+        start = perf_counter()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(metrics))
+                response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        metrics.timings["total"] = perf_counter() - start
+
+        response["Server-Timing"] = metrics.server_timing()
+        self.log(request, response, metrics)
+        return response
+
+    def process_template_response(self, request, response):
+        metrics = current_metrics.get()
+        if metrics is not None:
+            start = perf_counter()
+
+            def rendered(response):
+                metrics.timings["render"] += perf_counter() - start
+
+            response.add_post_render_callback(rendered)
+
+        return response
+
+    def log(self, request, response, metrics):
+        view = view_name(request)
+        fields = {
+            "method": request.method,
+            "path": request.path,
+            "view": view,
+            "status": response.status_code,
+            "queries": metrics.queries,
+            **{
+                f"{name}_ms": round(duration * 1000, 1)
+                for name, duration in metrics.timings.items()
+            },
+        }
+        logger.info(
+            " ".join(f"{name}={value}" for name, value in fields.items()),
+            extra={"metrics": fields},
+        )
+
+        for sql, count in metrics.duplicates(self.duplicate_threshold):
+            logger.warning(
+                "Possible N+1 in %s: ran %d times: %s",
+                view,
+                count,
+                sql,
+                extra={"metrics": {**fields, "sql": sql, "count": count}},
+            )
@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import translation
+from drf_spectacular.settings import spectacular_settings
+
+from lifestyle_app_backend import schema
+
+
+class Command(BaseCommand):
+    help = (
+        "Build the OpenAPI schema of this code version into SCHEMA_CACHE_DIR, "
+        "so no request has to. Run on deploy."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--api-version", help="API version to build for.")
+
+    def handle(self, *args, **options):
+        version = options["api_version"]
+
+        def generate():
+            generator = spectacular_settings.DEFAULT_GENERATOR_CLASS(
+                api_version=version
+            )
+            return generator.get_schema(request=None, public=True)
+
+        # Requests get the schema in the default language
+        with translation.override(settings.LANGUAGE_CODE):
+            name = schema.schema_name(version)
+            schema.write(name, generate())
+
+        path = schema.cache_path(name)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {path}."))
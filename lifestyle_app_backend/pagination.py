@@ -0,0 +1,212 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import date, datetime, time
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination that seeks on the full composite ordering.
+
+    DRF's CursorPagination only seeks on the first ordering field and falls
+    back to an OFFSET for ties. Here the cursor stores the value of every
+    ordering field (plus the primary key as a tiebreaker), so every page is a
+    single index range scan no matter how deep it is.
+
+    Lists of the views that use it are pages, {"next", "previous", "results"}
+    with up to page_size rows, instead of an array of every row. Clients
+    follow "next" for the rest.
+    """
+
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
+    ordering = ("-pk",)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page_queryset = self.get_page_queryset(queryset, request, view)
+        if page_queryset is None:
+            return None
+
+        return self.set_page(list(page_queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        page_queryset = self.get_page_queryset(queryset, request, view)
+        if page_queryset is None:
+            return None
+
+        return self.set_page([row async for row in page_queryset])
+
+    def get_page_queryset(self, queryset, request, view=None):
+        """
+        Return the queryset of the requested page, plus one row to find out
+        if there is a following page.
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.model = queryset.model
+        self.annotations = queryset.query.annotations
+
+        self.cursor = self.decode_cursor(request)
+        self.reverse = self.cursor is not None and self.cursor["reverse"]
+
+        if queryset._fields is not None:
+            # Rows from values() need the ordering fields for the cursors
+            fields = [self._field_name(order) for order in self.ordering]
+            missing = [field for field in fields if field not in queryset._fields]
+            queryset = queryset.values(*queryset._fields, *missing)
+
+        if self.cursor is not None:
+            queryset = queryset.filter(self.get_seek_filter(self.cursor))
+
+        ordering = self._invert(self.ordering) if self.reverse else self.ordering
+        return queryset.order_by(*ordering)[: self.page_size + 1]
+
+    def set_page(self, results):
+        has_more = len(results) > self.page_size
+        self.page = results[: self.page_size]
+
+        if self.reverse:
+            self.page.reverse()
+            self.has_previous = has_more
+            self.has_next = True
+        else:
+            self.has_next = has_more
+            self.has_previous = self.cursor is not None
+
+        return self.page
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+
+        # The primary key makes the ordering unique, which the seek needs
+        if not {"pk", "-pk", "id", "-id"} & set(ordering):
+            tiebreaker = "-pk" if ordering[0].startswith("-") else "pk"
+            ordering = ordering + (tiebreaker,)
+
+        return ordering
+
+    def get_seek_filter(self, cursor):
+        """
+        Build the keyset condition for rows after (or before) the cursor.
+
+        For an ordering (a, b, c) this is
+        a >= x AND (a > x OR (a = x AND (b > y OR (b = y AND c > z)))),
+        where the redundant leading bound lets the database use an index range.
+        """
+        fields = [self._field_name(order) for order in self.ordering]
+        position = cursor["position"]
+        condition = None
+
+        for index in reversed(range(len(fields))):
+            descending = self.ordering[index].startswith("-") != cursor["reverse"]
+            lookup = "lt" if descending else "gt"
+            step = Q(**{f"{fields[index]}__{lookup}": position[index]})
+            if condition is not None:
+                step |= Q(**{fields[index]: position[index]}) & condition
+            condition = step
+
+        descending = self.ordering[0].startswith("-") != cursor["reverse"]
+        lookup = "lte" if descending else "gte"
+        return Q(**{f"{fields[0]}__{lookup}": position[0]}) & condition
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+
+        if not self.page:
+            # Paged backwards past the first row, so start again from the top
+            return remove_query_param(self.base_url, self.cursor_query_param)
+
+        position = self._get_position(self.page[-1])
+        return self.encode_cursor({"position": position, "reverse": False})
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+
+        position = self._get_position(self.page[0])
+        return self.encode_cursor({"position": position, "reverse": True})
+
+    def decode_cursor(self, request):
+        """
+        Given a request with a cursor, return the decoded cursor or None.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            data = json.loads(urlsafe_b64decode(encoded.encode("ascii")))
+            # A cursor is only valid for the ordering it was issued for
+            if tuple(data["o"]) != self.ordering:
+                raise ValueError("Cursor ordering does not match")
+            position = [
+                self._to_python(order, value)
+                for order, value in zip(self.ordering, data["p"], strict=True)
+            ]
+            reverse = bool(data["r"])
+        except (TypeError, ValueError, KeyError, UnicodeError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+        return {"position": position, "reverse": reverse}
+
+    def encode_cursor(self, cursor):
+        """
+        Given a cursor, return an URL with the opaque cursor as a query param.
+        """
+        data = {
+            "o": list(self.ordering),
+            "p": [self._to_json(value) for value in cursor["position"]],
+            "r": int(cursor["reverse"]),
+        }
+        payload = json.dumps(data, separators=(",", ":")).encode("utf-8")
+        encoded = urlsafe_b64encode(payload).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def _get_position(self, instance):
+        fields = [self._field_name(order) for order in self.ordering]
+        if isinstance(instance, dict):
+            return [instance[field] for field in fields]
+        return [getattr(instance, field) for field in fields]
+
+    def _get_field(self, order):
+        name = order.lstrip("-")
+        # Annotations, such as a search rank, can be ordered on too
+        if name in self.annotations:
+            return self.annotations[name].output_field
+        if name == "pk":
+            return self.model._meta.pk
+        return self.model._meta.get_field(name)
+
+    def _field_name(self, order):
+        name = order.lstrip("-")
+        if name in self.annotations:
+            return name
+        return self._get_field(order).attname
+
+    def _to_python(self, order, value):
+        return self._get_field(order).to_python(value)
+
+    @staticmethod
+    def _to_json(value):
+        # isoformat keeps the microseconds, which the seek needs to be exact
+        if isinstance(value, (datetime, date, time)):
+            return value.isoformat()
+        return value
+
+    @staticmethod
+    def _invert(ordering):
+        return tuple(
+            order[1:] if order.startswith("-") else f"-{order}" for order in ordering
+        )
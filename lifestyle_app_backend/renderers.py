@@ -0,0 +1,69 @@
+from io import BytesIO
+
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSON renderer that uses orjson when it is installed, with the same output
+    as DRF's JSONRenderer byte for byte. Anything orjson would write
+    differently is handed to DRF's encoder or to JSONRenderer itself.
+
+    The exception are floats, which the API does not return: very large and
+    small ones are written as 1e16 instead of 1e+16, and NaN as null.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if (
+            orjson is None
+            or data is None
+            or indent is not None
+            or self.ensure_ascii
+            or not self.compact
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            # Dates and times go through DRF's encoder, which formats them
+            # differently from orjson
+            ret = orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME
+                | orjson.OPT_PASSTHROUGH_DATACLASS,
+            )
+        except orjson.JSONEncodeError:
+            # Non-string keys, integers beyond 64 bits and such
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # JSONRenderer escapes these to stay a strict JavaScript subset
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+            b"\xe2\x80\xa9", b"\\u2029"
+        )
+
+
+class FastJSONParser(JSONParser):
+    """
+    JSON parser that uses orjson when it is installed.
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get("encoding", settings.DEFAULT_CHARSET)
+        if orjson is None or not self.strict or encoding.lower() != "utf-8":
+            return super().parse(stream, media_type, parser_context)
+
+        data = stream.read()
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # Other encodings, huge integers and the error message are left
+            # to JSONParser
+            return super().parse(BytesIO(data), media_type, parser_context)
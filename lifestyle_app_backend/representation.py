@@ -0,0 +1,286 @@
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from drf_spectacular.utils import OpenApiParameter
+from rest_framework import ISO_8601, serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.fields import empty
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from .instrumentation import timed_serialization
+
+# Fields whose to_representation leaves database values as they are
+PLAIN_FIELDS = {
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.EmailField,
+    serializers.IntegerField,
+}
+
+
+class UnsupportedField(Exception):
+    pass
+
+
+class ValuesRepresentation:
+    """
+    Builds the output of a model serializer from `.values()` rows instead of
+    model instances, for the fields it can reproduce exactly.
+
+    Serializers opt in with a `values_extras` attribute, which maps keys their
+    to_representation adds to the annotation they come from. Those keys are
+    only added when the annotation is set, like to_representation does.
+    """
+
+    def __init__(self, serializer, queryset):
+        model = serializer.Meta.model
+        self.fields = []
+
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if field.source == "*" or "." in field.source:
+                raise UnsupportedField(name)
+            try:
+                lookup = model._meta.get_field(field.source).attname
+            except FieldDoesNotExist:
+                raise UnsupportedField(name)
+            self.fields.append((name, lookup, self.get_formatter(field)))
+
+        self.extras = [
+            (name, annotation)
+            for name, annotation in serializer.values_extras.items()
+            if annotation in queryset.query.annotations
+        ]
+        self.lookups = [lookup for _, lookup, _ in self.fields]
+        self.lookups += [annotation for _, annotation in self.extras]
+
+    @classmethod
+    def for_serializer(cls, serializer, queryset):
+        """
+        Return the representation, or None if the serializer's output can't
+        be built from rows.
+        """
+        if not settings.VALUES_LIST_RESPONSES or not hasattr(
+            serializer, "values_extras"
+        ):
+            return None
+        try:
+            return cls(serializer, queryset)
+        except UnsupportedField:
+            return None
+
+    @staticmethod
+    def get_formatter(field):
+        if isinstance(field, serializers.PrimaryKeyRelatedField):
+            if field.pk_field is not None:
+                raise UnsupportedField(field.field_name)
+            return None
+
+        if type(field) in PLAIN_FIELDS:
+            return None
+
+        if type(field) is serializers.DateTimeField:
+            output_format = getattr(field, "format", empty)
+            if output_format is empty:
+                output_format = api_settings.DATETIME_FORMAT
+            if output_format is None or output_format.lower() == ISO_8601:
+                raise UnsupportedField(field.field_name)
+
+            # The same conversion as DateTimeField.enforce_timezone
+            timezone = getattr(field, "timezone", field.default_timezone())
+            if timezone is None:
+                return lambda value: value.strftime(output_format)
+            return lambda value: value.astimezone(timezone).strftime(output_format)
+
+        raise UnsupportedField(field.field_name)
+
+    def to_representation(self, row):
+        data = {}
+        for name, lookup, formatter in self.fields:
+            value = row[lookup]
+            # None stays None, like in Serializer.to_representation
+            data[name] = (
+                value if formatter is None or value is None else formatter(value)
+            )
+        for name, annotation in self.extras:
+            if row[annotation] is not None:
+                data[name] = row[annotation]
+        return data
+
+    def values(self, queryset):
+        # Annotations stay selected, the pagination may order by them
+        annotations = [
+            name
+            for name in queryset.query.annotation_select
+            if name not in self.lookups
+        ]
+        return queryset.values(*self.lookups, *annotations)
+
+    # Timed like Serializer.to_representation, which this replaces
+    @timed_serialization
+    def many(self, rows):
+        return [self.to_representation(row) for row in rows]
+
+
+class ValuesListMixin:
+    """
+    Serves list responses from `.values()` rows when the serializer allows
+    it, skipping model instances and the serializer field machinery. The
+    output is the same as through the serializer.
+    """
+
+    def list_response(self, queryset):
+        representation = ValuesRepresentation.for_serializer(
+            self.get_serializer(), queryset
+        )
+        if representation is None:
+            return super().list_response(queryset)
+
+        rows = representation.values(queryset)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(representation.many(page))
+
+        return Response(representation.many(rows))
+
+
+# The query parameters of SparseFieldsMixin, for the API schema
+SPARSE_FIELDS_PARAMETERS = [
+    OpenApiParameter(
+        "fields", str, description="Comma-separated fields to send, instead of all."
+    ),
+    OpenApiParameter(
+        "exclude", str, description="Comma-separated fields to leave out."
+    ),
+]
+
+
+class SparseFieldsMixin:
+    """
+    Lets GET requests ask for some of the serializer's fields with
+    `?fields=a,b`, or for all but some with `?exclude=a,b`. Only those are
+    serialized, and the columns of the others are not loaded: `?fields=`
+    loads the columns it needs with `.only()` and `?exclude=` leaves the
+    excluded ones out with `.defer()`. ValuesListMixin selects the same
+    columns with `.values()`.
+
+    `optional_fields` maps fields that are only sent when asked for in
+    `?fields=` to the queryset method that annotates them. Columns in
+    `sparse_required_fields` are always loaded, for views that read them.
+    """
+
+    fields_query_param = "fields"
+    exclude_query_param = "exclude"
+    optional_fields = {}
+    sparse_required_fields = []
+
+    def get_sparse_fields(self):
+        """
+        Return the field names to send, or None for the serializer's fields.
+        """
+        request = getattr(self, "request", None)
+        if request is None or request.method not in SAFE_METHODS:
+            return None
+        # Other actions have serializers of their own
+        if getattr(self, "action", None) not in (None, "list", "retrieve"):
+            return None
+        fields = self.parse_names(self.fields_query_param)
+        exclude = self.parse_names(self.exclude_query_param)
+        if fields is None and exclude is None:
+            return None
+
+        readable = self.readable_fields()
+        errors = {}
+        if fields is not None and (
+            not fields or not set(fields) <= {*readable, *self.optional_fields}
+        ):
+            choices = [*readable, *self.optional_fields]
+            errors[self.fields_query_param] = [f"Choose from {', '.join(choices)}."]
+        if exclude is not None and not set(exclude) <= set(readable):
+            errors[self.exclude_query_param] = [f"Choose from {', '.join(readable)}."]
+        if errors:
+            raise ValidationError(errors)
+
+        names = readable if fields is None else fields
+        names = [name for name in names if name not in (exclude or ())]
+        if not names:
+            raise ValidationError(
+                {self.exclude_query_param: ["At least one field must be left."]}
+            )
+        return names
+
+    def parse_names(self, param):
+        value = self.request.query_params.get(param)
+        if value is None:
+            return None
+        return [name.strip() for name in value.split(",") if name.strip()]
+
+    def readable_fields(self):
+        return [
+            name
+            for name, field in self.get_serializer_class()().fields.items()
+            if not field.write_only
+        ]
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        names = self.get_sparse_fields()
+        if names is not None:
+            fields = getattr(serializer, "child", serializer).fields
+            for name in [name for name in fields if name not in names]:
+                del fields[name]
+        return serializer
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        names = self.get_sparse_fields()
+        if names is None:
+            return queryset
+
+        for name in names:
+            if name in self.optional_fields:
+                queryset = getattr(queryset, self.optional_fields[name])()
+
+        needed = self.get_needed_columns(queryset)
+        if self.request.query_params.get(self.fields_query_param) is None:
+            excluded = set(self.readable_fields()) - set(names)
+            columns, _ = self.get_columns(queryset, excluded)
+            return queryset.defer(*(columns - needed))
+
+        columns, complete = self.get_columns(queryset, names)
+        # Fields that are not columns may need any of them
+        if not complete:
+            return queryset
+        return queryset.only(*columns, *needed)
+
+    def get_columns(self, queryset, names):
+        """
+        Return the model fields that the named serializer fields read, and
+        whether all of them read a single column.
+        """
+        fields = self.get_serializer_class()().fields
+        columns, complete = set(), True
+        for name in names:
+            if name in self.optional_fields:
+                continue
+            try:
+                field = queryset.model._meta.get_field(fields[name].source)
+            except FieldDoesNotExist:
+                complete = False
+                continue
+            if not field.primary_key:
+                columns.add(field.name)
+        return columns, complete
+
+    def get_needed_columns(self, queryset):
+        # The pagination reads the ordering fields of the last row
+        ordering = [*queryset.query.order_by, *getattr(self.paginator, "ordering", ())]
+        names = {order.lstrip("-") for order in ordering if isinstance(order, str)}
+        names |= set(self.sparse_required_fields)
+        return {
+            field.name
+            for field in queryset.model._meta.concrete_fields
+            if field.name in names
+        }
@@ -0,0 +1,154 @@
+"""
+Read replicas.
+
+GET requests to views with ReplicaReadMixin read from one of the databases
+in DATABASE_REPLICAS, everything else uses "default", the primary:
+
+- Writes always go to the primary.
+- A request reads from the primary once it has written, so a response
+  after a write shows it.
+- A user who wrote reads from the primary for REPLICA_PIN_SECONDS after the
+  request, so their next requests do not miss the write while the replicas
+  catch up. It should be longer than the replicas' lag. Pins are kept in
+  the REPLICA_CACHE_ALIAS cache, which must be shared by all workers, or a
+  pin only holds in the worker that handled the write.
+
+Other users may see a write up to the lag late. A response cached in that
+time, see cache.py, keeps the old data until the next write or the cache
+timeout.
+"""
+
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.permissions import SAFE_METHODS
+
+current_routing = ContextVar("current_routing", default=None)
+
+
+class Routing:
+    """
+    Where the reads of one request go, None for the primary.
+    """
+
+    def __init__(self):
+        self.replica = None
+        self.wrote = False
+
+
+def get_cache():
+    return caches[settings.REPLICA_CACHE_ALIAS]
+
+
+def pin_key(user_id):
+    return f"replica:pinned:{user_id}"
+
+
+def is_pinned(user_id):
+    return get_cache().get(pin_key(user_id)) is not None
+
+
+def pin(user_id):
+    get_cache().set(pin_key(user_id), True, timeout=settings.REPLICA_PIN_SECONDS)
+
+
+def use_replica(user):
+    """
+    Read from a replica for the rest of the current request, unless the
+    user wrote recently.
+    """
+    routing = current_routing.get()
+    if routing is None or routing.wrote or not settings.DATABASE_REPLICAS:
+        return
+    if user.is_authenticated and is_pinned(user.pk):
+        return
+    # One replica for the whole request, so its reads are consistent
+    routing.replica = random.choice(settings.DATABASE_REPLICAS)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        routing = current_routing.get()
+        if routing is None or routing.wrote:
+            return None
+        return routing.replica
+
+    def db_for_write(self, model, **hints):
+        routing = current_routing.get()
+        if routing is not None:
+            routing.wrote = True
+        # Without a router, an object read from a replica is saved back to it
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db in settings.DATABASE_REPLICAS:
+            return DEFAULT_DB_ALIAS
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Keeps the routing of each request, and pins users who wrote to the
+    primary. Left out when there are no replicas.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        routing = Routing()
+        token = current_routing.set(routing)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_routing.reset(token)
+        self.pin_writer(request, routing)
+        return response
+
+    async def __acall__(self, request):
+        routing = Routing()
+        token = current_routing.set(routing)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_routing.reset(token)
+        self.pin_writer(request, routing)
+        return response
+
+    def pin_writer(self, request, routing):
+        # DRF sets the user it authenticated on the request too
+        user = getattr(request, "user", None)
+        if routing.wrote and user is not None and user.is_authenticated:
+            pin(user.pk)
+
+
+class ReplicaReadMixin:
+    """
+    Reads from a replica in GET, HEAD and OPTIONS requests.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        # After authentication, which reads from the primary
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS:
+            use_replica(request.user)
@@ -0,0 +1,137 @@
+"""
+The OpenAPI schema, built once per code version.
+
+Generating the schema walks every view and serializer, which takes a few
+hundred milliseconds, and it only changes with the code. It is built the
+first time it is requested, or by the build_schema command on deploy, and
+kept:
+
+- on disk in SCHEMA_CACHE_DIR, for other workers and restarts,
+- in memory, for the rest of the process, rendered once per format.
+
+Both are keyed by the code version, SCHEMA_CODE_VERSION or else a digest of
+the project's source files, so a deploy builds a new schema. Nothing is
+built or hashed when a worker starts.
+
+The ETag is a digest of the rendered schema, the same in every worker.
+"""
+
+import json
+import os
+import threading
+from functools import cache
+from hashlib import md5
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+
+import django
+import drf_spectacular
+import rest_framework
+from django.apps import apps
+from django.conf import settings
+from django.utils import translation
+from django.utils.http import quote_etag
+from drf_spectacular.renderers import OpenApiJsonRenderer
+
+# Schemas by name, and their (content, etag) by name and media type
+schemas = {}
+rendered = {}
+lock = threading.Lock()
+
+
+@cache
+def code_version():
+    """
+    Return SCHEMA_CODE_VERSION, or a digest of the project's Python files
+    and the versions of the libraries that generate the schema.
+    """
+    if settings.SCHEMA_CODE_VERSION:
+        return settings.SCHEMA_CODE_VERSION
+
+    base_dir = Path(settings.BASE_DIR)
+    packages = {
+        Path(config.path)
+        for config in apps.get_app_configs()
+        if Path(config.path).is_relative_to(base_dir)
+    }
+    # The settings and URLs
+    packages.add(base_dir / settings.ROOT_URLCONF.split(".")[0])
+
+    versions = (django.__version__, rest_framework.VERSION, drf_spectacular.__version__)
+    digest = md5(":".join(versions).encode(), usedforsecurity=False)
+    for path in sorted(path for package in packages for path in package.rglob("*.py")):
+        digest.update(str(path.relative_to(base_dir)).encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def schema_name(api_version=None):
+    language = translation.get_language() or "none"
+    return f"{code_version()}-{api_version or 'latest'}-{language}"
+
+
+def cache_path(name):
+    return Path(settings.SCHEMA_CACHE_DIR) / f"schema-{name}.json"
+
+
+def read(name):
+    try:
+        return json.loads(cache_path(name).read_bytes())
+    except (OSError, ValueError):
+        return None
+
+
+def write(name, schema):
+    """
+    Save the schema to disk and return it as read back, so a schema served
+    after generating it is the same as one served from the file.
+    """
+    content = OpenApiJsonRenderer().render(schema, renderer_context={})
+    path = cache_path(name)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Written aside and renamed, so other workers never read half a file
+    with NamedTemporaryFile(dir=path.parent, suffix=".tmp", delete=False) as file:
+        file.write(content)
+    # NamedTemporaryFile is only readable by its owner, and workers may run
+    # as another user than the build_schema command
+    os.chmod(file.name, 0o644)
+    os.replace(file.name, path)
+    return json.loads(content)
+
+
+def get_schema(generate, api_version=None):
+    """
+    Return the schema for the current language, from memory or disk, or
+    from `generate` when neither has it.
+    """
+    name = schema_name(api_version)
+    schema = schemas.get(name)
+    if schema is None:
+        # Concurrent first requests generate it once
+        with lock:
+            schema = schemas.get(name)
+            if schema is None:
+                schema = read(name)
+                if schema is None:
+                    schema = write(name, generate())
+                schemas[name] = schema
+    return schema
+
+
+def render(renderer, media_type, generate, api_version=None):
+    """
+    Return the schema rendered by `renderer` and its strong ETag.
+    """
+    key = schema_name(api_version), media_type
+    if key not in rendered:
+        schema = get_schema(generate, api_version)
+        content = renderer.render(schema, media_type, renderer_context={})
+        etag = quote_etag(md5(content, usedforsecurity=False).hexdigest())
+        rendered[key] = content, etag
+    return rendered[key]
+
+
+def clear():
+    schemas.clear()
+    rendered.clear()
+    code_version.cache_clear()
@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 
 from pathlib import Path
 from datetime import timedelta
+from importlib.util import find_spec
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -45,16 +46,39 @@ INSTALLED_APPS = [
     "users",
     "entries",
     "events",
+    "sync",
+    "stats",
+    "jobs",
+    "benchmarks",
+    # Project-wide management commands, such as build_schema
+    "lifestyle_app_backend",
+    "django_crontab",
 ]
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",  # JWT authentication
+        # JWT authentication without loading the user, see authentication.py
+        "lifestyle_app_backend.authentication.StatelessJWTAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",  # Require authentication by default
     ],
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    # orjson is used when it is installed, with the same output as without
+    "DEFAULT_RENDERER_CLASSES": [
+        "lifestyle_app_backend.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "lifestyle_app_backend.renderers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
+    # Failed logins per IP address and per username, see users/throttling.py
+    "DEFAULT_THROTTLE_RATES": {
+        "login_ip": "30/min",
+        "login_username": "10/min",
+    },
 }
 
 SPECTACULAR_SETTINGS = {
@@ -65,6 +89,9 @@ SPECTACULAR_SETTINGS = {
 }
 
 MIDDLEWARE = [
+    "lifestyle_app_backend.instrumentation.InstrumentationMiddleware",
+    "lifestyle_app_backend.compression.CompressionMiddleware",
+    "lifestyle_app_backend.routers.ReplicaRoutingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
@@ -136,13 +163,204 @@ WSGI_APPLICATION = "lifestyle_app_backend.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+# SQLite connection profiles, "django" is Django's defaults. In "tuned":
+# - WAL lets reads go on while a transaction writes, and with
+#   synchronous=NORMAL a commit waits for no fsync, only checkpoints do
+# - IMMEDIATE transactions take the write lock when they begin, so writers
+#   wait in turn for busy_timeout instead of failing with "database is
+#   locked" when two transactions that began by reading both try to write
+# - connections stay open between requests
+# The benchmarks' stress_sqlite command compares them.
+SQLITE_PROFILES = {
+    "django": {},
+    "tuned": {
+        "CONN_MAX_AGE": 600,
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {
+            "transaction_mode": "IMMEDIATE",
+            "init_command": (
+                "PRAGMA journal_mode=WAL;"
+                "PRAGMA synchronous=NORMAL;"
+                "PRAGMA busy_timeout=20000;"
+                # 256 MiB of the file mapped, and a page cache of 64 MiB
+                "PRAGMA mmap_size=268435456;"
+                "PRAGMA cache_size=-65536;"
+            ),
+        },
+    },
+}
+
+SQLITE_PROFILE = "tuned"
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        **SQLITE_PROFILES[SQLITE_PROFILE],
     }
 }
 
+# Read replicas, aliases in DATABASES with copies of "default" that are kept
+# up to date outside Django, by LiteFS for example. GET requests to the entry,
+# event and user views read from them, see routers.py. For example:
+#
+# DATABASES["replica"] = {
+#     "ENGINE": "django.db.backends.sqlite3",
+#     "NAME": BASE_DIR / "replica.sqlite3",
+#     **SQLITE_PROFILES[SQLITE_PROFILE],
+#     # Tests use the primary, which has all the test data
+#     "TEST": {"MIRROR": "default"},
+# }
+# DATABASE_REPLICAS = ["replica"]
+DATABASE_REPLICAS = []
+
+DATABASE_ROUTERS = ["lifestyle_app_backend.routers.ReplicaRouter"]
+
+# A user who wrote reads from the primary for this many seconds. Pins are
+# kept in this cache, so with several worker processes it must be one they
+# share, Redis or Memcached for example. The default LocMemCache only pins
+# users to the primary in the process that handled their write.
+REPLICA_PIN_SECONDS = 10
+REPLICA_CACHE_ALIAS = "default"
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    # Rendered list and detail responses. LocMemCache evicts the least recently
+    # used entries past MAX_ENTRIES. To share it between worker processes use
+    # "django.core.cache.backends.filebased.FileBasedCache" with a directory
+    # as the LOCATION.
+    "responses": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "responses",
+        "TIMEOUT": 300,
+        "OPTIONS": {
+            "MAX_ENTRIES": 1000,
+        },
+    },
+}
+
+RESPONSE_CACHE_ALIAS = "responses"
+
+# Whether users exist and are active is cached for this many seconds when
+# authenticating, so other processes notice a deactivation within it
+AUTH_USER_CACHE_ALIAS = "default"
+AUTH_USER_CACHE_TTL = 30
+
+
+# Delta sync
+
+# How long deletions are remembered. Clients that last synced before that
+# get everything again.
+SYNC_TOMBSTONE_RETENTION = timedelta(days=90)
+
+# How far a sync looks back before its watermark, for writes that were not
+# committed yet when the previous sync ran
+SYNC_OVERLAP = timedelta(seconds=5)
+
+
+# Daily stats
+
+# Saving or deleting an event recomputes the stats of the days it counts on.
+# Spans of more days than this, such as those of long recurring events, are
+# recomputed by a job instead of in the request.
+STATS_INLINE_REFRESH_DAYS = 31
+
+
+# Scheduled jobs, installed with "python manage.py crontab add"
+
+CRONJOBS = [
+    # Catches up on writes that sent no signals, and adds today's
+    # occurrences of endless recurring events
+    ("15 0 * * *", "django.core.management.call_command", ["rebuild_stats"]),
+    # Forgets deletions older than SYNC_TOMBSTONE_RETENTION
+    ("45 0 * * *", "django.core.management.call_command", ["purge_tombstones"]),
+]
+
+
+# Background jobs, see jobs/queue.py. Run them with the run_jobs command.
+
+# How long an idle worker waits before looking for jobs again, in seconds
+JOBS_POLL_INTERVAL = 1
+
+# A running job is run again by another worker when its worker has not
+# reported for this long
+JOBS_LEASE = timedelta(minutes=5)
+
+# Runs of a job that raises, the retries wait longer each time
+JOBS_MAX_ATTEMPTS = 3
+JOBS_RETRY_DELAY = timedelta(seconds=30)
+
+# Entries or events deleted per transaction when a user is deleted
+USER_DELETE_BATCH_SIZE = 500
+
+
+# Request instrumentation
+
+# Share of requests whose query count and timings are measured, from 0 (off)
+# to 1. Results go to the Server-Timing header and the log.
+INSTRUMENTATION_SAMPLE_RATE = 0
+
+# Also warn about statements that run many times in one request (N+1)
+INSTRUMENTATION_DEBUG = False
+INSTRUMENTATION_DUPLICATE_THRESHOLD = 5
+
+
+# Response compression, see compression.py
+
+# Preferred first. br and zstd are used when brotli and zstandard are
+# installed.
+COMPRESSION_ENCODINGS = ["br", "zstd", "gzip"]
+
+# Smaller responses are sent uncompressed
+COMPRESSION_MIN_SIZE = 1024
+
+# Compressed forms of payloads that views mark as cacheable, such as the
+# API schema
+COMPRESSION_CACHE_ALIAS = "default"
+
+
+# OpenAPI schema, see schema.py
+
+# The schema is built once per code version. None is a digest of the source
+# files, a release tag or commit can be set instead.
+SCHEMA_CODE_VERSION = None
+SCHEMA_CACHE_DIR = BASE_DIR / ".schema_cache"
+
+
+# Build list responses from values() rows for serializers that support it,
+# instead of from model instances. The output is the same.
+VALUES_LIST_RESPONSES = True
+
+
+# Password hashing
+# https://docs.djangoproject.com/en/5.1/topics/auth/passwords/
+
+# New passwords are hashed with the first hasher. Passwords hashed with any
+# other hasher, or with weaker parameters, are rehashed with the first one
+# at the next successful login, so the policy can be changed at any time.
+# Hashes with stronger parameters are kept, see users/hashers.py.
+PASSWORD_HASHERS = [
+    "users.hashers.Argon2PasswordHasher",
+    "users.hashers.PBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.ScryptPasswordHasher",
+]
+
+# argon2-cffi is optional, PBKDF2 is used without it
+if find_spec("argon2") is None:
+    PASSWORD_HASHERS.remove("users.hashers.Argon2PasswordHasher")
+
+# Django's default. Fewer iterations make each login cheaper, and each
+# guess of an attacker with the hashes just as cheap. New and weaker hashes
+# use this count, stronger ones are kept.
+PASSWORD_PBKDF2_ITERATIONS = 870000
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -0,0 +1,331 @@
+import gzip
+import itertools
+import json
+import os
+from io import StringIO
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connections, transaction
+from django.test import TestCase, override_settings
+from drf_spectacular.generators import SchemaGenerator
+from rest_framework.test import APIClient
+
+from entries.models import Entry
+from entries.serializers import EntrySerializer
+
+from . import cache as response_cache
+from . import compression, instrumentation, routers, schema
+
+
+@override_settings(INSTRUMENTATION_SAMPLE_RATE=1)
+class InstrumentationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="tester", password="secret")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        response_cache.get_cache().clear()
+
+        for index in range(6):
+            author = User.objects.create_user(username=f"author{index}")
+            Entry.objects.create(title=f"Entry {index}", body="Body", author=author)
+
+    def test_server_timing(self):
+        with self.assertLogs("lifestyle_app_backend.instrumentation") as logs:
+            response = self.client.get("/entries/")
+
+        timing = response["Server-Timing"]
+        self.assertIn("db;dur=", timing)
+        self.assertIn('desc="2 queries"', timing)
+        for name in ["serialize", "render", "total"]:
+            self.assertIn(f"{name};dur=", timing)
+
+        self.assertEqual(len(logs.records), 1)
+        metrics = logs.records[0].metrics
+        self.assertEqual(metrics["queries"], 2)
+        self.assertEqual(metrics["view"], "entries.views.EntryViewSet (entry-list)")
+
+    def test_values_lists_are_timed(self):
+        # Each reading of the clock a second later
+        clock = mock.patch.object(
+            instrumentation, "perf_counter", side_effect=itertools.count()
+        )
+        for values_list in [True, False]:
+            response_cache.get_cache().clear()
+            with self.subTest(values_list=values_list), clock:
+                with self.settings(VALUES_LIST_RESPONSES=values_list):
+                    response = self.client.get("/entries/")
+
+                self.assertNotIn("serialize;dur=0.0,", response["Server-Timing"])
+
+    @override_settings(INSTRUMENTATION_SAMPLE_RATE=0)
+    def test_disabled(self):
+        response = APIClient().get("/")
+
+        self.assertNotIn("Server-Timing", response)
+
+    @override_settings(INSTRUMENTATION_DEBUG=True, VALUES_LIST_RESPONSES=False)
+    def test_debug_flags_repeated_queries(self):
+        to_representation = EntrySerializer.to_representation
+
+        def with_author(serializer, instance):
+            data = to_representation(serializer, instance)
+            data["author_name"] = instance.author.username
+            return data
+
+        with mock.patch.object(
+            EntrySerializer, "to_representation", autospec=True, side_effect=with_author
+        ):
+            with self.assertLogs("lifestyle_app_backend.instrumentation") as logs:
+                self.client.get("/entries/")
+
+        warnings = [record for record in logs.records if record.levelname == "WARNING"]
+        self.assertEqual(len(warnings), 1)
+        self.assertIn("EntryViewSet", warnings[0].getMessage())
+        self.assertEqual(warnings[0].metrics["count"], 6)
+
+
+class CompressionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="tester", password="secret")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        response_cache.get_cache().clear()
+        compression.get_cache().clear()
+
+        for index in range(20):
+            Entry.objects.create(
+                title=f"Entry {index}", body="Morning run " * 10, author=self.user
+            )
+
+    def test_list_is_compressed(self):
+        plain = self.client.get("/entries/")
+        response = self.client.get("/entries/", HTTP_ACCEPT_ENCODING="br;q=0, gzip")
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertLess(int(response["Content-Length"]), len(plain.content))
+
+    def test_small_and_refused_responses_are_not_compressed(self):
+        entry = Entry.objects.first()
+        for url, accept_encoding in [
+            (f"/entries/{entry.pk}/", "gzip"),
+            ("/entries/", "gzip;q=0, identity"),
+        ]:
+            with self.subTest(url=url, accept_encoding=accept_encoding):
+                response = self.client.get(url, HTTP_ACCEPT_ENCODING=accept_encoding)
+                self.assertNotIn("Content-Encoding", response)
+
+    def test_etag_has_encoding(self):
+        plain_etag = self.client.get("/entries/")["ETag"]
+        etag = self.client.get("/entries/", HTTP_ACCEPT_ENCODING="gzip")["ETag"]
+        self.assertEqual(etag, plain_etag[:-1] + '-gzip"')
+
+        response = self.client.get(
+            "/entries/", HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        self.assertIn("Accept-Encoding", response["Vary"])
+
+        response = self.client.get("/entries/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_export_is_streamed_compressed(self):
+        plain = b"".join(self.client.get("/entries/export/").streaming_content)
+        response = self.client.get("/entries/export/", HTTP_ACCEPT_ENCODING="gzip")
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(b"".join(response.streaming_content)), plain)
+
+    def test_schema_is_compressed_once(self):
+        schema.clear()
+        self.addCleanup(schema.clear)
+        location = self.enterContext(TemporaryDirectory())
+        with self.settings(SCHEMA_CACHE_DIR=location), mock.patch.object(
+            compression.Gzip,
+            "compress",
+            autospec=True,
+            side_effect=lambda encoding, data: gzip.compress(data),
+        ) as compress:
+            first = self.client.get("/schema/", HTTP_ACCEPT_ENCODING="gzip")
+            second = self.client.get("/schema/", HTTP_ACCEPT_ENCODING="gzip")
+
+        self.assertEqual(compress.call_count, 1)
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(second["Content-Encoding"], "gzip")
+
+
+class SchemaTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        schema.clear()
+        self.addCleanup(schema.clear)
+        self.location = self.enterContext(TemporaryDirectory())
+        self.enterContext(self.settings(SCHEMA_CACHE_DIR=self.location))
+
+    def count_generations(self):
+        return mock.patch.object(
+            SchemaGenerator,
+            "get_schema",
+            autospec=True,
+            side_effect=SchemaGenerator.get_schema,
+        )
+
+    def test_schema_is_generated_once(self):
+        with self.count_generations() as get_schema:
+            first = self.client.get("/schema/")
+            second = self.client.get("/schema/", {"format": "json"})
+            third = self.client.get("/schema/")
+
+        self.assertEqual(get_schema.call_count, 1)
+        self.assertEqual(first.content, third.content)
+        self.assertIn("/entries/", json.loads(second.content)["paths"])
+        self.assertNotEqual(first["ETag"], second["ETag"])
+        self.assertFalse(first["ETag"].startswith("W/"))
+
+        response = self.client.get("/schema/", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+    def test_built_schema_is_read_from_disk(self):
+        call_command("build_schema", stdout=StringIO())
+        (name,) = os.listdir(self.location)
+        # Readable by workers running as other users
+        mode = os.stat(os.path.join(self.location, name)).st_mode
+        self.assertEqual(mode & 0o777, 0o644)
+        served = self.client.get("/schema/", {"format": "json"})
+
+        # Another worker
+        schema.clear()
+        with self.count_generations() as get_schema:
+            response = self.client.get("/schema/", {"format": "json"})
+
+        get_schema.assert_not_called()
+        self.assertEqual(response.content, served.content)
+        self.assertEqual(response["ETag"], served["ETag"])
+        self.assertIn("/entries/", json.loads(response.content)["paths"])
+
+    def test_schema_is_rebuilt_for_new_code(self):
+        with self.count_generations() as get_schema:
+            for version in ["1", "2", "2"]:
+                schema.clear()
+                with self.settings(SCHEMA_CODE_VERSION=version):
+                    self.client.get("/schema/")
+
+        self.assertEqual(get_schema.call_count, 2)
+        self.assertEqual(len(os.listdir(self.location)), 2)
+
+
+@override_settings(DATABASE_REPLICAS=["replica"])
+class ReplicaRoutingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # A second SQLite file, behind the primary by what the tests write.
+        # It is not a test database, so it is added here instead of in
+        # `databases`, which the test runner sets up.
+        cls.directory = TemporaryDirectory()
+        connections.settings["replica"] = connections.configure_settings(
+            {
+                "default": connections.settings["default"],
+                "replica": {
+                    "ENGINE": "django.db.backends.sqlite3",
+                    "NAME": os.path.join(cls.directory.name, "replica.sqlite3"),
+                },
+            }
+        )["replica"]
+        cls.databases = cls.databases | {"replica"}
+        call_command("migrate", database="replica", verbosity=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        connections["replica"].close()
+        del connections["replica"]
+        del connections.settings["replica"]
+        cls.databases = cls.databases - {"replica"}
+        cls.directory.cleanup()
+        super().tearDownClass()
+
+    def setUp(self):
+        response_cache.get_cache().clear()
+        routers.get_cache().clear()
+        # Rolled back after each test, like the primary
+        atomic = transaction.atomic(using="replica")
+        atomic.__enter__()
+        self.addCleanup(atomic.__exit__, None, None, None)
+        self.addCleanup(transaction.set_rollback, True, using="replica")
+
+        self.user = User.objects.create_user(username="tester", password="secret")
+        self.other = User.objects.create_user(username="other", password="secret")
+        self.entry = Entry.objects.create(
+            title="Primary", body="Body", author=self.user
+        )
+
+        User.objects.using("replica").bulk_create(User.objects.all())
+        Entry.objects.using("replica").bulk_create(
+            [Entry(**{**Entry.objects.values().get(), "title": "Replica"})]
+        )
+
+        self.client = self.client_for(self.user)
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def get_title(self, client):
+        return client.get(f"/entries/{self.entry.pk}/").json()["title"]
+
+    def test_reads_go_to_replica(self):
+        self.assertEqual(self.get_title(self.client), "Replica")
+        self.assertEqual(
+            self.client.get("/entries/").json()["results"][0]["title"], "Replica"
+        )
+
+        response_cache.get_cache().clear()
+        with override_settings(DATABASE_REPLICAS=[]):
+            self.assertEqual(self.get_title(self.client_for(self.user)), "Primary")
+
+    def test_writer_reads_own_writes(self):
+        response = self.client.patch(
+            f"/entries/{self.entry.pk}/", {"title": "Edited"}, format="json"
+        )
+        self.assertEqual(response.json()["title"], "Edited")
+        self.assertEqual(self.get_title(self.client), "Edited")
+
+        self.assertEqual(self.get_title(self.client_for(self.other)), "Replica")
+
+        # Until the pin expires
+        routers.get_cache().clear()
+        response_cache.get_cache().clear()
+        self.assertEqual(self.get_title(self.client), "Replica")
+
+    def test_toggle_favorite_reads_primary(self):
+        response = self.client.post(f"/entries/{self.entry.pk}/toggle_favorite/")
+
+        self.assertEqual(response.json()["title"], "Primary")
+        self.assertTrue(response.json()["favorite"])
+
+    def test_toggle_favorite_is_a_write(self):
+        routing = routers.Routing()
+        routing.replica = "replica"
+        token = routers.current_routing.set(routing)
+        self.addCleanup(routers.current_routing.reset, token)
+
+        entry = Entry.objects.toggle_favorite(self.entry.pk)
+
+        self.assertTrue(routing.wrote)
+        self.assertEqual(entry.title, "Primary")
+        self.assertFalse(Entry.objects.using("replica").get().favorite)
+
+    def test_users_read_replica(self):
+        User.objects.using("replica").filter(pk=self.other.pk).update(username="stale")
+
+        response = self.client.get(f"/users/{self.other.pk}/")
+        self.assertEqual(response.json()["username"], "stale")
+        users = self.client.get("/users/").json()["results"]
+        usernames = [user["username"] for user in users]
+        self.assertIn("stale", usernames)
@@ -1,14 +1,20 @@
 from django.contrib import admin
 from django.urls import path, include
-from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
+from drf_spectacular.views import SpectacularSwaggerView
+
+from .views import ResponseCacheStatsView, SchemaView
 
 urlpatterns = [
     path("admin/", admin.site.urls),
-    path("schema/", SpectacularAPIView.as_view(), name="schema"),
+    path("schema/", SchemaView.as_view(), name="schema"),
     path(
         "swagger/", SpectacularSwaggerView.as_view(url_name="schema"), name="swagger-ui"
     ),
     path("users/", include("users.urls")),
     path("entries/", include("entries.urls")),
     path("events/", include("events.urls")),
+    path("sync/", include("sync.urls")),
+    path("stats/", include("stats.urls")),
+    path("jobs/", include("jobs.urls")),
+    path("cache/stats/", ResponseCacheStatsView.as_view(), name="cache-stats"),
 ]
@@ -1,7 +1,88 @@
 from django.http import HttpResponse
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from drf_spectacular.utils import extend_schema
+from drf_spectacular.views import SpectacularAPIView
+
+from . import schema
+from .cache import get_stats
+from .conditional import conditional_response
 
 def homepage(request):
     return HttpResponse("Hello World")
 
 def about(request):
-    return HttpResponse("About page")
\ No newline at end of file
+    return HttpResponse("About page")
+
+
+class ResponseCacheStatsView(APIView):
+    """
+    Hit and miss counters of the response cache.
+    """
+
+    # Loads the full user, tokens do not say whether it is staff
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAdminUser]
+
+    @extend_schema(
+        summary="Response cache counters",
+        # The same bearer token as the other views, not a second scheme
+        auth=[{"jwtAuth": []}],
+        responses={
+            200: {
+                "type": "object",
+                "properties": {
+                    "hits": {"type": "integer"},
+                    "misses": {"type": "integer"},
+                },
+            },
+        },
+    )
+    def get(self, request):
+        return Response(get_stats())
+
+
+class SchemaView(SpectacularAPIView):
+    """
+    The OpenAPI schema, built once per code version, see schema.py.
+    """
+
+    def _get_schema_response(self, request):
+        if not self.serve_public:
+            # Each user gets the endpoints they may use
+            return super()._get_schema_response(request)
+
+        version = (
+            self.api_version or request.version or self._get_version_parameter(request)
+        )
+
+        def generate():
+            generator = self.generator_class(
+                urlconf=self.urlconf, api_version=version, patterns=self.patterns
+            )
+            return generator.get_schema(request=request, public=True)
+
+        renderer = request.accepted_renderer
+        content, etag = schema.render(
+            renderer, request.accepted_media_type, generate, version
+        )
+
+        def render():
+            content_type = request.accepted_media_type
+            if renderer.charset:
+                content_type = f"{content_type}; charset={renderer.charset}"
+            response = HttpResponse(content, content_type=content_type)
+            response["Content-Disposition"] = (
+                f'inline; filename="{self._get_filename(request, version)}"'
+            )
+            return response
+
+        return conditional_response(request, render, etag)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        # Compressed once, see compression.py
+        response.compression_cacheable = True
+        return response
@@ -0,0 +1,353 @@
+"""
+Keeps DailyStats in step with entries and events.
+
+Entries change the counts of their day by one, with an update of the row.
+Saving or deleting an event or occurrence override recomputes the days it
+counts on, before and after the change, unless the save left its times
+alone. Spans longer than STATS_INLINE_REFRESH_DAYS, such as those of old
+recurring events, are recomputed by a job instead of in the request. Writes
+that send no signals are caught up by the nightly rebuild.
+
+Days are local days, and only days up to today are counted. Endless
+recurring events would otherwise have no last day, so the nightly rebuild
+also adds their new days.
+"""
+
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import models, transaction
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from entries.models import Entry
+from events.models import Event, EventOverride
+from jobs.queue import enqueue
+
+from .models import DailyStats
+
+# Ends are exclusive, the last day is the one just before the end
+TICK = timedelta(microseconds=1)
+
+# The fields that decide what an object counts, by attname
+COUNTED_FIELDS = {
+    Entry: {"author_id", "created_at", "favorite"},
+    Event: {"author_id", "start_time", "end_time", "recurrence"},
+    EventOverride: {
+        "event_id",
+        "original_start",
+        "start_time",
+        "end_time",
+        "cancelled",
+    },
+}
+
+# Stands for the previous version of an object whose counted fields a save
+# left alone
+UNCHANGED = object()
+
+
+def midnight(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def days_of(obj):
+    """
+    Return the first and last day an entry, event or override counts on,
+    cut off at today, or None if it has no day up to today.
+    """
+    if isinstance(obj, Entry):
+        first = last = timezone.localdate(obj.created_at)
+    elif isinstance(obj, Event):
+        first = timezone.localdate(obj.start_time)
+        end = obj.recurrence_end if obj.recurrence else obj.end_time
+        last = None if end is None else timezone.localdate(end - TICK)
+    else:
+        # The occurrence it replaces and where it was moved to
+        event = obj.event
+        original_end = obj.original_start + (event.end_time - event.start_time)
+        first = timezone.localdate(min(obj.original_start, obj.start_time))
+        last = timezone.localdate(max(original_end, obj.end_time) - TICK)
+
+    today = timezone.localdate()
+    if first > today:
+        return None
+    return first, today if last is None else min(last, today)
+
+
+def author_of(obj):
+    return obj.event.author_id if isinstance(obj, EventOverride) else obj.author_id
+
+
+def split_by_day(start, end):
+    """
+    Yield the local days of [start, end) with the seconds on each.
+    """
+    day = timezone.localdate(start)
+    while start < end:
+        day_end = min(end, midnight(day + timedelta(days=1)))
+        yield day, (day_end - start).total_seconds()
+        start, day = day_end, day + timedelta(days=1)
+
+
+def compute(author_id, first, last):
+    """
+    Return the DailyStats of the author's days from first to last, counted
+    from their entries and events.
+    """
+    start, end = midnight(first), midnight(last + timedelta(days=1))
+    days = defaultdict(lambda: {"entry_count": 0, "favorite_count": 0})
+    seconds = defaultdict(float)
+
+    entries = (
+        Entry.objects.filter(author_id=author_id, created_at__gte=start)
+        .filter(created_at__lt=end)
+        .annotate(date=TruncDate("created_at"))
+        .order_by()
+        .values("date")
+        .annotate(
+            entry_count=models.Count("pk"),
+            favorite_count=models.Count("pk", filter=models.Q(favorite=True)),
+        )
+    )
+    for row in entries:
+        days[row["date"]].update(
+            entry_count=row["entry_count"], favorite_count=row["favorite_count"]
+        )
+
+    events = Event.objects.filter(author_id=author_id).overlapping(start, end)
+    for event in events.expand(start, end):
+        for day, duration in split_by_day(
+            max(event.start_time, start), min(event.end_time, end)
+        ):
+            seconds[day] += duration
+
+    return [
+        DailyStats(
+            author_id=author_id,
+            date=day,
+            event_minutes=int(seconds[day] // 60),
+            **days[day],
+        )
+        for day in sorted(days.keys() | seconds.keys())
+    ]
+
+
+def refresh(author_id, first, last):
+    """
+    Recompute the author's days from first to last.
+    """
+    rows = compute(author_id, first, last)
+    with transaction.atomic():
+        DailyStats.objects.filter(
+            author_id=author_id, date__gte=first, date__lte=last
+        ).delete()
+        # A concurrent refresh may have written the same days in between
+        DailyStats.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=["author", "date"],
+            update_fields=["entry_count", "favorite_count", "event_minutes"],
+        )
+
+
+def merge_spans(spans):
+    """
+    Yield (author id, first, last) for (author id, (first, last)) spans,
+    merging the ones of an author that overlap or touch. Spans can be None
+    for objects without days.
+    """
+    by_author = defaultdict(list)
+    for author_id, days in spans:
+        if days is not None:
+            by_author[author_id].append(days)
+
+    for author_id, days in by_author.items():
+        days.sort()
+        first, last = days[0]
+        for next_first, next_last in days[1:]:
+            if next_first > last + timedelta(days=1):
+                yield author_id, first, last
+                first = next_first
+            last = max(last, next_last)
+        yield author_id, first, last
+
+
+def refresh_spans(spans):
+    for author_id, first, last in merge_spans(spans):
+        refresh(author_id, first, last)
+
+
+def refresh_objects(objs):
+    """
+    Refresh the days of the objects, and queue a job for the spans too long
+    to recompute in a request.
+    """
+    queued = []
+    for author_id, first, last in merge_spans(
+        (author_of(obj), days_of(obj)) for obj in objs
+    ):
+        if (last - first).days < settings.STATS_INLINE_REFRESH_DAYS:
+            refresh(author_id, first, last)
+        else:
+            queued.append([author_id, first.isoformat(), last.isoformat()])
+
+    if queued:
+        enqueue("stats.refresh", {"spans": queued})
+
+
+def rebuild(author_ids=None):
+    """
+    Recompute all days of the given users, or of everyone. Returns the
+    number of days written.
+    """
+    users = User.objects.order_by("pk")
+    if author_ids is not None:
+        users = users.filter(pk__in=author_ids)
+
+    written = 0
+    for author_id in users.values_list("pk", flat=True).iterator():
+        firsts = [
+            Entry.objects.filter(author_id=author_id).aggregate(
+                first=models.Min("created_at")
+            )["first"],
+            Event.objects.filter(author_id=author_id).aggregate(
+                first=models.Min("start_time")
+            )["first"],
+        ]
+        firsts = [timezone.localdate(first) for first in firsts if first is not None]
+        today = timezone.localdate()
+
+        with transaction.atomic():
+            DailyStats.objects.filter(author_id=author_id).delete()
+            if firsts and min(firsts) <= today:
+                rows = compute(author_id, min(firsts), today)
+                DailyStats.objects.bulk_create(rows)
+                written += len(rows)
+    return written
+
+
+def entry_changes(before, after):
+    """
+    Return the change in entries and favorites per author and day between
+    two versions of some entries.
+    """
+    changes = defaultdict(lambda: [0, 0])
+    for sign, entries in [(-1, before), (1, after)]:
+        for entry in entries:
+            change = changes[entry.author_id, timezone.localdate(entry.created_at)]
+            change[0] += sign
+            change[1] += sign * entry.favorite
+    return changes
+
+
+def update_entries(before=(), after=()):
+    """
+    Apply the changes between two versions of some entries to the counts,
+    with one query per day.
+    """
+    for (author_id, day), (entries, favorites) in entry_changes(before, after).items():
+        if not entries and not favorites:
+            continue
+
+        rows = DailyStats.objects.filter(author_id=author_id, date=day)
+        updated = rows.update(
+            entry_count=models.F("entry_count") + entries,
+            favorite_count=models.F("favorite_count") + favorites,
+        )
+        if updated:
+            if entries < 0:
+                rows.filter(entry_count=0, event_minutes=0).delete()
+        elif entries > 0 and favorites >= 0:
+            # The first entries of a day without events. Of two concurrent
+            # first entries only one may be counted, until the rebuild.
+            DailyStats.objects.bulk_create(
+                [
+                    DailyStats(
+                        author_id=author_id,
+                        date=day,
+                        entry_count=entries,
+                        favorite_count=favorites,
+                    )
+                ],
+                update_conflicts=True,
+                unique_fields=["author", "date"],
+                update_fields=["entry_count", "favorite_count"],
+            )
+        else:
+            # Counts that were not kept up to date
+            refresh(author_id, day, day)
+
+
+def is_author_deletion(origin):
+    # The rows go too when the author is deleted
+    origin_model = origin.model if isinstance(origin, models.QuerySet) else type(origin)
+    return issubclass(origin_model, User)
+
+
+def remember_previous(sender, instance, update_fields=None, **kwargs):
+    # What changed is only known by comparing with the saved version
+    if instance.pk is None:
+        return
+
+    counted = COUNTED_FIELDS[sender]
+    if update_fields is not None:
+        updated = {sender._meta.get_field(name).attname for name in update_fields}
+        if not counted & updated:
+            instance._previous = UNCHANGED
+            return
+
+    # Models that keep their saved values need no query
+    saved_values = getattr(instance, "saved_values", lambda: None)()
+    if saved_values is not None:
+        previous = sender(**saved_values)
+    else:
+        previous = sender.objects.filter(pk=instance.pk).first()
+
+    if previous is not None and all(
+        getattr(previous, name) == getattr(instance, name) for name in counted
+    ):
+        previous = UNCHANGED
+    instance._previous = previous
+
+
+def pop_previous(instance):
+    previous = instance.__dict__.pop("_previous", None)
+    if previous is UNCHANGED:
+        return previous
+    return [] if previous is None else [previous]
+
+
+def entry_saved(sender, instance, **kwargs):
+    previous = pop_previous(instance)
+    if previous is not UNCHANGED:
+        update_entries(before=previous, after=[instance])
+
+
+def entry_deleted(sender, instance, origin=None, **kwargs):
+    if not is_author_deletion(origin):
+        update_entries(before=[instance])
+
+
+def event_saved(sender, instance, **kwargs):
+    previous = pop_previous(instance)
+    if previous is not UNCHANGED:
+        refresh_objects([*previous, instance])
+
+
+def event_deleted(sender, instance, origin=None, **kwargs):
+    if is_author_deletion(origin):
+        return
+    # Overrides are deleted with their event, whose own days cover them
+    if isinstance(instance, EventOverride) and isinstance(origin, Event):
+        return
+    refresh_objects([instance])
+
+
+def bulk_saved(sender, objs, previous=(), **kwargs):
+    if issubclass(sender, Entry):
+        update_entries(before=previous, after=objs)
+    else:
+        refresh_objects([*previous, *objs])
@@ -0,0 +1,23 @@
+from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_save, pre_save
+
+
+class StatsConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "stats"
+
+    def ready(self):
+        from lifestyle_app_backend.bulk import bulk_saved
+
+        from . import aggregates
+
+        for label, saved, deleted in [
+            ("entries.Entry", aggregates.entry_saved, aggregates.entry_deleted),
+            ("events.Event", aggregates.event_saved, aggregates.event_deleted),
+            ("events.EventOverride", aggregates.event_saved, aggregates.event_deleted),
+        ]:
+            model = self.apps.get_model(label)
+            pre_save.connect(aggregates.remember_previous, sender=model, weak=False)
+            post_save.connect(saved, sender=model, weak=False)
+            post_delete.connect(deleted, sender=model, weak=False)
+            bulk_saved.connect(aggregates.bulk_saved, sender=model, weak=False)
@@ -0,0 +1,16 @@
+import django_filters
+
+from .models import DailyStats
+
+
+class DailyStatsFilter(django_filters.FilterSet):
+    # Inclusive range of local days. "from" is a keyword, so it is declared
+    # through the class namespace.
+    locals()["from"] = django_filters.DateFilter(
+        field_name="date", lookup_expr="gte", label="From"
+    )
+    to = django_filters.DateFilter(field_name="date", lookup_expr="lte", label="To")
+
+    class Meta:
+        model = DailyStats
+        fields = []
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from stats import aggregates
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the daily statistics from the entries and events. Run "
+        "nightly, see CRONJOBS."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user", type=int, action="append", help="Only this user id."
+        )
+
+    def handle(self, *args, **options):
+        written = aggregates.rebuild(options["user"])
+
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} days."))
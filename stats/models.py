@@ -0,0 +1,25 @@
+from django.contrib.auth.models import User
+from django.db import models
+
+
+class DailyStats(models.Model):
+    """
+    A user's activity on one local day, kept up to date from their entries
+    and events by stats.aggregates. Days without activity have no row.
+    """
+
+    author = models.ForeignKey(User, on_delete=models.CASCADE)
+    date = models.DateField()
+    entry_count = models.PositiveIntegerField(default=0)
+    favorite_count = models.PositiveIntegerField(default=0)
+    # Time covered by events and their occurrences, summed per event
+    event_minutes = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            # Also the index of the date range queries
+            models.UniqueConstraint(
+                fields=["author", "date"], name="daily_stats_author_date"
+            ),
+        ]
+        ordering = ["date"]
@@ -0,0 +1,9 @@
+from rest_framework import serializers
+
+from .models import DailyStats
+
+
+class DailyStatsSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DailyStats
+        fields = ["date", "entry_count", "favorite_count", "event_minutes"]
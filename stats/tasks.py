@@ -0,0 +1,18 @@
+from datetime import date
+
+from jobs.queue import register
+
+from . import aggregates
+
+
+@register("stats.refresh")
+def refresh_days(job):
+    """
+    Recompute spans of days that were too long to recompute in the request
+    that changed them.
+    """
+    for author_id, first, last in job.params["spans"]:
+        aggregates.refresh(
+            author_id, date.fromisoformat(first), date.fromisoformat(last)
+        )
+    return {"spans": len(job.params["spans"])}
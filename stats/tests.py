@@ -0,0 +1,173 @@
+from datetime import date, datetime, timedelta, timezone
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import localdate
+from rest_framework.test import APIClient
+
+from entries.models import Entry
+from events.models import Event
+from jobs import queue
+from jobs.models import Job
+
+from .models import DailyStats
+
+
+def at(day, hour=0, minute=0):
+    # Helsinki is two hours ahead of UTC in March 2025, until the 30th
+    return datetime(2025, 3, day, hour, minute, tzinfo=timezone.utc)
+
+
+class DailyStatsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="tester", password="secret")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def days(self):
+        return {
+            row.date: (row.entry_count, row.favorite_count, row.event_minutes)
+            for row in DailyStats.objects.filter(author=self.user)
+        }
+
+    def event(self, start_time, end_time, **kwargs):
+        return Event.objects.create(
+            title="Event",
+            start_time=start_time,
+            end_time=end_time,
+            author=self.user,
+            **kwargs,
+        )
+
+    def test_entries_are_counted(self):
+        first = Entry.objects.create(title="One", body="", author=self.user)
+        Entry.objects.create(title="Two", body="", author=self.user, favorite=True)
+        self.assertEqual(self.days(), {localdate(): (2, 1, 0)})
+
+        self.client.post(f"/entries/{first.pk}/toggle_favorite/")
+        self.assertEqual(self.days(), {localdate(): (2, 2, 0)})
+
+        Entry.objects.all().delete()
+        self.assertEqual(self.days(), {})
+
+    def test_bulk_writes_are_counted(self):
+        items = [
+            {"title": str(index), "body": "Body", "author": self.user.pk}
+            for index in range(3)
+        ]
+        self.client.post("/entries/bulk/", items, format="json")
+        self.assertEqual(self.days(), {localdate(): (3, 0, 0)})
+
+        self.client.post("/entries/bulk/favorite/", {"favorite": True}, format="json")
+        self.assertEqual(self.days(), {localdate(): (3, 3, 0)})
+
+    def test_events_are_split_by_local_day(self):
+        # 23:00 to 01:30 Helsinki time
+        event = self.event(at(3, 21), at(3, 23, 30))
+        self.assertEqual(
+            self.days(), {date(2025, 3, 3): (0, 0, 60), date(2025, 3, 4): (0, 0, 90)}
+        )
+
+        event.start_time, event.end_time = at(5, 8), at(5, 9)
+        event.save()
+        self.assertEqual(self.days(), {date(2025, 3, 5): (0, 0, 60)})
+
+        event.delete()
+        self.assertEqual(self.days(), {})
+
+    def test_recurring_events_are_counted_per_occurrence(self):
+        event = self.event(at(3, 8), at(3, 9), recurrence="FREQ=DAILY;COUNT=3")
+        event.overrides.create(
+            original_start=at(4, 8), start_time=at(6, 8), end_time=at(6, 8, 30)
+        )
+
+        self.assertEqual(
+            self.days(),
+            {
+                date(2025, 3, 3): (0, 0, 60),
+                date(2025, 3, 5): (0, 0, 60),
+                date(2025, 3, 6): (0, 0, 30),
+            },
+        )
+
+    def test_endless_series_are_counted_up_to_today(self):
+        start = datetime.now(timezone.utc) - timedelta(days=2, hours=1)
+        self.event(start, start + timedelta(minutes=10), recurrence="FREQ=DAILY")
+
+        self.assertEqual(len(self.days()), 3)
+        self.assertLessEqual(max(self.days()), localdate())
+
+    def test_long_spans_are_refreshed_by_a_job(self):
+        start = datetime.now(timezone.utc) - timedelta(days=99, hours=1)
+        event = self.event(
+            start, start + timedelta(minutes=10), recurrence="FREQ=DAILY"
+        )
+        self.assertEqual(self.days(), {})
+
+        queue.run_next()
+        self.assertEqual(len(self.days()), 100)
+
+        event = Event.objects.get(pk=event.pk)
+        event.start_time += timedelta(minutes=5)
+        event.save()
+        self.assertEqual(Job.objects.filter(status=Job.QUEUED).count(), 1)
+
+    def test_saves_that_keep_the_times_refresh_nothing(self):
+        event = self.event(at(3, 8), at(3, 9), recurrence="FREQ=DAILY")
+        event = Event.objects.get(pk=event.pk)
+
+        event.title = "Renamed"
+        with CaptureQueriesContext(connection) as queries:
+            event.save()
+        event.description = "Described"
+        event.save(update_fields=["description"])
+
+        # The previous version comes from the loaded values
+        self.assertFalse(
+            [query for query in queries if query["sql"].startswith("SELECT")]
+        )
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_rebuild_matches_incremental_updates(self):
+        self.event(at(3, 21), at(3, 23, 30))
+        self.event(at(3, 8), at(3, 9), recurrence="FREQ=WEEKLY;COUNT=4")
+        Entry.objects.create(title="One", body="", author=self.user)
+        expected = self.days()
+
+        DailyStats.objects.all().delete()
+        call_command("rebuild_stats", stdout=StringIO())
+
+        self.assertEqual(self.days(), expected)
+        self.assertEqual(len(expected), 6)
+
+    def test_endpoint(self):
+        other = User.objects.create_user(username="other", password="secret")
+        self.event(at(3, 8), at(3, 9))
+        self.event(at(5, 8), at(5, 9))
+        Event.objects.create(
+            title="Other", start_time=at(4, 8), end_time=at(4, 9), author=other
+        )
+
+        response = self.client.get(
+            "/stats/daily/", {"from": "2025-03-01", "to": "2025-03-04"}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json(),
+            [
+                {
+                    "date": "2025-03-03",
+                    "entry_count": 0,
+                    "favorite_count": 0,
+                    "event_minutes": 60,
+                }
+            ],
+        )
+        self.assertEqual(
+            self.client.get("/stats/daily/", {"from": "March"}).status_code, 400
+        )
@@ -0,0 +1,34 @@
+from django_filters.rest_framework import DjangoFilterBackend
+from drf_spectacular.utils import extend_schema
+from rest_framework import generics
+from rest_framework.permissions import IsAuthenticated
+
+from .filters import DailyStatsFilter
+from .models import DailyStats
+from .serializers import DailyStatsSerializer
+
+
+class DailyStatsView(generics.ListAPIView):
+    """
+    The user's entry counts and event minutes per day, for activity charts
+    and streaks. Read from the daily aggregates, so the cost grows with the
+    number of days and not with the number of entries.
+    """
+
+    serializer_class = DailyStatsSerializer
+    permission_classes = [IsAuthenticated]
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = DailyStatsFilter
+    pagination_class = None
+
+    def get_queryset(self):
+        return DailyStats.objects.filter(author=self.request.user.pk)
+
+    @extend_schema(
+        summary="Activity per day",
+        description="Returns the days from `from` to `to` (inclusive, local "
+        "dates) on which the user wrote entries or had events. Days without "
+        "activity are left out.",
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
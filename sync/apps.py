@@ -0,0 +1,15 @@
+from django.apps import AppConfig
+from django.db.models.signals import post_delete
+
+
+class SyncConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "sync"
+
+    def ready(self):
+        from .models import record_deletion
+
+        for label in ["entries.Entry", "events.Event"]:
+            post_delete.connect(
+                record_deletion, sender=self.apps.get_model(label), weak=False
+            )
@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from sync.models import Tombstone
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete tombstones older than SYNC_TOMBSTONE_RETENTION. Run nightly, "
+        "see CRONJOBS."
+    )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - settings.SYNC_TOMBSTONE_RETENTION
+        deleted, _ = Tombstone.objects.filter(deleted_at__lt=cutoff).delete()
+
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} tombstones."))
@@ -0,0 +1,37 @@
+from django.contrib.auth.models import User
+from django.db import models
+
+
+class Tombstone(models.Model):
+    """
+    Records that an entry or event was deleted, so sync can tell clients.
+    """
+
+    KINDS = {"entries.entry": "entry", "events.event": "event"}
+
+    kind = models.CharField(
+        max_length=16, choices=[(kind, kind) for kind in KINDS.values()]
+    )
+    object_id = models.BigIntegerField()
+    author = models.ForeignKey(User, on_delete=models.CASCADE)
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["author", "deleted_at"], name="tombstone_author_deleted_idx"
+            ),
+        ]
+
+
+def record_deletion(sender, instance, origin=None, **kwargs):
+    # Nobody is left to sync with when the author themselves is deleted
+    origin_model = origin.model if isinstance(origin, models.QuerySet) else type(origin)
+    if issubclass(origin_model, User):
+        return
+
+    Tombstone.objects.create(
+        kind=Tombstone.KINDS[sender._meta.label_lower],
+        object_id=instance.pk,
+        author_id=instance.author_id,
+    )
@@ -0,0 +1,13 @@
+from rest_framework import serializers
+
+
+class SyncChangesSerializer(serializers.Serializer):
+    changed = serializers.ListField(child=serializers.DictField())
+    deleted = serializers.ListField(child=serializers.IntegerField())
+
+
+class SyncSerializer(serializers.Serializer):
+    watermark = serializers.CharField()
+    reset = serializers.BooleanField()
+    entries = SyncChangesSerializer()
+    events = SyncChangesSerializer()
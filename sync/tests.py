@@ -0,0 +1,149 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core import signing
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from entries.models import Entry
+from events.models import Event
+
+from .models import Tombstone
+from .views import WATERMARK_SALT
+
+
+class SyncTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="tester", password="secret")
+        self.other = User.objects.create_user(username="other", password="secret")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.entry = Entry.objects.create(title="Entry", body="Body", author=self.user)
+        Entry.objects.create(title="Theirs", body="Body", author=self.other)
+        now = timezone.now()
+        self.event = Event.objects.create(
+            title="Event",
+            start_time=now,
+            end_time=now + timedelta(hours=1),
+            author=self.user,
+        )
+
+    def sync(self, watermark=None):
+        params = {"watermark": watermark} if watermark else {}
+        response = self.client.get("/sync/", params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def later(self, seconds):
+        # Moves the clock past the sync overlap
+        return mock.patch(
+            "django.utils.timezone.now",
+            return_value=timezone.now() + timedelta(seconds=seconds),
+        )
+
+    def test_first_sync_returns_everything(self):
+        data = self.sync()
+
+        self.assertTrue(data["reset"])
+        self.assertEqual(
+            [item["id"] for item in data["entries"]["changed"]], [self.entry.pk]
+        )
+        self.assertEqual(
+            [item["id"] for item in data["events"]["changed"]], [self.event.pk]
+        )
+
+    def test_sync_returns_only_changes_since_watermark(self):
+        with self.later(60):
+            watermark = self.sync()["watermark"]
+
+        with self.later(120):
+            self.entry.title = "Changed"
+            self.entry.save()
+            new = Entry.objects.create(title="New", body="Body", author=self.user)
+            Entry.objects.create(title="Not mine", body="Body", author=self.other)
+            event_pk = self.event.pk
+            self.event.delete()
+
+            with self.assertNumQueries(4):
+                data = self.sync(watermark)
+
+        self.assertFalse(data["reset"])
+        self.assertEqual(
+            [item["id"] for item in data["entries"]["changed"]], [self.entry.pk, new.pk]
+        )
+        self.assertEqual(data["entries"]["deleted"], [])
+        self.assertEqual(data["events"]["changed"], [])
+        self.assertEqual(data["events"]["deleted"], [event_pk])
+
+    def test_sync_without_changes_is_empty(self):
+        with self.later(60):
+            watermark = self.sync()["watermark"]
+
+        with self.later(120):
+            data = self.sync(watermark)
+
+        self.assertEqual(data["entries"], {"changed": [], "deleted": []})
+        self.assertEqual(data["events"], {"changed": [], "deleted": []})
+
+    def test_sync_overlaps_previous_watermark(self):
+        watermark = self.sync()["watermark"]
+
+        # Written just before the watermark, but possibly committed after it
+        data = self.sync(watermark)
+
+        self.assertEqual(
+            [item["id"] for item in data["entries"]["changed"]], [self.entry.pk]
+        )
+
+    @override_settings(SYNC_TOMBSTONE_RETENTION=timedelta(days=1))
+    def test_expired_watermark_resets(self):
+        watermark = self.sync()["watermark"]
+
+        with self.later(2 * 24 * 60 * 60):
+            data = self.sync(watermark)
+
+        self.assertTrue(data["reset"])
+        self.assertEqual(len(data["entries"]["changed"]), 1)
+
+    def test_invalid_watermark(self):
+        forged = signing.dumps(timezone.now().isoformat(), salt="other")
+
+        for watermark in [forged, "garbage"]:
+            response = self.client.get("/sync/", {"watermark": watermark})
+            self.assertEqual(response.status_code, 400)
+
+    def test_watermark_is_signed_server_time(self):
+        with self.later(0) as now:
+            watermark = self.sync()["watermark"]
+
+        self.assertEqual(
+            signing.loads(watermark, salt=WATERMARK_SALT),
+            now.return_value.isoformat(),
+        )
+
+    def test_deleting_user_leaves_no_tombstones(self):
+        self.entry.delete()
+        self.assertEqual(Tombstone.objects.filter(author=self.user).count(), 1)
+
+        self.user.delete()
+        User.objects.filter(pk=self.other.pk).delete()
+
+        self.assertFalse(Tombstone.objects.exists())
+
+    def test_purge_tombstones(self):
+        self.entry.delete()
+        Tombstone.objects.update(deleted_at=timezone.now() - timedelta(days=365))
+        event_pk = self.event.pk
+        self.event.delete()
+
+        call_command("purge_tombstones", stdout=StringIO())
+
+        self.assertEqual(
+            list(Tombstone.objects.values_list("object_id", flat=True)),
+            [event_pk],
+        )
@@ -0,0 +1,90 @@
+from django.conf import settings
+from django.core import signing
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from drf_spectacular.utils import OpenApiParameter, extend_schema
+
+from entries.models import Entry
+from entries.serializers import EntrySerializer
+from events.models import Event
+from events.serializers import EventSerializer
+from .models import Tombstone
+from .serializers import SyncSerializer
+
+WATERMARK_SALT = "sync.watermark"
+
+
+class SyncView(APIView):
+    """
+    Delta sync of the user's own entries and events.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        summary="Changes since a watermark",
+        description="Returns the user's entries and events that were created, "
+        "modified or deleted since the watermark of an earlier sync, and a new "
+        "watermark. Without a watermark, or with one older than the tombstone "
+        "retention, everything is returned and reset is true.",
+        parameters=[OpenApiParameter("watermark", str, required=False)],
+        responses={
+            200: SyncSerializer,
+            400: {"type": "object", "properties": {"error": {"type": "string"}}},
+        },
+    )
+    def get(self, request):
+        now = timezone.now()
+        since = None
+
+        watermark = request.query_params.get("watermark")
+        if watermark:
+            try:
+                since = parse_datetime(signing.loads(watermark, salt=WATERMARK_SALT))
+            except (signing.BadSignature, TypeError, ValueError):
+                return Response(
+                    {"error": "Invalid watermark"}, status=status.HTTP_400_BAD_REQUEST
+                )
+
+        # Deletions older than the retention are gone, so start over
+        reset = since is None or since < now - settings.SYNC_TOMBSTONE_RETENTION
+        if not reset:
+            # Rows get their updated_at before their transaction commits, so
+            # look back a little to catch writes that were still in flight
+            since -= settings.SYNC_OVERLAP
+
+        return Response(
+            {
+                "watermark": signing.dumps(now.isoformat(), salt=WATERMARK_SALT),
+                "reset": reset,
+                "entries": self.get_changes(
+                    request.user.pk, Entry, EntrySerializer, "entry", since, reset
+                ),
+                "events": self.get_changes(
+                    request.user.pk, Event, EventSerializer, "event", since, reset
+                ),
+            }
+        )
+
+    def get_changes(self, user_id, model, serializer_class, kind, since, reset):
+        queryset = model.objects.filter(author=user_id).order_by("updated_at", "pk")
+        if reset:
+            return {
+                "changed": serializer_class(queryset, many=True).data,
+                "deleted": [],
+            }
+
+        changed = queryset.filter(updated_at__gt=since)
+        deleted = Tombstone.objects.filter(
+            author=user_id, kind=kind, deleted_at__gt=since
+        ).values_list("object_id", flat=True)
+
+        return {
+            "changed": serializer_class(changed, many=True).data,
+            "deleted": list(deleted),
+        }
@@ -1,6 +1,15 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_save
 
 
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users'
+
+    def ready(self):
+        from django.contrib.auth.models import User
+
+        from lifestyle_app_backend.authentication import forget_status
+
+        post_save.connect(forget_status, sender=User, weak=False)
+        post_delete.connect(forget_status, sender=User, weak=False)
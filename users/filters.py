@@ -0,0 +1,35 @@
+import django_filters
+from django.contrib.auth.models import User
+
+
+class PrefixFilter(django_filters.CharFilter):
+    """
+    Filters a text field by the values that start with the given prefix,
+    case-sensitively.
+
+    The prefix is turned into a range [prefix, next prefix) instead of a
+    `__startswith` lookup, which is a LIKE that SQLite can't answer from an
+    index on the column.
+    """
+
+    def filter(self, qs, value):
+        if value in django_filters.constants.EMPTY_VALUES:
+            return qs
+
+        lookups = {f"{self.field_name}__gte": value}
+        # The first value past the prefix, none if it ends in the last
+        # code point
+        stem = value.rstrip(chr(0x10FFFF))
+        if stem:
+            lookups[f"{self.field_name}__lt"] = stem[:-1] + chr(ord(stem[-1]) + 1)
+
+        return self.get_method(qs)(**lookups)
+
+
+class UserFilter(django_filters.FilterSet):
+    username = PrefixFilter(field_name="username", label="Username starts with")
+    email = PrefixFilter(field_name="email", label="Email starts with")
+
+    class Meta:
+        model = User
+        fields = ["username", "email"]
@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.contrib.auth.hashers import must_update_salt
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    """
+    Argon2id with the OWASP minimum of 19 MiB, two passes and one lane.
+    Django's default of 100 MiB over eight lanes costs several times the CPU
+    per login for little extra strength on a single core.
+    """
+
+    time_cost = 2
+    memory_cost = 19456
+    parallelism = 1
+
+    def must_update(self, encoded):
+        # Only to stronger parameters, so hashes made with Django's defaults
+        # are kept
+        decoded = self.decode(encoded)
+        params = self.params()
+        return (
+            decoded["params"].type != params.type
+            or decoded["time_cost"] < self.time_cost
+            or decoded["memory_cost"] < self.memory_cost
+            or must_update_salt(decoded["salt"], self.salt_entropy)
+        )
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """
+    PBKDF2-SHA256 with PASSWORD_PBKDF2_ITERATIONS, used without argon2-cffi.
+    """
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_PBKDF2_ITERATIONS
+
+    def must_update(self, encoded):
+        # Only to more iterations, lowering the setting never weakens hashes
+        decoded = self.decode(encoded)
+        return decoded["iterations"] < self.iterations or must_update_salt(
+            decoded["salt"], self.salt_entropy
+        )
@@ -12,6 +12,9 @@ class UserSerializer(serializers.ModelSerializer):
             "password": {"write_only": True}
         }  # Don't expose password in response
 
+    # Lists of users are built from values() rows, see representation.py
+    values_extras = {}
+
     def create(self, validated_data):
         user = User.objects.create_user(  # Creates a user with hashed password
             username=validated_data["username"],
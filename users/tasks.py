@@ -0,0 +1,74 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.deletion import Collector
+
+from entries.models import Entry
+from events.models import Event
+from jobs.models import Job
+from jobs.queue import enqueue, register, report
+
+
+def delete_in_batches(queryset, origin, batch_size):
+    """
+    Delete the rows of a queryset a batch per transaction, and yield the
+    number deleted so far after each batch. Signal receivers get `origin`,
+    as when the rows are deleted with it.
+    """
+    deleted = 0
+    while batch := list(queryset.order_by("pk")[:batch_size]):
+        collector = Collector(using=queryset.db, origin=origin)
+        collector.collect(batch)
+        collector.delete()
+        deleted += len(batch)
+        yield deleted
+
+
+@register("users.delete")
+def delete_user(job):
+    """
+    Delete a user's entries and events in batches, then the user with the
+    rest of their rows. A user with years of entries would otherwise hold
+    the database for seconds in one transaction.
+    """
+    progress = {"entries": 0, "events": 0, **job.progress}
+    user = User.objects.filter(pk=job.params["user_id"]).first()
+    if user is None:
+        # Deleted by an earlier run
+        return progress
+
+    for key, model in [("entries", Entry), ("events", Event)]:
+        done = progress[key]
+        rows = model.objects.filter(author=user)
+        for deleted in delete_in_batches(rows, user, settings.USER_DELETE_BATCH_SIZE):
+            progress[key] = done + deleted
+            report(job, **progress)
+
+    user.delete()
+    return progress
+
+
+def start_deletion(user_id, created_by=None):
+    """
+    Deactivate a user and queue their deletion, or return the deletion that
+    is already queued or running. Raises User.DoesNotExist.
+
+    Deactivated users can't sign in, and their tokens are rejected, so they
+    can't add rows while the job runs. Users who delete themselves can't
+    follow the job either.
+    """
+    with transaction.atomic():
+        # Concurrent requests queue one job
+        user = User.objects.select_for_update().get(pk=user_id)
+        if user.is_active:
+            user.is_active = False
+            user.save(update_fields=["is_active"])
+
+        job = Job.objects.filter(
+            kind="users.delete",
+            params__user_id=user.pk,
+            status__in=[Job.QUEUED, Job.RUNNING],
+        ).first()
+        if job is None:
+            job = enqueue("users.delete", {"user_id": user.pk}, created_by=created_by)
+    return job
@@ -1,3 +1,310 @@
-from django.test import TestCase
+from django.contrib.auth.models import User
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import authenticate, hashers
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from entries.models import Entry
+from events.models import Event, EventOverride
+from jobs import queue
+from jobs.models import Job
+from lifestyle_app_backend import authentication
+from stats.models import DailyStats
+from sync.models import Tombstone
+
+from . import tasks
+from .filters import UserFilter
+
+
+class UserConditionalGetTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="tester", email="tester@example.com", password="secret"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = f"/users/{self.user.pk}/"
+
+    def test_user_answers_if_none_match(self):
+        etag = self.client.get(self.url)["ETag"]
+
+        response = self.client.get(self.url, headers={"if-none-match": etag})
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_etag_changes_with_user(self):
+        etag = self.client.get(self.url)["ETag"]
+
+        self.client.patch(self.url, {"email": "new@example.com"})
+        response = self.client.get(self.url, headers={"if-none-match": etag})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["email"], "new@example.com")
+
+    def test_async_view_matches(self):
+        client = APIClient(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}"
+        )
+
+        for pk in [self.user.pk, 999]:
+            expected = client.get(f"/users/{pk}/")
+            response = client.get(f"/users/async/{pk}/")
+
+            self.assertEqual(response.status_code, expected.status_code)
+            self.assertEqual(response.content, expected.content)
+            self.assertEqual(response.get("ETag"), expected.get("ETag"))
+
+
+class StatelessAuthenticationTests(TestCase):
+    def setUp(self):
+        authentication.get_cache().clear()
+        self.user = User.objects.create_user(username="tester", password="secret")
+        self.client = APIClient(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}"
+        )
+
+    def user_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return [query for query in queries if "auth_user" in query["sql"]]
+
+    def test_user_is_not_loaded(self):
+        self.assertEqual(len(self.user_queries("/entries/")), 1)
+        self.assertEqual(self.user_queries("/entries/"), [])
+        self.assertEqual(self.user_queries("/entries/async/"), [])
+
+    def test_inactive_and_deleted_users_are_rejected(self):
+        self.client.get("/entries/")
+
+        self.user.is_active = False
+        self.user.save()
+        for url in ["/entries/", "/entries/async/"]:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 401)
+            self.assertEqual(response.json()["code"], "user_inactive")
+
+        self.user.delete()
+        for url in ["/entries/", "/entries/async/"]:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 401)
+            self.assertEqual(response.json()["code"], "user_not_found")
+
+    def test_admin_views_load_user(self):
+        self.assertEqual(self.client.get("/cache/stats/").status_code, 403)
+
+        self.user.is_staff = True
+        self.user.save()
+        self.assertEqual(self.client.get("/cache/stats/").status_code, 200)
+
+    def test_change_password_loads_user(self):
+        response = self.client.post(
+            "/users/change-password/",
+            {"old_password": "secret", "new_password": "n3w-Secret-pw"},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 204)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password("n3w-Secret-pw"))
+
+
+@override_settings(PASSWORD_PBKDF2_ITERATIONS=1000)
+class LoginTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="tester", password="secret")
+        self.client = APIClient()
+
+    def login(self, password, username="tester", **extra):
+        return self.client.post(
+            "/users/login/",
+            {"username": username, "password": password},
+            format="json",
+            **extra,
+        )
+
+    def set_pbkdf2_password(self, iterations):
+        hasher = hashers.PBKDF2PasswordHasher()
+        hasher.iterations = iterations
+        self.user.password = hashers.make_password("secret", hasher=hasher)
+        self.user.save()
+
+    def test_password_is_rehashed_at_login(self):
+        self.set_pbkdf2_password(500)
+
+        self.assertEqual(self.login("secret").status_code, 200)
+
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith("pbkdf2_sha256$1000$"))
+
+    def test_stronger_hashes_are_kept(self):
+        self.set_pbkdf2_password(2000)
+
+        self.assertEqual(self.login("secret").status_code, 200)
+
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith("pbkdf2_sha256$2000$"))
+
+    def test_failed_logins_are_throttled(self):
+        for _ in range(10):
+            self.assertEqual(self.login("wrong").status_code, 401)
+
+        with mock.patch("users.views.authenticate", wraps=authenticate) as check:
+            response = self.login("secret")
+            # Other IP addresses are throttled for the username too
+            self.assertEqual(
+                self.login("secret", REMOTE_ADDR="10.0.0.2").status_code, 429
+            )
+            check.assert_not_called()
+
+        self.assertEqual(response.status_code, 429)
+        self.assertIn("Retry-After", response)
+        self.assertEqual(self.login("wrong", username="other").status_code, 401)
+
+    def test_failed_logins_are_throttled_per_ip(self):
+        for index in range(30):
+            self.assertEqual(
+                self.login("wrong", username=f"user{index}").status_code, 401
+            )
+
+        self.assertEqual(self.login("secret").status_code, 429)
+        self.assertEqual(self.login("secret", REMOTE_ADDR="10.0.0.2").status_code, 200)
+
+    def test_successful_logins_are_not_counted(self):
+        for _ in range(12):
+            self.assertEqual(self.login("secret").status_code, 200)
+
+
+class AllUsersTests(TestCase):
+    def setUp(self):
+        self.users = [
+            User.objects.create_user(
+                username=f"user{index}", email=f"user{index}@example.com"
+            )
+            for index in range(5)
+        ]
+        self.users.append(
+            User.objects.create_user(username="other", email="other@example.org")
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.users[0])
+
+    def test_pages_follow_id(self):
+        ids = []
+        url = "/users/?page_size=2"
+        while url:
+            with self.assertNumQueries(1):
+                data = self.client.get(url).json()
+            ids += [user["id"] for user in data["results"]]
+            url = data["next"]
+
+        self.assertEqual(ids, [user.pk for user in self.users])
+
+    def test_fields(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/users/", {"fields": "username"})
+
+        self.assertEqual(response.json()["results"][0], {"username": "user0"})
+        self.assertNotIn("email", queries[0]["sql"])
+
+        with override_settings(VALUES_LIST_RESPONSES=False):
+            response = self.client.get("/users/", {"fields": "email,id"})
+        self.assertEqual(
+            response.json()["results"][0],
+            {"id": self.users[0].pk, "email": "user0@example.com"},
+        )
+
+        for fields in ["password", "username,nonsense", ""]:
+            response = self.client.get("/users/", {"fields": fields})
+            self.assertEqual(response.status_code, 400)
+
+    def test_prefix(self):
+        response = self.client.get("/users/", {"username": "user"})
+        self.assertEqual(len(response.json()["results"]), 5)
+
+        response = self.client.get("/users/", {"email": "other@"})
+        self.assertEqual(
+            [user["username"] for user in response.json()["results"]], ["other"]
+        )
+
+    def test_prefix_uses_index(self):
+        queryset = UserFilter({"email": "user"}, queryset=User.objects.all()).qs
+
+        self.assertIn("auth_user_email_idx", queryset.explain())
+
+
+class UserDeletionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="tester", password="secret")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        for index in range(5):
+            Entry.objects.create(title=f"Entry {index}", body="", author=self.user)
+        start = timezone.now() - timedelta(days=3)
+        for index in range(3):
+            event = Event.objects.create(
+                title=f"Event {index}",
+                start_time=start,
+                end_time=start + timedelta(hours=1),
+                recurrence="FREQ=DAILY;COUNT=3",
+                author=self.user,
+            )
+        event.overrides.create(
+            original_start=start + timedelta(days=1),
+            start_time=start,
+            end_time=start + timedelta(hours=2),
+        )
+        Entry.objects.first().delete()
+
+    def test_user_is_deleted_by_a_job(self):
+        response = self.client.delete(f"/users/{self.user.pk}/")
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response["Location"], f"/jobs/{response.json()['id']}/")
+        self.assertEqual(response.json()["status"], "queued")
+        self.assertEqual(Entry.objects.filter(author=self.user).count(), 4)
+
+        with self.settings(USER_DELETE_BATCH_SIZE=2), mock.patch.object(
+            tasks, "report", wraps=queue.report
+        ) as report:
+            call_command("run_jobs", once=True, stdout=StringIO())
+
+        # Two batches of entries and two of events
+        self.assertEqual(report.call_count, 4)
+        job = Job.objects.get()
+        self.assertEqual(job.status, Job.DONE)
+        self.assertEqual(job.result, {"entries": 4, "events": 3})
+        self.assertFalse(User.objects.filter(pk=self.user.pk).exists())
+        for model in [Entry, Event, EventOverride, DailyStats, Tombstone]:
+            self.assertFalse(model.objects.exists(), model)
+
+    def test_user_is_deactivated_at_once(self):
+        client = APIClient(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}"
+        )
+        self.assertEqual(client.get("/entries/").status_code, 200)
+
+        first = client.delete(f"/users/{self.user.pk}/")
+        second = self.client.delete(f"/users/{self.user.pk}/")
+
+        self.assertEqual(first.json()["id"], second.json()["id"])
+        self.assertEqual(Job.objects.count(), 1)
+        self.assertEqual(client.get("/entries/").status_code, 401)
+        self.assertIsNone(authenticate(username="tester", password="secret"))
+
+    def test_unknown_user(self):
+        response = self.client.delete("/users/999/")
+
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(Job.objects.exists())
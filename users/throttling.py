@@ -0,0 +1,59 @@
+from hashlib import sha256
+
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class LoginFailureThrottle(SimpleRateThrottle):
+    """
+    Limits failed logins. Unlike the DRF throttles, requests are not counted
+    when they are let through, the view records failures with failed(), so
+    users who log in successfully are never throttled.
+
+    Throttles are checked before the view runs, so throttled requests do no
+    password hashing.
+    """
+
+    def load_history(self, request, view):
+        self.key = self.get_cache_key(request, view) if self.rate else None
+        if self.key is None:
+            return False
+
+        self.history = self.cache.get(self.key, [])
+        self.now = self.timer()
+        while self.history and self.history[-1] <= self.now - self.duration:
+            self.history.pop()
+        return True
+
+    def allow_request(self, request, view):
+        if not self.load_history(request, view):
+            return True
+        if len(self.history) >= self.num_requests:
+            return self.throttle_failure()
+        return True
+
+    def failed(self, request, view):
+        if self.load_history(request, view):
+            self.throttle_success()
+
+
+class LoginIPThrottle(LoginFailureThrottle):
+    scope = "login_ip"
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {
+            "scope": self.scope,
+            "ident": self.get_ident(request),
+        }
+
+
+class LoginUsernameThrottle(LoginFailureThrottle):
+    scope = "login_username"
+
+    def get_cache_key(self, request, view):
+        username = request.data.get("username")
+        if not isinstance(username, str) or not username:
+            return None
+        # Usernames are case sensitive, but guessing at one account should
+        # not get more tries by changing the case. Hashed to a safe cache key.
+        ident = sha256(username.lower().encode()).hexdigest()
+        return self.cache_format % {"scope": self.scope, "ident": ident}
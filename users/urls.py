@@ -6,6 +6,7 @@ from .views import (
     CustomTokenRefreshView,
     UserViewSet,
     AllUsersView,
+    AsyncUserView,
     ChangePasswordView,
 )
 
@@ -20,6 +21,8 @@ urlpatterns = [
     path("token/refresh/", CustomTokenRefreshView.as_view(), name="token-refresh"),
     # Basic user functions
     path("<int:pk>/", UserViewSet.as_view(), name="user-functions"),
+    # Async version of getting a user, for ASGI
+    path("async/<int:pk>/", AsyncUserView.as_view(), name="user-async"),
     path(
         "change-password/",
         ChangePasswordView.as_view(),
@@ -1,8 +1,12 @@
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate
 from django.conf import settings
+from django.urls import reverse
 
+from . import tasks
+from .filters import UserFilter
 from .serializers import UserSerializer, ChangePasswordSerializer
+from .throttling import LoginIPThrottle, LoginUsernameThrottle
 from datetime import timedelta
 
 from rest_framework import status, generics
@@ -10,13 +14,30 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework_simplejwt.views import TokenRefreshView
 from rest_framework_simplejwt.tokens import AccessToken
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenObtainPairView
 
+from django_filters.rest_framework import DjangoFilterBackend
 from drf_spectacular.utils import extend_schema, OpenApiResponse
 
+from jobs.serializers import JobSerializer
+from lifestyle_app_backend.asyncviews import AsyncAPIView
+from lifestyle_app_backend.conditional import (
+    aconditional_response,
+    conditional_response,
+    make_etag,
+)
+from lifestyle_app_backend.pagination import KeysetPagination
+from lifestyle_app_backend.representation import (
+    SPARSE_FIELDS_PARAMETERS,
+    SparseFieldsMixin,
+    ValuesRepresentation,
+)
+from lifestyle_app_backend.routers import ReplicaReadMixin
+
 
 class RegisterUserView(generics.CreateAPIView):
     serializer_class = UserSerializer  # Associating the view with the UserSerializer
@@ -28,6 +49,8 @@ class LoginUserView(TokenObtainPairView):
     authentication_classes = (
         []
     )  # We don't require authentication to get the token (login)
+    # Too many failed logins are rejected before any password is hashed
+    throttle_classes = [LoginIPThrottle, LoginUsernameThrottle]
 
     def post(self, request, *args, **kwargs):
         # Get username and password from the request
@@ -41,6 +64,8 @@ class LoginUserView(TokenObtainPairView):
         user = authenticate(request, username=username, password=password)
 
         if user is None:
+            for throttle in self.get_throttles():
+                throttle.failed(request, self)
             raise AuthenticationFailed("Invalid username or password")
 
         # Create JWT tokens for the authenticated user
@@ -128,38 +153,51 @@ class CustomTokenRefreshView(TokenRefreshView):
         return response
 
 
-class AllUsersView(APIView):
+class UserPagination(KeysetPagination):
+    # Keyset cursors on the id, in the order users signed up
+    ordering = ("pk",)
+
+
+class AllUsersView(ReplicaReadMixin, SparseFieldsMixin, generics.ListAPIView):
     """
     Views for all users.
     """
 
     permission_classes = [IsAuthenticated]
+    queryset = User.objects.all()
     serializer_class = UserSerializer
+    pagination_class = UserPagination
+    filter_backends = (DjangoFilterBackend,)
+    filterset_class = UserFilter
 
     @extend_schema(
-        summary="Retrieve a list of all users",
-        description="This endpoint returns all users from the system.",
-        responses={
-            200: UserSerializer(many=True),
-            401: {"type": "object", "properties": {"error": {"type": "string"}}},
-        },
+        summary="Retrieve a page of users",
+        description=(
+            "This endpoint returns the users of the system a page at a time, "
+            "optionally only the ones whose username or email starts with the "
+            "given prefix."
+        ),
+        parameters=SPARSE_FIELDS_PARAMETERS,
     )
-    def get(self, request):
-        """
-        Custom get method for retrieving all users.
-        """
+    def get(self, request, *args, **kwargs):
+        return self.list(request, *args, **kwargs)
 
-        try:
-            users = User.objects.all()
-            serializer = UserSerializer(users, many=True)
-            return Response(serializer.data, status=status.HTTP_200_OK)
-        except:
-            return Response(
-                {"error": "Unauthorized"}, status=status.HTTP_401_UNAUTHORIZED
-            )
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        serializer = self.get_serializer()
 
+        # Rows from values() skip model instances, see representation.py
+        representation = ValuesRepresentation.for_serializer(serializer, queryset)
+        if representation is None:
+            page = self.paginate_queryset(queryset)
+            data = self.get_serializer(page, many=True).data
+        else:
+            page = self.paginate_queryset(representation.values(queryset))
+            data = representation.many(page)
+        return self.get_paginated_response(data)
 
-class UserViewSet(APIView):
+
+class UserViewSet(ReplicaReadMixin, APIView):
     """
     Views for individual user.
     """
@@ -189,8 +227,12 @@ class UserViewSet(APIView):
                 {"error": "User not found"}, status=status.HTTP_404_NOT_FOUND
             )
 
-        serializer = UserSerializer(user)
-        return Response(serializer.data)
+        # The user has no modification time, so the ETag covers the exposed fields
+        etag = make_etag(request, user.pk, user.username, user.email)
+
+        return conditional_response(
+            request, lambda: Response(UserSerializer(user).data), etag
+        )
 
     @extend_schema(
         summary="Update a user by user id",
@@ -228,9 +270,15 @@ class UserViewSet(APIView):
 
     @extend_schema(
         summary="Delete a user by user id",
-        description="This endpoint deletes a user from the system.",
+        description=(
+            "This endpoint starts deleting a user from the system. The user is "
+            "deactivated at once, and deleted with their entries and events by a "
+            "background job. Follow the job at the URL in the Location header. "
+            "Users who delete themselves are signed out and can't follow it. "
+            "Deleting a user again returns the job already started."
+        ),
         responses={
-            204: {"description": "User deleted successfully"},
+            202: OpenApiResponse(JobSerializer, description="Deletion started"),
             404: {
                 "type": "object",
                 "properties": {"error": {"type": "string"}},
@@ -241,17 +289,18 @@ class UserViewSet(APIView):
         """
         Custom delete method for user.
         """
+        # Deleted in batches by a job, see tasks.py
         try:
-            user = User.objects.get(id=pk)
+            job = tasks.start_deletion(pk, created_by=request.user.pk)
         except User.DoesNotExist:
             return Response(
                 {"error": "User not found"}, status=status.HTTP_404_NOT_FOUND
             )
 
-        user.delete()
-
         return Response(
-            {"detail": "User deleted successfully."}, status=status.HTTP_204_NO_CONTENT
+            JobSerializer(job).data,
+            status=status.HTTP_202_ACCEPTED,
+            headers={"Location": reverse("job-detail", args=[job.pk])},
         )
 
 
@@ -260,10 +309,14 @@ class ChangePasswordView(APIView):
     View to change a user's password.
     """
 
+    # Loads the full user, the password is checked and changed
+    authentication_classes = [JWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     @extend_schema(
         request=ChangePasswordSerializer,
+        # The same bearer token as the other views, not a second scheme
+        auth=[{"jwtAuth": []}],
         responses={
             200: OpenApiResponse(description="Password changed successfully."),
             400: OpenApiResponse(
@@ -288,3 +341,24 @@ class ChangePasswordView(APIView):
             return Response(status=status.HTTP_204_NO_CONTENT)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class AsyncUserView(AsyncAPIView):
+    """
+    Async version of retrieving a single user.
+    """
+
+    async def get(self, request, pk):
+        try:
+            user = await User.objects.aget(id=pk)
+        except User.DoesNotExist:
+            return self.render(
+                {"error": "User not found"}, status=status.HTTP_404_NOT_FOUND
+            )
+
+        etag = make_etag(request, user.pk, user.username, user.email)
+
+        async def render():
+            return self.render(UserSerializer(user).data)
+
+        return await aconditional_response(request, render, etag)